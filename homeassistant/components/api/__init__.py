@@ -34,7 +34,7 @@ from homeassistant.const import (
 import homeassistant.core as ha
 from homeassistant.exceptions import ServiceNotFound, TemplateError, Unauthorized
 from homeassistant.helpers import template
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSONEncoder, json_dumps_with_fallback
 from homeassistant.helpers.network import NoURLAvailableError, get_url
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
@@ -229,7 +229,12 @@ class APIStatesView(HomeAssistantView):
             for state in request.app["hass"].states.async_all()
             if entity_perm(state.entity_id, "read")
         ]
-        return self.json(states)
+        return json_dumps_with_fallback(
+            lambda: self.json_text(
+                f"[{', '.join(state.as_json() for state in states)}]"
+            ),
+            lambda: self.json(states),
+        )
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -247,7 +252,9 @@ class APIEntityStateView(HomeAssistantView):
 
         state = request.app["hass"].states.get(entity_id)
         if state:
-            return self.json(state)
+            return json_dumps_with_fallback(
+                lambda: self.json_text(state.as_json()), lambda: self.json(state)
+            )
         return self.json_message("Entity not found.", HTTP_NOT_FOUND)
 
     async def post(self, request, entity_id):
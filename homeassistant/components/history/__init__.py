@@ -4,6 +4,7 @@ from datetime import datetime as dt, timedelta
 from itertools import groupby
 import json
 import logging
+import math
 import time
 from typing import Iterable, Optional, cast
 
@@ -15,9 +16,16 @@ import voluptuous as vol
 from homeassistant.components import recorder
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.recorder.models import (
+    StateAttributes,
+    StateCheckpoints,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
+    process_timestamp_to_utc_timestamp,
+)
+from homeassistant.components.recorder.statistics import (
+    STATISTIC_PERIODS,
+    statistics_during_period,
 )
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
@@ -32,6 +40,7 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
+    generate_filter,
 )
 from homeassistant.helpers.typing import HomeAssistantType
 import homeassistant.util.dt as dt_util
@@ -45,6 +54,11 @@ CONF_ORDER = "use_include_order"
 
 STATE_KEY = "state"
 LAST_CHANGED_KEY = "last_changed"
+LAST_UPDATED_KEY = "last_updated"
+ATTRIBUTES_KEY = "attributes"
+
+# Number of states fetched from the database at a time when streaming
+STREAM_ROWS = 1000
 
 GLOB_TO_SQL_CHARS = {
     42: "%",  # *
@@ -80,6 +94,7 @@ QUERY_STATES = [
     States.entity_id,
     States.state,
     States.attributes,
+    StateAttributes.shared_attrs,
     States.last_changed,
     States.last_updated,
 ]
@@ -87,6 +102,13 @@ QUERY_STATES = [
 HISTORY_BAKERY = "history_bakery"
 
 
+def _query_states(session):
+    """Query the QUERY_STATES columns, joining the shared attributes."""
+    return session.query(*QUERY_STATES).outerjoin(
+        StateAttributes, States.attributes_id == StateAttributes.attributes_id
+    )
+
+
 def get_significant_states(hass, *args, **kwargs):
     """Wrap _get_significant_states with a sql session."""
     with session_scope(hass=hass) as session:
@@ -103,6 +125,8 @@ def _get_significant_states(
     include_start_time_state=True,
     significant_changes_only=True,
     minimal_response=False,
+    max_points=None,
+    compact_response=False,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -110,12 +134,58 @@ def _get_significant_states(
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    When max_points is given, the numeric states of each entity are
+    downsampled to about that many points. With compact_response the
+    states of each entity are returned as parallel arrays.
     """
     timer_start = time.perf_counter()
 
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
+    query = _significant_states_query(
+        hass,
+        session,
+        start_time,
+        end_time,
+        entity_ids,
+        filters,
+        significant_changes_only,
     )
+    if max_points or compact_response:
+        # The rows are only read once, so fetch them as they are consumed
+        states = query.with_post_criteria(lambda q: q.yield_per(STREAM_ROWS))
+    else:
+        states = execute(query)
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return _sorted_states_to_json(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
+        max_points,
+        end_time,
+        compact_response,
+    )
+
+
+def _significant_states_query(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    significant_changes_only,
+):
+    """Return the query of the significant states sorted by entity_id."""
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
 
     if significant_changes_only:
         baked_query += lambda q: q.filter(
@@ -142,34 +212,74 @@ def _get_significant_states(
 
     baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
 
-    states = execute(
-        baked_query(session).params(
-            start_time=start_time, end_time=end_time, entity_ids=entity_ids
-        )
+    return baked_query(session).params(
+        start_time=start_time, end_time=end_time, entity_ids=entity_ids
     )
 
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
 
-    return _sorted_states_to_json(
-        hass,
-        session,
-        states,
-        start_time,
-        entity_ids,
-        filters,
-        include_start_time_state,
-        minimal_response,
-    )
+def _stream_significant_states(
+    hass,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    significant_changes_only=True,
+    minimal_response=False,
+    max_points=None,
+    compact_response=False,
+):
+    """Yield the significant states of one entity at a time.
+
+    Unlike _get_significant_states only the states of the entity being
+    yielded are held in memory. The entities with state changes come in
+    entity_id order, followed by the ones that only have a start state.
+    """
+    with session_scope(hass=hass) as session:
+        start_states = {}
+        if include_start_time_state:
+            run = recorder.run_information_from_instance(hass, start_time)
+            for state in _get_states_with_session(
+                hass, session, start_time, entity_ids, run=run, filters=filters
+            ):
+                state.last_changed = start_time
+                state.last_updated = start_time
+                start_states[state.entity_id] = state
+
+        states = _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+        ).with_post_criteria(lambda q: q.yield_per(STREAM_ROWS))
+
+        for ent_id, group in groupby(states, lambda state: state.entity_id):
+            if max_points:
+                group = _downsample_states(
+                    group, start_time, end_time or dt_util.utcnow(), max_points
+                )
+            start_state = start_states.pop(ent_id, None)
+            if compact_response:
+                yield _compact_entity_states(ent_id, start_state, group)
+                continue
+            ent_results = [] if start_state is None else [start_state]
+            _add_entity_states(ent_results, ent_id, group, minimal_response)
+            yield ent_results
+
+        for ent_id, state in start_states.items():
+            if compact_response:
+                yield _compact_entity_states(ent_id, state, ())
+            else:
+                yield [state]
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
 
         baked_query += lambda q: q.filter(
             (States.last_changed == States.last_updated)
@@ -182,7 +292,9 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             )
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
@@ -203,13 +315,13 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     start_time = dt_util.utcnow()
 
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
         baked_query += lambda q: q.filter(States.last_changed == States.last_updated)
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(
@@ -268,19 +380,30 @@ def _get_states_with_session(
             return []
 
     # We have more than one entity to look at (most commonly we want
-    # all entities,) so we need to do a search on all states since the
-    # last recorder run started.
-    query = session.query(*QUERY_STATES)
+    # all entities,) so we start from the last states recorded at the
+    # last checkpoint and search the states recorded since then, or
+    # since the recorder run started when there is no checkpoint.
+    checkpoint_time = (
+        session.query(func.max(StateCheckpoints.checkpoint_time))
+        .filter(
+            (StateCheckpoints.checkpoint_time >= run.start)
+            & (StateCheckpoints.checkpoint_time < utc_point_in_time)
+        )
+        .scalar()
+    )
 
     most_recent_states_by_date = session.query(
         States.entity_id.label("max_entity_id"),
         func.max(States.last_updated).label("max_last_updated"),
     ).filter(
-        (States.last_updated >= run.start) & (States.last_updated < utc_point_in_time)
+        (States.last_updated >= (checkpoint_time or run.start))
+        & (States.last_updated < utc_point_in_time)
     )
 
     if entity_ids:
-        most_recent_states_by_date.filter(States.entity_id.in_(entity_ids))
+        most_recent_states_by_date = most_recent_states_by_date.filter(
+            States.entity_id.in_(entity_ids)
+        )
 
     most_recent_states_by_date = most_recent_states_by_date.group_by(States.entity_id)
 
@@ -300,27 +423,44 @@ def _get_states_with_session(
 
     most_recent_state_ids = most_recent_state_ids.subquery()
 
-    query = query.join(
+    query = _query_states(session).join(
         most_recent_state_ids,
         States.state_id == most_recent_state_ids.c.max_state_id,
     )
 
-    if entity_ids is not None:
-        query = query.filter(States.entity_id.in_(entity_ids))
-    else:
-        query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
-        if filters:
-            query = filters.apply(query)
+    states = {}
+    if checkpoint_time is not None:
+        checkpoint_query = (
+            _query_states(session)
+            .join(StateCheckpoints, States.state_id == StateCheckpoints.state_id)
+            .filter(StateCheckpoints.checkpoint_time == checkpoint_time)
+        )
+        for row in execute(
+            _apply_states_filters(checkpoint_query, entity_ids, filters)
+        ):
+            states[row.entity_id] = row
 
-    return [LazyState(row) for row in execute(query)]
+    # The states recorded since the checkpoint replace the ones before
+    for row in execute(_apply_states_filters(query, entity_ids, filters)):
+        states[row.entity_id] = row
+
+    return [LazyState(row) for row in states.values()]
+
+
+def _apply_states_filters(query, entity_ids, filters):
+    """Filter states on the entity_ids or else on the configured filters."""
+    if entity_ids is not None:
+        return query.filter(States.entity_id.in_(entity_ids))
+    query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
+    if filters:
+        query = filters.apply(query)
+    return query
 
 
 def _get_single_entity_states_with_session(hass, session, utc_point_in_time, entity_id):
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
-    )
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
     baked_query += lambda q: q.filter(
         States.last_updated < bindparam("utc_point_in_time"),
         States.entity_id == bindparam("entity_id"),
@@ -344,6 +484,9 @@ def _sorted_states_to_json(
     filters=None,
     include_start_time_state=True,
     minimal_response=False,
+    max_points=None,
+    end_time=None,
+    compact_response=False,
 ):
     """Convert SQL results into JSON friendly data structure.
 
@@ -377,53 +520,165 @@ def _sorted_states_to_json(
         elapsed = time.perf_counter() - timer_start
         _LOGGER.debug("getting %d first datapoints took %fs", len(result), elapsed)
 
-    # Called in a tight loop so cache the function
-    # here
-    _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
-
     # Append all changes to it
     for ent_id, group in groupby(states, lambda state: state.entity_id):
-        domain = split_entity_id(ent_id)[0]
-        ent_results = result[ent_id]
-        if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
-            ent_results.extend(LazyState(db_state) for db_state in group)
-
-        # With minimal response we only provide a native
-        # State for the first and last response. All the states
-        # in-between only provide the "state" and the
-        # "last_changed".
-        if not ent_results:
-            ent_results.append(LazyState(next(group)))
-
-        prev_state = ent_results[-1]
-        initial_state_count = len(ent_results)
-
-        for db_state in group:
-            # With minimal response we do not care about attribute
-            # changes so we can filter out duplicate states
-            if db_state.state == prev_state.state:
-                continue
-
-            ent_results.append(
-                {
-                    STATE_KEY: db_state.state,
-                    LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
-                        db_state.last_changed
-                    ),
-                }
+        if max_points:
+            group = _downsample_states(
+                group, start_time, end_time or dt_util.utcnow(), max_points
             )
-            prev_state = db_state
-
-        if prev_state and len(ent_results) != initial_state_count:
-            # There was at least one state change
-            # replace the last minimal state with
-            # a full state
-            ent_results[-1] = LazyState(prev_state)
+        if compact_response:
+            start_state = result[ent_id][0] if result[ent_id] else None
+            result[ent_id] = _compact_entity_states(ent_id, start_state, group)
+            continue
+        _add_entity_states(result[ent_id], ent_id, group, minimal_response)
+
+    if compact_response:
+        # The entities that only have a start state
+        for ent_id, val in result.items():
+            if isinstance(val, list) and val:
+                result[ent_id] = _compact_entity_states(ent_id, val[0], ())
 
     # Filter out the empty lists if some states had 0 results.
     return {key: val for key, val in result.items() if val}
 
 
+def _add_entity_states(ent_results, ent_id, group, minimal_response):
+    """Add the states of an entity, sorted by last_updated, to its results."""
+    domain = split_entity_id(ent_id)[0]
+    if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
+        ent_results.extend(LazyState(db_state) for db_state in group)
+
+    # With minimal response we only provide a native
+    # State for the first and last response. All the states
+    # in-between only provide the "state" and the
+    # "last_changed".
+    if not ent_results:
+        ent_results.append(LazyState(next(group)))
+
+    prev_state = ent_results[-1]
+    initial_state_count = len(ent_results)
+
+    for db_state in group:
+        # With minimal response we do not care about attribute
+        # changes so we can filter out duplicate states
+        if db_state.state == prev_state.state:
+            continue
+
+        ent_results.append(
+            {
+                STATE_KEY: db_state.state,
+                LAST_CHANGED_KEY: process_timestamp_to_utc_isoformat(
+                    db_state.last_changed
+                ),
+            }
+        )
+        prev_state = db_state
+
+    if prev_state and len(ent_results) != initial_state_count:
+        # There was at least one state change
+        # replace the last minimal state with
+        # a full state
+        ent_results[-1] = LazyState(prev_state)
+
+
+def _compact_entity_states(ent_id, start_state, db_states):
+    """Return the states of an entity as parallel arrays.
+
+    The states are built from the rows without LazyState objects, with
+    last_updated in seconds since the epoch. Attributes are only given
+    for the states they changed at, as pairs of the index of the state
+    and the attributes.
+    """
+    # Called in a tight loop so cache the function
+    # here
+    _process_timestamp_to_utc_timestamp = process_timestamp_to_utc_timestamp
+
+    last_updated = []
+    states = []
+    attributes = []
+    prev_attrs = None
+    if start_state is not None:
+        last_updated.append(start_state.last_updated.timestamp())
+        states.append(start_state.state)
+        attributes.append([0, start_state.attributes])
+        prev_attrs = start_state.attributes_json()
+
+    for row in db_states:
+        attrs = row.shared_attrs or row.attributes
+        if attrs != prev_attrs:
+            try:
+                attributes.append([len(states), json.loads(attrs)])
+            except ValueError:
+                _LOGGER.exception("Error converting row to state: %s", row)
+                attributes.append([len(states), {}])
+            prev_attrs = attrs
+        last_updated.append(_process_timestamp_to_utc_timestamp(row.last_updated))
+        states.append(row.state or "")
+
+    return {
+        "entity_id": ent_id,
+        LAST_UPDATED_KEY: last_updated,
+        STATE_KEY: states,
+        ATTRIBUTES_KEY: attributes,
+    }
+
+
+def _downsample_states(db_states, start_time, end_time, max_points):
+    """Yield the states of an entity with the numeric ones downsampled.
+
+    The period is split in max_points / 4 buckets and only the first, the
+    last, the lowest and the highest numeric state of each bucket are kept,
+    which draws the same line chart as all of them. Other states are kept.
+    """
+    bucket_seconds = (end_time - start_time).total_seconds() / max(max_points // 4, 1)
+    if bucket_seconds <= 0:
+        yield from db_states
+        return
+
+    current_bucket = None
+    # The first, last, lowest and highest point of the bucket as
+    # (position, value, state)
+    first = last = low = high = None
+    position = 0
+
+    def flush():
+        if first is None:
+            return []
+        # Keep them in order, once each
+        kept = {point[0]: point[2] for point in (first, last, low, high)}
+        return [kept[pos] for pos in sorted(kept)]
+
+    for db_state in db_states:
+        try:
+            value = float(db_state.state)
+        except (TypeError, ValueError):
+            value = None
+        if value is None or not math.isfinite(value):
+            yield from flush()
+            current_bucket = first = None
+            yield db_state
+            continue
+
+        bucket_idx = int(
+            (process_timestamp(db_state.last_updated) - start_time).total_seconds()
+            // bucket_seconds
+        )
+        position += 1
+        point = (position, value, db_state)
+        if bucket_idx != current_bucket:
+            yield from flush()
+            current_bucket = bucket_idx
+            first = last = low = high = point
+            continue
+        last = point
+        if value < low[1]:
+            low = point
+        if value > high[1]:
+            high = point
+
+    yield from flush()
+
+
 def get_state(hass, utc_point_in_time, entity_id, run=None):
     """Return a state at a specific point in time."""
     states = get_states(hass, utc_point_in_time, (entity_id,), run)
@@ -462,7 +717,7 @@ class HistoryPeriodView(HomeAssistantView):
 
     async def get(
         self, request: web.Request, datetime: Optional[str] = None
-    ) -> web.Response:
+    ) -> web.StreamResponse:
         """Return history over a period of time."""
         datetime_ = None
         if datetime:
@@ -501,9 +756,34 @@ class HistoryPeriodView(HomeAssistantView):
         )
 
         minimal_response = "minimal_response" in request.query
+        compact_response = "compact_response" in request.query
+
+        max_points = None
+        max_points_str = request.query.get("max_points")
+        if max_points_str:
+            try:
+                max_points = vol.All(vol.Coerce(int), vol.Range(min=4))(max_points_str)
+            except vol.Invalid:
+                return self.json_message("Invalid max_points", HTTP_BAD_REQUEST)
 
         hass = request.app["hass"]
 
+        resolution = request.query.get("resolution")
+        if resolution is not None:
+            if resolution not in STATISTIC_PERIODS:
+                return self.json_message("Invalid resolution", HTTP_BAD_REQUEST)
+            return cast(
+                web.Response,
+                await hass.async_add_executor_job(
+                    self._statistics_json,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    resolution,
+                ),
+            )
+
         if (
             not include_start_time_state
             and entity_ids
@@ -511,6 +791,26 @@ class HistoryPeriodView(HomeAssistantView):
         ):
             return self.json([])
 
+        stream = request.query.get("stream")
+        if stream is not None:
+            # Entity by entity in entity_id order, the include order is not kept
+            return await self.json_stream(
+                request,
+                lambda: _stream_significant_states(
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    minimal_response,
+                    max_points,
+                    compact_response,
+                ),
+                ndjson=stream == "ndjson",
+            )
+
         return cast(
             web.Response,
             await hass.async_add_executor_job(
@@ -522,6 +822,8 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                max_points,
+                compact_response,
             ),
         )
 
@@ -534,6 +836,8 @@ class HistoryPeriodView(HomeAssistantView):
         include_start_time_state,
         significant_changes_only,
         minimal_response,
+        max_points,
+        compact_response,
     ):
         """Fetch significant stats from the database as json."""
         timer_start = time.perf_counter()
@@ -549,27 +853,61 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                max_points,
+                compact_response,
             )
 
-        result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
-            _LOGGER.debug("Extracted %d states in %fs", sum(map(len, result)), elapsed)
+            _LOGGER.debug(
+                "Extracted states of %d entities in %fs", len(result), elapsed
+            )
 
         # Optionally reorder the result to respect the ordering given
         # by any entities explicitly included in the configuration.
         if self.filters and self.use_include_order:
-            sorted_result = []
-            for order_entity in self.filters.included_entities:
-                for state_list in result:
-                    if state_list[0].entity_id == order_entity:
-                        sorted_result.append(state_list)
-                        result.remove(state_list)
-                        break
-            sorted_result.extend(result)
-            result = sorted_result
+            sorted_result = [
+                result.pop(order_entity)
+                for order_entity in self.filters.included_entities
+                if order_entity in result
+            ]
+            sorted_result.extend(result.values())
+            return self.json(sorted_result)
+
+        return self.json(list(result.values()))
+
+    def _statistics_json(self, hass, start_time, end_time, entity_ids, resolution):
+        """Fetch the statistics of numeric entities from the database as json."""
+        timer_start = time.perf_counter()
+
+        result = statistics_during_period(
+            hass, start_time, end_time, entity_ids, resolution
+        )
+
+        if self.filters and self.filters.has_config:
+            entity_filter = generate_filter(
+                self.filters.included_domains,
+                self.filters.included_entities,
+                self.filters.excluded_domains,
+                self.filters.excluded_entities,
+                self.filters.included_entity_globs,
+                self.filters.excluded_entity_globs,
+            )
+            result = {
+                entity_id: rows
+                for entity_id, rows in result.items()
+                if entity_filter(entity_id)
+            }
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug(
+                "Extracted %d statistics in %fs",
+                sum(map(len, result.values())),
+                elapsed,
+            )
 
-        return self.json(result)
+        return self.json(list(result.values()))
 
 
 def sqlalchemy_filter_from_include_exclude_conf(conf):
@@ -710,7 +1048,7 @@ class LazyState(State):
         """State attributes."""
         if not self._attributes:
             try:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json.loads(self.attributes_json())
             except ValueError:
                 # When json.loads fails
                 _LOGGER.exception("Error converting row to state: %s", self)
@@ -722,6 +1060,10 @@ class LazyState(State):
         """Set attributes."""
         self._attributes = value
 
+    def attributes_json(self):
+        """Return the attributes JSON as stored in the database."""
+        return self._row.shared_attrs or self._row.attributes
+
     @property  # type: ignore
     def context(self):
         """State context."""
@@ -17,7 +17,7 @@ from homeassistant.core import CALLBACK_TYPE, HassJob, callback
 from homeassistant.helpers import condition, config_validation as cv, template
 from homeassistant.helpers.event import (
     async_track_same_state,
-    async_track_state_change_event,
+    async_track_state_change_match,
 )
 
 # mypy: allow-incomplete-defs, allow-untyped-calls, allow-untyped-defs
@@ -104,7 +104,16 @@ async def async_attach_trigger(
         )
 
     @callback
-    def state_automation_listener(event):
+    def match(event):
+        """Return True if the new state meets the criteria."""
+        return check_numeric_state(
+            event.data["entity_id"],
+            event.data.get("old_state"),
+            event.data.get("new_state"),
+        )
+
+    @callback
+    def state_automation_listener(event, matching):
         """Listen for state changes and calls action."""
         entity_id = event.data.get("entity_id")
         from_s = event.data.get("old_state")
@@ -130,8 +139,6 @@ async def async_attach_trigger(
                 to_s.context,
             )
 
-        matching = check_numeric_state(entity_id, from_s, to_s)
-
         if not matching:
             entities_triggered.discard(entity_id)
         elif entity_id not in entities_triggered:
@@ -161,7 +168,22 @@ async def async_attach_trigger(
             else:
                 call_action()
 
-    unsub = async_track_state_change_event(hass, entity_ids, state_automation_listener)
+    # Triggers with the same criteria share the check of a state change
+    match_key = (
+        "numeric_state",
+        attribute,
+        below,
+        above,
+        None if value_template is None else value_template.template,
+    )
+    try:
+        hash(match_key)
+    except TypeError:
+        match_key = object()
+
+    unsub = async_track_state_change_match(
+        hass, entity_ids, match_key, match, state_automation_listener
+    )
 
     @callback
     def async_remove():
@@ -1,7 +1,7 @@
 """Offer state listening automation rules."""
 from datetime import timedelta
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
 import voluptuous as vol
 
@@ -12,7 +12,7 @@ from homeassistant.helpers import config_validation as cv, template
 from homeassistant.helpers.event import (
     Event,
     async_track_same_state,
-    async_track_state_change_event,
+    async_track_state_change_match,
     process_state_match,
 )
 
@@ -63,32 +63,27 @@ def TRIGGER_SCHEMA(value: Any) -> dict:  # pylint: disable=invalid-name
     return TRIGGER_STATE_SCHEMA(value)
 
 
-async def async_attach_trigger(
-    hass: HomeAssistant,
-    config,
-    action,
-    automation_info,
-    *,
-    platform_type: str = "state",
-) -> CALLBACK_TYPE:
-    """Listen for state changes based on configuration."""
-    entity_id = config.get(CONF_ENTITY_ID)
-    from_state = config.get(CONF_FROM, MATCH_ALL)
-    to_state = config.get(CONF_TO, MATCH_ALL)
-    time_delta = config.get(CONF_FOR)
-    template.attach(hass, time_delta)
+def _match_key(value: Any) -> Any:
+    """Return a hashable key for a from or to option."""
+    if isinstance(value, list):
+        return frozenset(value)
+    return value
+
+
+def _state_matcher(
+    from_state: Any, to_state: Any, attribute: Optional[str]
+) -> Callable[[Event], Optional[Tuple[Any, Any]]]:
+    """Compile the from, to and attribute options into a state change matcher.
+
+    The matcher returns the old and new value when the state change
+    matches and None otherwise.
+    """
     match_all = from_state == MATCH_ALL and to_state == MATCH_ALL
-    unsub_track_same = {}
-    period: Dict[str, timedelta] = {}
     match_from_state = process_state_match(from_state)
     match_to_state = process_state_match(to_state)
-    attribute = config.get(CONF_ATTRIBUTE)
-    job = HassJob(action)
 
-    @callback
-    def state_automation_listener(event: Event):
-        """Listen for state changes and calls action."""
-        entity: str = event.data["entity_id"]
+    def match(event: Event) -> Optional[Tuple[Any, Any]]:
+        """Match a state change."""
         from_s: Optional[State] = event.data.get("old_state")
         to_s: Optional[State] = event.data.get("new_state")
 
@@ -111,14 +106,58 @@ async def async_attach_trigger(
         # we listen to just an attribute, we should ignore all
         # other attribute changes.
         if attribute is not None and old_value == new_value:
-            return
+            return None
 
         if (
             not match_from_state(old_value)
             or not match_to_state(new_value)
             or (not match_all and old_value == new_value)
         ):
-            return
+            return None
+
+        return old_value, new_value
+
+    return match
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config,
+    action,
+    automation_info,
+    *,
+    platform_type: str = "state",
+) -> CALLBACK_TYPE:
+    """Listen for state changes based on configuration."""
+    entity_id = config.get(CONF_ENTITY_ID)
+    from_state = config.get(CONF_FROM, MATCH_ALL)
+    to_state = config.get(CONF_TO, MATCH_ALL)
+    time_delta = config.get(CONF_FOR)
+    template.attach(hass, time_delta)
+    unsub_track_same = {}
+    period: Dict[str, timedelta] = {}
+    attribute = config.get(CONF_ATTRIBUTE)
+    job = HassJob(action)
+
+    # Triggers with the same options share the matching of a state change
+    match_key: Hashable = (
+        "state",
+        attribute,
+        _match_key(from_state),
+        _match_key(to_state),
+    )
+    try:
+        hash(match_key)
+    except TypeError:
+        match_key = object()
+
+    @callback
+    def state_automation_listener(event: Event, values: Tuple[Any, Any]):
+        """Listen for matching state changes and calls action."""
+        entity: str = event.data["entity_id"]
+        from_s: Optional[State] = event.data.get("old_state")
+        to_s: Optional[State] = event.data.get("new_state")
+        old_value, new_value = values
 
         @callback
         def call_action():
@@ -184,7 +223,13 @@ async def async_attach_trigger(
             entity_ids=entity,
         )
 
-    unsub = async_track_state_change_event(hass, entity_id, state_automation_listener)
+    unsub = async_track_state_change_match(
+        hass,
+        entity_id,
+        match_key,
+        _state_matcher(from_state, to_state, attribute),
+        state_automation_listener,
+    )
 
     @callback
     def async_remove():
@@ -2,9 +2,11 @@
 import asyncio
 import json
 import logging
-from typing import Any, Callable, List, Optional
+import threading
+from typing import Any, Callable, Generator, List, Optional
 
 from aiohttp import web
+from aiohttp.hdrs import CONTENT_TYPE
 from aiohttp.typedefs import LooseHeaders
 from aiohttp.web_exceptions import (
     HTTPBadRequest,
@@ -22,6 +24,13 @@ from .const import KEY_AUTHENTICATED, KEY_HASS
 
 _LOGGER = logging.getLogger(__name__)
 
+CONTENT_TYPE_NDJSON = "application/x-ndjson"
+
+# Serialized items are written in chunks of about this many characters
+STREAM_CHUNK_SIZE = 65536
+# Number of chunks that can be waiting to be written
+STREAM_QUEUE_SIZE = 4
+
 
 class HomeAssistantView:
     """Base view for all views."""
@@ -49,12 +58,21 @@ class HomeAssistantView:
     ) -> web.Response:
         """Return a JSON response."""
         try:
-            msg = json.dumps(result, cls=JSONEncoder, allow_nan=False).encode("UTF-8")
+            msg = json.dumps(result, cls=JSONEncoder, allow_nan=False)
         except (ValueError, TypeError) as err:
             _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
             raise HTTPInternalServerError from err
+        return HomeAssistantView.json_text(msg, status_code, headers)
+
+    @staticmethod
+    def json_text(
+        text: str,
+        status_code: int = HTTP_OK,
+        headers: Optional[LooseHeaders] = None,
+    ) -> web.Response:
+        """Return a response with an already serialized JSON body."""
         response = web.Response(
-            body=msg,
+            body=text.encode("UTF-8"),
             content_type=CONTENT_TYPE_JSON,
             status=status_code,
             headers=headers,
@@ -62,6 +80,92 @@ class HomeAssistantView:
         response.enable_compression()
         return response
 
+    @staticmethod
+    async def json_stream(
+        request: web.Request,
+        generate: Callable[[], Generator[Any, None, None]],
+        ndjson: bool = False,
+    ) -> web.StreamResponse:
+        """Return a chunked response with the JSON of the generated items.
+
+        The items are generated and serialized in the executor and handed
+        over in chunks through a bounded queue, so the memory used does not
+        grow with the size of the response. The items are written as a JSON
+        array, or with ndjson as one JSON document per line.
+        """
+        hass = request.app[KEY_HASS]
+        queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def put(chunk: Any) -> None:
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(chunk), hass.loop).result()
+
+        def produce() -> None:
+            """Serialize the generated items, stops when the client is gone."""
+            chunk = [] if ndjson else ["["]
+            size = 0
+            first = True
+            items = generate()
+            try:
+                for item in items:
+                    text = json.dumps(item, cls=JSONEncoder, allow_nan=False)
+                    if ndjson:
+                        text += "\n"
+                    elif not first:
+                        text = "," + text
+                    chunk.append(text)
+                    size += len(text)
+                    # The first item is sent right away to start the response
+                    if first or size >= STREAM_CHUNK_SIZE:
+                        if stopped.is_set():
+                            return
+                        put("".join(chunk))
+                        chunk = []
+                        size = 0
+                    first = False
+                if not ndjson:
+                    chunk.append("]")
+                put("".join(chunk))
+                put(None)
+            except Exception as err:  # pylint: disable=broad-except
+                put(err)
+            finally:
+                items.close()
+
+        hass.async_add_executor_job(produce)
+        try:
+            chunk = await queue.get()
+            if isinstance(chunk, Exception):
+                _LOGGER.error("Unable to serialize to JSON: %s", chunk)
+                raise HTTPInternalServerError from chunk
+
+            response = web.StreamResponse(
+                headers={
+                    CONTENT_TYPE: CONTENT_TYPE_NDJSON if ndjson else CONTENT_TYPE_JSON
+                }
+            )
+            response.enable_chunked_encoding()
+            response.enable_compression()
+            await response.prepare(request)
+            while chunk is not None:
+                if isinstance(chunk, Exception):
+                    # Too late for an error status, close the connection so
+                    # the client does not take the truncated body as complete
+                    _LOGGER.error("Unable to stream JSON: %s", chunk)
+                    if request.transport is not None:
+                        request.transport.close()
+                    return response
+                await response.write(chunk.encode("UTF-8"))
+                chunk = await queue.get()
+            await response.write_eof()
+            return response
+        finally:
+            stopped.set()
+            # Unblock the executor job if it waits for room in the queue
+            while not queue.empty():
+                queue.get_nowait()
+
     def json_message(
         self,
         message: str,
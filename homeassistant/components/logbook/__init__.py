@@ -1,19 +1,27 @@
 """Event parser and human readable log generator."""
+import asyncio
 from datetime import timedelta
-from itertools import groupby
+from functools import partial
+from itertools import groupby, islice
 import json
 import re
+import threading
 
 import sqlalchemy
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import literal
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.history import sqlalchemy_filter_from_include_exclude_conf
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.models import (
+    EventData,
     Events,
+    EventTypes,
+    StateAttributes,
     States,
     process_timestamp_to_utc_isoformat,
 )
@@ -26,12 +34,14 @@ from homeassistant.const import (
     ATTR_ICON,
     ATTR_NAME,
     ATTR_SERVICE,
+    ATTR_UNIT_OF_MEASUREMENT,
     EVENT_CALL_SERVICE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
     EVENT_LOGBOOK_ENTRY,
     EVENT_STATE_CHANGED,
     HTTP_BAD_REQUEST,
+    MATCH_ALL,
 )
 from homeassistant.core import DOMAIN as HA_DOMAIN, callback, split_entity_id
 from homeassistant.exceptions import InvalidEntityFormatError
@@ -50,7 +60,8 @@ import homeassistant.util.dt as dt_util
 ENTITY_ID_JSON_TEMPLATE = '"entity_id": "{}"'
 ENTITY_ID_JSON_EXTRACT = re.compile('"entity_id": "([^"]+)"')
 DOMAIN_JSON_EXTRACT = re.compile('"domain": "([^"]+)"')
-ICON_JSON_EXTRACT = re.compile('"icon": "([^"]+)"')
+# Attributes are recorded as compact JSON, older rows have spaces
+ICON_JSON_EXTRACT = re.compile('"icon": ?"([^"]+)"')
 
 ATTR_MESSAGE = "message"
 
@@ -88,16 +99,39 @@ ALL_EVENT_TYPES = [
 ]
 
 EVENT_COLUMNS = [
-    Events.event_type,
+    EventTypes.event_type,
     Events.event_data,
+    EventData.shared_data,
     Events.time_fired,
     Events.context_id,
     Events.context_user_id,
     Events.context_parent_id,
+    Events.event_id,
+    Events.origin_event_id,
 ]
 
+# Number of rows that have the origin of their context looked up at once
+CONTEXT_ORIGIN_CHUNK_SIZE = 500
+
+# Number of recorded entries sent per message of an event stream
+EVENT_STREAM_CHUNK_SIZE = 1000
+# Number of messages an event stream lets wait for the client before fetching more
+EVENT_STREAM_PENDING_MESSAGES = 2
+# Number of contexts an event stream remembers to describe live events
+EVENT_STREAM_CONTEXTS = 2048
+
 SCRIPT_AUTOMATION_EVENTS = [EVENT_AUTOMATION_TRIGGERED, EVENT_SCRIPT_STARTED]
 
+WS_TYPE_EVENT_STREAM = "logbook/event_stream"
+SCHEMA_WS_EVENT_STREAM = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
+    {
+        vol.Required("type"): WS_TYPE_EVENT_STREAM,
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+
 LOG_MESSAGE_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_NAME): cv.string,
@@ -162,6 +196,16 @@ async def async_setup(hass, config):
         entities_filter = None
 
     hass.http.register_view(LogbookView(conf, filters, entities_filter))
+    websocket_api.async_register_command(
+        hass,
+        WS_TYPE_EVENT_STREAM,
+        websocket_api.async_response(
+            partial(
+                websocket_event_stream, filters=filters, entities_filter=entities_filter
+            )
+        ),
+        SCHEMA_WS_EVENT_STREAM,
+    )
 
     hass.services.async_register(DOMAIN, "log", log_message, schema=LOG_MESSAGE_SCHEMA)
 
@@ -234,6 +278,22 @@ class LogbookView(HomeAssistantView):
 
         entity_matches_only = "entity_matches_only" in request.query
 
+        stream = request.query.get("stream")
+        if stream is not None:
+            return await self.json_stream(
+                request,
+                lambda: _stream_events(
+                    hass,
+                    start_day,
+                    end_day,
+                    entity_ids,
+                    self.filters,
+                    self.entities_filter,
+                    entity_matches_only,
+                ),
+                ndjson=stream == "ndjson",
+            )
+
         def json_events():
             """Fetch events and generate JSON."""
             return self.json(
@@ -251,6 +311,170 @@ class LogbookView(HomeAssistantView):
         return await hass.async_add_executor_job(json_events)
 
 
+async def websocket_event_stream(
+    hass, connection, msg, filters=None, entities_filter=None
+):
+    """Stream the logbook, the recorded entries first and then live ones.
+
+    The recorded entries are sent in messages marked as partial, the first
+    message that is not partial completes them and carries the entries of
+    the events fired meanwhile.
+    """
+    msg_id = msg["id"]
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg_id, "invalid_start_time", "Invalid start_time")
+        return
+
+    end_time = None
+    if "end_time" in msg:
+        end_time = dt_util.parse_datetime(msg["end_time"])
+        if end_time is None:
+            connection.send_error(msg_id, "invalid_end_time", "Invalid end_time")
+            return
+
+    entity_ids = msg.get("entity_ids")
+    live_entities_filter = entities_filter
+    if entity_ids is not None:
+        live_entities_filter = generate_filter([], entity_ids, [], [])
+
+    entity_attr_cache = EntityAttributeCache(hass)
+    context_lookup = {None: None}
+    # Events fired while the recorded entries are sent
+    pending_events = []
+    stopped = threading.Event()
+
+    @callback
+    def send_live_events(events, recorded_sent=False):
+        """Send the entries of live events."""
+        entries = list(
+            humanify(
+                hass,
+                _keep_live_events(hass, events, context_lookup, live_entities_filter),
+                entity_attr_cache,
+                context_lookup,
+            )
+        )
+        _trim_context_lookup(context_lookup)
+        if not entries and not recorded_sent:
+            return
+        connection.send_message(
+            websocket_api.event_message(msg_id, {"events": entries})
+        )
+
+    @callback
+    def forward_event(event):
+        """Forward live events once the recorded entries are sent."""
+        if pending_events is not None:
+            pending_events.append(event)
+        else:
+            send_live_events([event])
+
+    @callback
+    def event_filter(event):
+        """Filter out the events the logbook does not describe."""
+        return (
+            event.event_type in ALL_EVENT_TYPES or event.event_type in hass.data[DOMAIN]
+        ) and (end_time is None or event.time_fired < end_time)
+
+    unsub = hass.bus.async_listen(MATCH_ALL, forward_event, event_filter=event_filter)
+
+    @callback
+    def unsubscribe():
+        """Stop the live events and the recorded entries still being sent."""
+        stopped.set()
+        unsub()
+
+    connection.subscriptions[msg_id] = unsubscribe
+    connection.send_result(msg_id)
+
+    backfill_end = dt_util.utcnow()
+    if end_time is not None and end_time < backfill_end:
+        backfill_end = end_time
+    # Ensure the events fired before the subscription are in the database
+    await hass.data[DATA_INSTANCE].async_commit()
+
+    async def async_send_chunk(chunk):
+        """Send a chunk of recorded entries once the client caught up."""
+        connection.send_message(
+            websocket_api.event_message(msg_id, {"events": chunk, "partial": True})
+        )
+        await connection.async_drain(EVENT_STREAM_PENDING_MESSAGES)
+
+    def send_recorded_entries():
+        """Send the recorded entries in chunks as they are fetched.
+
+        The next chunk is only fetched once the client read the previous ones.
+        """
+        entries = _stream_events(
+            hass,
+            start_time,
+            backfill_end,
+            entity_ids,
+            filters,
+            entities_filter,
+            context_lookup=context_lookup,
+        )
+        try:
+            while not stopped.is_set():
+                chunk = list(islice(entries, EVENT_STREAM_CHUNK_SIZE))
+                if not chunk:
+                    return
+                asyncio.run_coroutine_threadsafe(
+                    async_send_chunk(chunk), hass.loop
+                ).result()
+        finally:
+            entries.close()
+
+    await hass.async_add_executor_job(send_recorded_entries)
+    if stopped.is_set():
+        return
+
+    events, pending_events = pending_events, None
+    send_live_events(events, recorded_sent=True)
+
+
+def _keep_live_events(hass, events, context_lookup, entities_filter):
+    """Yield the live events that are not filtered away.
+
+    Applies the filters the database queries of the recorded entries use.
+    """
+    for event in events:
+        event = LiveEventPartialState(event)
+        context_lookup.setdefault(event.context_id, event)
+        if event.event_type == EVENT_CALL_SERVICE:
+            continue
+        if event.event_type == EVENT_STATE_CHANGED:
+            if _keep_live_state_change(event, entities_filter):
+                yield event
+        elif _keep_event(hass, event, entities_filter):
+            yield event
+
+
+def _keep_live_state_change(event, entities_filter):
+    old_state = event.old_state
+    if old_state is None or event.state is None or old_state.state == event.state:
+        return False
+
+    if (
+        event.domain in CONTINUOUS_DOMAINS
+        and ATTR_UNIT_OF_MEASUREMENT in event.attributes
+    ):
+        return False
+
+    return entities_filter is None or entities_filter(event.entity_id)
+
+
+def _trim_context_lookup(context_lookup):
+    """Forget the oldest contexts of an event stream."""
+    excess = len(context_lookup) - EVENT_STREAM_CONTEXTS
+    if excess <= 0:
+        return
+    for context_id in list(islice(context_lookup, excess + 1)):
+        if context_id is not None:
+            del context_lookup[context_id]
+
+
 def humanify(hass, events, entity_attr_cache, context_lookup):
     """Generate a converted list of events into Entry objects.
 
@@ -417,33 +641,97 @@ def _get_events(
     entity_matches_only=False,
 ):
     """Get events for a period of time."""
+    return list(
+        _stream_events(
+            hass,
+            start_day,
+            end_day,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+        )
+    )
+
+
+def _stream_events(
+    hass,
+    start_day,
+    end_day,
+    entity_ids=None,
+    filters=None,
+    entities_filter=None,
+    entity_matches_only=False,
+    context_lookup=None,
+):
+    """Yield the logbook entries of a period of time as they are fetched."""
 
     entity_attr_cache = EntityAttributeCache(hass)
-    context_lookup = {None: None}
+    if context_lookup is None:
+        context_lookup = {None: None}
 
     def yield_events(query):
         """Yield Events that are not filtered away."""
-        for row in query.yield_per(1000):
-            event = LazyEventPartialState(row)
-            context_lookup.setdefault(event.context_id, event)
-            if event.event_type == EVENT_CALL_SERVICE:
-                continue
-            if event.event_type == EVENT_STATE_CHANGED or _keep_event(
-                hass, event, entities_filter
-            ):
-                yield event
+        # The event_id of the scanned events that are first of their context
+        context_event_ids = set()
+        rows = iter(query.yield_per(1000))
+        while True:
+            chunk = list(islice(rows, CONTEXT_ORIGIN_CHUNK_SIZE))
+            if not chunk:
+                return
+
+            # The recorder links events to the first event of their context,
+            # which can be before the period or filtered away
+            origin_ids = {
+                row.origin_event_id
+                for row in chunk
+                if row.origin_event_id is not None
+                and row.origin_event_id not in context_event_ids
+            } - {row.event_id for row in chunk}
+            origins = (
+                {
+                    row.event_id: LazyEventPartialState(row)
+                    for row in _generate_context_origins_query(
+                        origins_session, origin_ids
+                    )
+                }
+                if origin_ids
+                else {}
+            )
+
+            for row in chunk:
+                origin = origins.get(row.origin_event_id)
+                if origin is not None:
+                    context_lookup.setdefault(origin.context_id, origin)
+                event = LazyEventPartialState(row)
+                if context_lookup.setdefault(event.context_id, event) is event:
+                    context_event_ids.add(row.event_id)
+                if event.event_type == EVENT_CALL_SERVICE:
+                    continue
+                if event.event_type == EVENT_STATE_CHANGED or _keep_event(
+                    hass, event, entities_filter
+                ):
+                    yield event
 
     if entity_ids is not None:
         entities_filter = generate_filter([], entity_ids, [], [])
 
-    with session_scope(hass=hass) as session:
+    # The origins are looked up while the events are streamed from the
+    # database, which needs another connection on some engines
+    with session_scope(hass=hass) as session, session_scope(
+        hass=hass
+    ) as origins_session:
         old_state = aliased(States, name="old_state")
+        event_type_ids = _get_event_type_ids(
+            session, ALL_EVENT_TYPES + list(hass.data.get(DOMAIN, {}))
+        )
+        not_state_changed = _not_event_type_matcher(event_type_ids, EVENT_STATE_CHANGED)
 
         if entity_ids is not None:
             query = _generate_events_query_without_states(session)
             query = _apply_event_time_filter(query, start_day, end_day)
             query = _apply_event_types_filter(
-                hass, query, ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED
+                hass, query, ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED, event_type_ids
             )
             if entity_matches_only:
                 # When entity_matches_only is provided, contexts and events that do not
@@ -456,23 +744,20 @@ def _get_events(
                 )
             )
         else:
-            query = _generate_events_query(session)
+            query = _join_event_types_and_data(
+                _generate_events_query(session).select_from(Events)
+            )
             query = _apply_event_time_filter(query, start_day, end_day)
             query = _apply_events_types_and_states_filter(
-                hass, query, old_state
-            ).filter(
-                (States.last_updated == States.last_changed)
-                | (Events.event_type != EVENT_STATE_CHANGED)
-            )
+                hass, query, old_state, event_type_ids, not_state_changed
+            ).filter((States.last_updated == States.last_changed) | not_state_changed)
             if filters:
-                query = query.filter(
-                    filters.entity_filter() | (Events.event_type != EVENT_STATE_CHANGED)
-                )
+                query = query.filter(filters.entity_filter() | not_state_changed)
 
         query = query.order_by(Events.time_fired)
 
-        return list(
-            humanify(hass, yield_events(query), entity_attr_cache, context_lookup)
+        yield from humanify(
+            hass, yield_events(query), entity_attr_cache, context_lookup
         )
 
 
@@ -483,24 +768,51 @@ def _generate_events_query(session):
         States.entity_id,
         States.domain,
         States.attributes,
+        StateAttributes.shared_attrs,
     )
 
 
 def _generate_events_query_without_states(session):
-    return session.query(
-        *EVENT_COLUMNS,
-        literal(None).label("state"),
-        literal(None).label("entity_id"),
-        literal(None).label("domain"),
-        literal(None).label("attributes"),
+    return _join_event_types_and_data(
+        session.query(
+            *EVENT_COLUMNS,
+            literal(None).label("state"),
+            literal(None).label("entity_id"),
+            literal(None).label("domain"),
+            literal(None).label("attributes"),
+            literal(None).label("shared_attrs"),
+        ).select_from(Events)
+    )
+
+
+def _generate_context_origins_query(session, event_ids):
+    return (
+        _join_event_types_and_data(_generate_events_query(session).select_from(Events))
+        .outerjoin(States, (Events.event_id == States.event_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
+        .filter(Events.event_id.in_(event_ids))
     )
 
 
+def _join_event_types_and_data(query):
+    return query.outerjoin(
+        EventTypes, (Events.event_type_id == EventTypes.event_type_id)
+    ).outerjoin(EventData, (Events.data_id == EventData.data_id))
+
+
 def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
     return (
-        _generate_events_query(session)
-        .outerjoin(Events, (States.event_id == Events.event_id))
+        _join_event_types_and_data(
+            _generate_events_query(session)
+            .select_from(States)
+            .outerjoin(Events, (States.event_id == Events.event_id))
+        )
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(_missing_state_matcher(old_state))
         .filter(_continuous_entity_matcher())
         .filter((States.last_updated > start_day) & (States.last_updated < end_day))
@@ -511,19 +823,21 @@ def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
     )
 
 
-def _apply_events_types_and_states_filter(hass, query, old_state):
+def _apply_events_types_and_states_filter(
+    hass, query, old_state, event_type_ids, not_state_changed
+):
     events_query = (
         query.outerjoin(States, (Events.event_id == States.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
-        .filter(
-            (Events.event_type != EVENT_STATE_CHANGED)
-            | _missing_state_matcher(old_state)
-        )
-        .filter(
-            (Events.event_type != EVENT_STATE_CHANGED) | _continuous_entity_matcher()
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
         )
+        .filter(not_state_changed | _missing_state_matcher(old_state))
+        .filter(not_state_changed | _continuous_entity_matcher())
+    )
+    return _apply_event_types_filter(
+        hass, events_query, ALL_EVENT_TYPES, event_type_ids
     )
-    return _apply_event_types_filter(hass, events_query, ALL_EVENT_TYPES)
 
 
 def _missing_state_matcher(old_state):
@@ -544,7 +858,11 @@ def _continuous_entity_matcher():
     #
     return sqlalchemy.or_(
         sqlalchemy.not_(States.domain.in_(CONTINUOUS_DOMAINS)),
-        sqlalchemy.not_(States.attributes.contains(UNIT_OF_MEASUREMENT_JSON)),
+        sqlalchemy.not_(
+            sqlalchemy.func.coalesce(
+                StateAttributes.shared_attrs, States.attributes
+            ).contains(UNIT_OF_MEASUREMENT_JSON)
+        ),
     )
 
 
@@ -554,9 +872,31 @@ def _apply_event_time_filter(events_query, start_day, end_day):
     )
 
 
-def _apply_event_types_filter(hass, query, event_types):
+def _get_event_type_ids(session, event_types):
+    # Event types are interned by the recorder, the ones that were never
+    # recorded have no id and no events to match.
+    return dict(
+        session.query(EventTypes.event_type, EventTypes.event_type_id).filter(
+            EventTypes.event_type.in_(event_types)
+        )
+    )
+
+
+def _not_event_type_matcher(event_type_ids, event_type):
+    if event_type not in event_type_ids:
+        return sqlalchemy.true()
+    return Events.event_type_id != event_type_ids[event_type]
+
+
+def _apply_event_types_filter(hass, query, event_types, event_type_ids):
     return query.filter(
-        Events.event_type.in_(event_types + list(hass.data.get(DOMAIN, {})))
+        Events.event_type_id.in_(
+            [
+                event_type_ids[event_type]
+                for event_type in event_types + list(hass.data.get(DOMAIN, {}))
+                if event_type in event_type_ids
+            ]
+        )
     )
 
 
@@ -564,7 +904,9 @@ def _apply_event_entity_id_matchers(events_query, entity_ids):
     return events_query.filter(
         sqlalchemy.or_(
             *[
-                Events.event_data.contains(ENTITY_ID_JSON_TEMPLATE.format(entity_id))
+                sqlalchemy.func.coalesce(
+                    EventData.shared_data, Events.event_data
+                ).contains(ENTITY_ID_JSON_TEMPLATE.format(entity_id))
                 for entity_id in entity_ids
             ]
         )
@@ -671,6 +1013,7 @@ class LazyEventPartialState:
     __slots__ = [
         "_row",
         "_event_data",
+        "_event_data_json",
         "_time_fired_isoformat",
         "_attributes",
         "event_type",
@@ -687,6 +1030,7 @@ class LazyEventPartialState:
         """Init the lazy event."""
         self._row = row
         self._event_data = None
+        self._event_data_json = self._row.shared_data or self._row.event_data
         self._time_fired_isoformat = None
         self._attributes = None
         self.event_type = self._row.event_type
@@ -704,7 +1048,9 @@ class LazyEventPartialState:
         if self._attributes:
             return self._attributes.get(ATTR_ICON)
 
-        result = ICON_JSON_EXTRACT.search(self._row.attributes)
+        result = ICON_JSON_EXTRACT.search(
+            self._row.shared_attrs or self._row.attributes
+        )
         return result and result.group(1)
 
     @property
@@ -713,7 +1059,7 @@ class LazyEventPartialState:
         if self._event_data:
             return self._event_data.get(ATTR_ENTITY_ID)
 
-        result = ENTITY_ID_JSON_EXTRACT.search(self._row.event_data)
+        result = ENTITY_ID_JSON_EXTRACT.search(self._event_data_json)
         return result and result.group(1)
 
     @property
@@ -722,30 +1068,28 @@ class LazyEventPartialState:
         if self._event_data:
             return self._event_data.get(ATTR_DOMAIN)
 
-        result = DOMAIN_JSON_EXTRACT.search(self._row.event_data)
+        result = DOMAIN_JSON_EXTRACT.search(self._event_data_json)
         return result and result.group(1)
 
     @property
     def attributes(self):
         """State attributes."""
         if not self._attributes:
-            if (
-                self._row.attributes is None
-                or self._row.attributes == EMPTY_JSON_OBJECT
-            ):
+            source = self._row.shared_attrs or self._row.attributes
+            if source is None or source == EMPTY_JSON_OBJECT:
                 self._attributes = {}
             else:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json.loads(source)
         return self._attributes
 
     @property
     def data(self):
         """Event data."""
         if not self._event_data:
-            if self._row.event_data == EMPTY_JSON_OBJECT:
+            if self._event_data_json == EMPTY_JSON_OBJECT:
                 self._event_data = {}
             else:
-                self._event_data = json.loads(self._row.event_data)
+                self._event_data = json.loads(self._event_data_json)
         return self._event_data
 
     @property
@@ -759,6 +1103,78 @@ class LazyEventPartialState:
         return self._time_fired_isoformat
 
 
+class LiveEventPartialState:
+    """A live event with the same interface as LazyEventPartialState."""
+
+    __slots__ = [
+        "_event",
+        "_attributes",
+        "old_state",
+        "event_type",
+        "entity_id",
+        "state",
+        "domain",
+        "context_id",
+        "context_user_id",
+        "context_parent_id",
+        "time_fired_minute",
+    ]
+
+    def __init__(self, event):
+        """Init the live event."""
+        self._event = event
+        self.event_type = event.event_type
+        self.context_id = event.context.id
+        self.context_user_id = event.context.user_id
+        self.context_parent_id = event.context.parent_id
+        self.time_fired_minute = event.time_fired.minute
+        self.old_state = None
+        new_state = None
+        if self.event_type == EVENT_STATE_CHANGED:
+            self.old_state = event.data.get("old_state")
+            new_state = event.data.get("new_state")
+        if new_state is None:
+            self._attributes = {}
+            self.entity_id = self.state = self.domain = None
+        else:
+            self._attributes = new_state.attributes
+            self.entity_id = new_state.entity_id
+            self.state = new_state.state
+            self.domain = new_state.domain
+
+    @property
+    def attributes_icon(self):
+        """Extract the icon from the attributes."""
+        return self._attributes.get(ATTR_ICON)
+
+    @property
+    def data_entity_id(self):
+        """Extract the entity id from the data."""
+        return self.data.get(ATTR_ENTITY_ID)
+
+    @property
+    def data_domain(self):
+        """Extract the domain from the data."""
+        return self.data.get(ATTR_DOMAIN)
+
+    @property
+    def attributes(self):
+        """State attributes."""
+        return self._attributes
+
+    @property
+    def data(self):
+        """Event data, empty for state changes like the recorded ones."""
+        if self.event_type == EVENT_STATE_CHANGED:
+            return {}
+        return self._event.data
+
+    @property
+    def time_fired_isoformat(self):
+        """Time event was fired in utc isoformat."""
+        return process_timestamp_to_utc_isoformat(self._event.time_fired)
+
+
 class EntityAttributeCache:
     """A cache to lookup static entity_id attribute.
 
@@ -1,15 +1,22 @@
 """Support for recording details."""
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import queue
 import threading
 import time
-from typing import Any, Callable, List, Optional
-
-from sqlalchemy import create_engine, event as sqlalchemy_event, exc, select
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import (
+    create_engine,
+    event as sqlalchemy_event,
+    exc,
+    func,
+    select,
+    text,
+)
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import StaticPool
 import voluptuous as vol
@@ -34,9 +41,23 @@ from homeassistant.helpers.entityfilter import (
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
-from . import migration, purge
+from . import migration, purge, statistics
 from .const import CONF_DB_INTEGRITY_CHECK, DATA_INSTANCE, DOMAIN, SQLITE_URL_PREFIX
-from .models import Base, Events, RecorderRuns, States
+from .models import (
+    TABLE_EVENT_DATA,
+    TABLE_EVENT_TYPES,
+    TABLE_EVENTS,
+    TABLE_STATE_ATTRIBUTES,
+    TABLE_STATES,
+    Base,
+    EventData,
+    Events,
+    EventTypes,
+    RecorderRuns,
+    StateAttributes,
+    StateCheckpoints,
+    States,
+)
 from .util import session_scope, validate_or_move_away_sqlite_database
 
 _LOGGER = logging.getLogger(__name__)
@@ -59,8 +80,25 @@ DEFAULT_DB_INTEGRITY_CHECK = True
 DEFAULT_DB_MAX_RETRIES = 10
 DEFAULT_DB_RETRY_WAIT = 3
 DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_PURGE_BATCH_SIZE = 1000
 KEEPALIVE_TIME = 30
 
+# Number of recently recorded event data and attributes to remember the id of
+SHARED_CACHE_SIZE = 2048
+# Maximum number of hashes or event types to look up in one query
+SHARED_LOOKUP_CHUNK_SIZE = 500
+# Number of recent contexts to remember the first recorded event of
+CONTEXT_CACHE_SIZE = 2048
+
+# The tables the recorder assigns the primary keys of
+ASSIGNED_ID_COLUMNS = {
+    TABLE_EVENTS: Events.event_id,
+    TABLE_EVENT_DATA: EventData.data_id,
+    TABLE_EVENT_TYPES: EventTypes.event_type_id,
+    TABLE_STATES: States.state_id,
+    TABLE_STATE_ATTRIBUTES: StateAttributes.attributes_id,
+}
+
 # Controls how often we clean up
 # States and Events objects
 EXPIRE_AFTER_COMMITS = 120
@@ -71,6 +109,7 @@ CONF_DB_MAX_RETRIES = "db_max_retries"
 CONF_DB_RETRY_WAIT = "db_retry_wait"
 CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
+CONF_PURGE_BATCH_SIZE = "purge_batch_size"
 CONF_EVENT_TYPES = "event_types"
 CONF_COMMIT_INTERVAL = "commit_interval"
 
@@ -93,6 +132,9 @@ CONFIG_SCHEMA = vol.Schema(
                         vol.Coerce(int), vol.Range(min=1)
                     ),
                     vol.Optional(CONF_PURGE_INTERVAL, default=1): cv.positive_int,
+                    vol.Optional(
+                        CONF_PURGE_BATCH_SIZE, default=DEFAULT_PURGE_BATCH_SIZE
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
                     vol.Optional(CONF_DB_URL): cv.string,
                     vol.Optional(
                         CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL
@@ -160,6 +202,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     entity_filter = convert_include_exclude_filter(conf)
     auto_purge = conf[CONF_AUTO_PURGE]
     keep_days = conf[CONF_PURGE_KEEP_DAYS]
+    purge_batch_size = conf[CONF_PURGE_BATCH_SIZE]
     commit_interval = conf[CONF_COMMIT_INTERVAL]
     db_max_retries = conf[CONF_DB_MAX_RETRIES]
     db_retry_wait = conf[CONF_DB_RETRY_WAIT]
@@ -174,6 +217,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         hass=hass,
         auto_purge=auto_purge,
         keep_days=keep_days,
+        purge_batch_size=purge_batch_size,
         commit_interval=commit_interval,
         uri=db_url,
         db_max_retries=db_max_retries,
@@ -198,11 +242,44 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 PurgeTask = namedtuple("PurgeTask", ["keep_days", "repack"])
 
+StatisticsTask = namedtuple("StatisticsTask", ["start"])
+
+StateCheckpointTask = namedtuple("StateCheckpointTask", ["checkpoint_time"])
+
+# The rows of an event waiting for the next commit, the event type, the
+# event data and the state attributes are stored in their shared tables
+PendingEvent = namedtuple(
+    "PendingEvent",
+    ["event_type", "shared_data", "event_row", "state_row", "shared_attrs"],
+)
+
 
 class WaitTask:
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
 
 
+class KeepAliveTask:
+    """An object to insert into the recorder queue to keep the database connection alive."""
+
+
+class CommitTask:
+    """An object to insert into the recorder queue to commit the event session.
+
+    The optional future is resolved in the event loop once committed.
+    """
+
+    def __init__(self, future=None):
+        """Initialize the commit task."""
+        self.future = future
+
+
+@callback
+def _async_set_committed(future):
+    """Resolve the future of a commit task unless it was cancelled."""
+    if not future.done():
+        future.set_result(None)
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -211,6 +288,7 @@ class Recorder(threading.Thread):
         hass: HomeAssistant,
         auto_purge: bool,
         keep_days: int,
+        purge_batch_size: int,
         commit_interval: int,
         uri: str,
         db_max_retries: int,
@@ -225,6 +303,9 @@ class Recorder(threading.Thread):
         self.hass = hass
         self.auto_purge = auto_purge
         self.keep_days = keep_days
+        self.purge_batch_size = purge_batch_size
+        self.purge_metrics: Optional[purge.PurgeMetrics] = None
+        self.statistics_collector = statistics.StatisticsCollector()
         self.commit_interval = commit_interval
         self.queue: Any = queue.SimpleQueue()
         self.recording_start = dt_util.utcnow()
@@ -240,11 +321,22 @@ class Recorder(threading.Thread):
         self.entity_filter = entity_filter
         self.exclude_t = exclude_t
 
-        self._timechanges_seen = 0
         self._commits_without_expire = 0
-        self._keepalive_count = 0
-        self._old_states = {}
-        self._pending_expunge = []
+        self._pending_commit = False
+        self._keep_alive_listener = None
+        self._commit_listener = None
+        self._pending_rows: List[PendingEvent] = []
+        # The state_id of the last recorded state of each entity
+        self._old_state_ids: Dict[str, int] = {}
+        # Whether _old_state_ids has all entities recorded in this run
+        self._old_state_ids_complete = True
+        # The event_type_id of the recorded event types
+        self._event_type_ids: Dict[str, int] = {}
+        # The id of recently recorded event data and attributes, least recent first
+        self._data_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._attributes_ids: "OrderedDict[str, int]" = OrderedDict()
+        # The event_id of the first recorded event of recent contexts
+        self._context_event_ids: "OrderedDict[str, int]" = OrderedDict()
         self.event_session = None
         self.get_session = None
         self._completed_database_setup = False
@@ -252,7 +344,21 @@ class Recorder(threading.Thread):
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
-        self.hass.bus.async_listen(MATCH_ALL, self.event_listener)
+        self.hass.bus.async_listen(
+            MATCH_ALL, self.event_listener, event_filter=self._async_event_filter
+        )
+
+    @callback
+    def _async_event_filter(self, event):
+        """Filter out events that should not be recorded."""
+        if event.event_type == EVENT_TIME_CHANGED:
+            return False
+
+        if event.event_type in self.exclude_t:
+            return False
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        return entity_id is None or self.entity_filter(entity_id)
 
     def do_adhoc_purge(self, **kwargs):
         """Trigger an adhoc purge retaining keep_days worth of data."""
@@ -312,6 +418,7 @@ class Recorder(threading.Thread):
                     hass_started.set_result(shutdown_task)
                 self.queue.put(None)
                 self.join()
+                self._stop_timers()
 
             self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown)
 
@@ -348,11 +455,25 @@ class Recorder(threading.Thread):
                 async_purge, hour=4, minute=12, second=0
             )
 
+        self._keep_alive_listener = self.hass.helpers.event.track_time_interval(
+            self._async_keep_alive, timedelta(seconds=KEEPALIVE_TIME)
+        )
+        if self.commit_interval:
+            self._commit_listener = self.hass.helpers.event.track_time_interval(
+                self._async_commit, timedelta(seconds=self.commit_interval)
+            )
+        self.hass.helpers.event.track_utc_time_change(
+            self._async_compile_statistics, minute="/5", second=0
+        )
+        self.hass.helpers.event.track_utc_time_change(
+            self._async_write_state_checkpoint, minute=0, second=0
+        )
+
         self.event_session = self.get_session()
         self.event_session.expire_on_commit = False
         # Use a session for the event read loop
-        # with a commit every time the event time
-        # has changed. This reduces the disk io.
+        # with a commit every commit interval.
+        # This reduces the disk io.
         while True:
             event = self.queue.get()
             if event is None:
@@ -360,76 +481,354 @@ class Recorder(threading.Thread):
                 self._close_connection()
                 return
             if isinstance(event, PurgeTask):
-                # Schedule a new purge task if this one didn't finish
-                if not purge.purge_old_data(self, event.keep_days, event.repack):
+                # Pending rows may use event data or attributes the purge removes
+                self._commit_event_session_or_retry()
+                finished = purge.purge_old_data(self, event.keep_days, event.repack)
+                # Each batch may delete cached event data, attributes and events
+                self._data_ids.clear()
+                self._attributes_ids.clear()
+                self._context_event_ids.clear()
+                if not finished:
+                    # Schedule the next batch behind the events queued meanwhile
                     self.queue.put(PurgeTask(event.keep_days, event.repack))
                 continue
+            if isinstance(event, StatisticsTask):
+                statistics.compile_statistics(self, event.start)
+                continue
+            if isinstance(event, StateCheckpointTask):
+                self._write_state_checkpoint(event.checkpoint_time)
+                continue
             if isinstance(event, WaitTask):
                 self._queue_watch.set()
                 continue
-            if event.event_type == EVENT_TIME_CHANGED:
-                self._keepalive_count += 1
-                if self._keepalive_count >= KEEPALIVE_TIME:
-                    self._keepalive_count = 0
-                    self._send_keep_alive()
-                if self.commit_interval:
-                    self._timechanges_seen += 1
-                    if self._timechanges_seen >= self.commit_interval:
-                        self._timechanges_seen = 0
-                        self._commit_event_session_or_retry()
+            if isinstance(event, KeepAliveTask):
+                self._send_keep_alive()
                 continue
-            if event.event_type in self.exclude_t:
+            if isinstance(event, CommitTask):
+                self._commit_event_session_or_retry()
+                if event.future is not None:
+                    self.hass.loop.call_soon_threadsafe(
+                        _async_set_committed, event.future
+                    )
                 continue
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    continue
+            self._add_event_rows(event)
 
+            # If they do not have a commit interval
+            # than we commit right away
+            if not self.commit_interval:
+                self._commit_event_session_or_retry()
+
+    def _add_event_rows(self, event):
+        """Queue the rows of an event for the next commit."""
+        try:
+            if event.event_type == EVENT_STATE_CHANGED:
+                event_row = Events.row_from_event(event, event_data="{}")
+            else:
+                event_row = Events.row_from_event(event)
+            event_row["created"] = event.time_fired
+            # Stored once in the event_types and event_data tables, the
+            # event type is still written to the events table for external
+            # readers, such as sql sensors, until they move to event_types
+            event_type = event_row["event_type"]
+            shared_data = event_row.pop("event_data")
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error adding event: %s", err)
+            return
+
+        state_row = shared_attrs = None
+        if event.event_type == EVENT_STATE_CHANGED:
             try:
-                if event.event_type == EVENT_STATE_CHANGED:
-                    dbevent = Events.from_event(event, event_data="{}")
-                else:
-                    dbevent = Events.from_event(event)
-                dbevent.created = event.time_fired
-                self.event_session.add(dbevent)
+                state_row = States.row_from_event(event)
+                if not event.data.get("new_state"):
+                    state_row["state"] = None
+                state_row["created"] = event.time_fired
+                self.statistics_collector.add_state(
+                    state_row["entity_id"],
+                    event.data.get("new_state"),
+                    event.time_fired,
+                )
+                # Stored once in the state_attributes table
+                shared_attrs = state_row["attributes"]
+                state_row["attributes"] = None
             except (TypeError, ValueError):
-                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                _LOGGER.warning(
+                    "State is not JSON serializable: %s",
+                    event.data.get("new_state"),
+                )
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
-                _LOGGER.exception("Error adding event: %s", err)
-
-            if dbevent and event.event_type == EVENT_STATE_CHANGED:
-                try:
-                    dbstate = States.from_event(event)
-                    has_new_state = event.data.get("new_state")
-                    if dbstate.entity_id in self._old_states:
-                        old_state = self._old_states.pop(dbstate.entity_id)
-                        if old_state.state_id:
-                            dbstate.old_state_id = old_state.state_id
-                        else:
-                            dbstate.old_state = old_state
-                    if not has_new_state:
-                        dbstate.state = None
-                    dbstate.event = dbevent
-                    dbstate.created = event.time_fired
-                    self.event_session.add(dbstate)
-                    if has_new_state:
-                        self._old_states[dbstate.entity_id] = dbstate
-                        self._pending_expunge.append(dbstate)
-                except (TypeError, ValueError):
-                    _LOGGER.warning(
-                        "State is not JSON serializable: %s",
-                        event.data.get("new_state"),
+                _LOGGER.exception("Error adding state change: %s", err)
+
+        self._pending_rows.append(
+            PendingEvent(event_type, shared_data, event_row, state_row, shared_attrs)
+        )
+
+    def _insert_pending_rows(self):
+        """Insert the pending rows with one executemany per table.
+
+        The primary keys are assigned here so the events and states can
+        reference their shared rows and the states can reference their event
+        and the previous state of their entity within the same batch. They
+        follow the last keys in the database, read again for every batch so
+        rows added by other writers are skipped.
+
+        Returns the state_id of the last state of each entity in the batch,
+        None when the entity was removed, the id of the event types, event
+        data and attributes used by the batch and the event_id of the
+        contexts first recorded in the batch.
+        """
+        session = self.event_session
+        last_ids = {
+            table: session.query(func.max(column)).scalar() or 0
+            for table, column in ASSIGNED_ID_COLUMNS.items()
+        }
+
+        batch_event_type_ids = self._find_event_type_ids(
+            {pending.event_type for pending in self._pending_rows}
+        )
+        batch_data_ids = self._find_shared_ids(
+            EventData,
+            EventData.data_id,
+            EventData.shared_data,
+            self._data_ids,
+            {pending.shared_data for pending in self._pending_rows},
+        )
+        batch_attributes_ids = self._find_shared_ids(
+            StateAttributes,
+            StateAttributes.attributes_id,
+            StateAttributes.shared_attrs,
+            self._attributes_ids,
+            {
+                pending.shared_attrs
+                for pending in self._pending_rows
+                if pending.shared_attrs
+            },
+        )
+
+        rows: Dict[str, List[Dict[str, Any]]] = {
+            table: [] for table in ASSIGNED_ID_COLUMNS
+        }
+        batch_state_ids: Dict[str, Optional[int]] = {}
+        batch_context_event_ids: Dict[str, int] = {}
+        for (
+            event_type,
+            shared_data,
+            event_row,
+            state_row,
+            shared_attrs,
+        ) in self._pending_rows:
+            if event_type not in batch_event_type_ids:
+                batch_event_type_ids[event_type] = _add_row(
+                    rows, last_ids, TABLE_EVENT_TYPES, {"event_type": event_type}
+                )
+            if shared_data not in batch_data_ids:
+                batch_data_ids[shared_data] = _add_row(
+                    rows,
+                    last_ids,
+                    TABLE_EVENT_DATA,
+                    {
+                        "hash": EventData.hash_shared(shared_data),
+                        "shared_data": shared_data,
+                    },
+                )
+            event_row["event_type_id"] = batch_event_type_ids[event_type]
+            event_row["data_id"] = batch_data_ids[shared_data]
+            context_id = event_row["context_id"]
+            origin_event_id = self._context_event_id(
+                batch_context_event_ids, context_id
+            )
+            first_of_context = origin_event_id is None
+            if first_of_context:
+                # Caused by the first event of the parent context
+                origin_event_id = self._context_event_id(
+                    batch_context_event_ids, event_row["context_parent_id"]
+                )
+            event_row["origin_event_id"] = origin_event_id
+            event_id = _add_row(rows, last_ids, TABLE_EVENTS, event_row)
+            if first_of_context:
+                batch_context_event_ids[context_id] = event_id
+            if state_row is None:
+                continue
+
+            if shared_attrs not in batch_attributes_ids:
+                batch_attributes_ids[shared_attrs] = _add_row(
+                    rows,
+                    last_ids,
+                    TABLE_STATE_ATTRIBUTES,
+                    {
+                        "hash": StateAttributes.hash_shared(shared_attrs),
+                        "shared_attrs": shared_attrs,
+                    },
+                )
+
+            entity_id = state_row["entity_id"]
+            state_row["event_id"] = event_id
+            state_row["attributes_id"] = batch_attributes_ids[shared_attrs]
+            if entity_id in batch_state_ids:
+                state_row["old_state_id"] = batch_state_ids[entity_id]
+            else:
+                state_row["old_state_id"] = self._old_state_ids.get(entity_id)
+            state_id = _add_row(rows, last_ids, TABLE_STATES, state_row)
+            batch_state_ids[entity_id] = (
+                None if state_row["state"] is None else state_id
+            )
+
+        # Referenced rows first
+        for model in (EventTypes, EventData, Events, StateAttributes, States):
+            if rows[model.__tablename__]:
+                session.execute(model.__table__.insert(), rows[model.__tablename__])
+
+        if self.engine.dialect.name == "postgresql":
+            # Keep the sequences in line with the ids we assigned
+            for table, column in ASSIGNED_ID_COLUMNS.items():
+                if not rows[table]:
+                    continue
+                session.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', "
+                        f"'{column.name}'), :last_id)"
+                    ),
+                    {"last_id": last_ids[table]},
+                )
+
+        return (
+            batch_state_ids,
+            batch_event_type_ids,
+            batch_data_ids,
+            batch_attributes_ids,
+            batch_context_event_ids,
+        )
+
+    def _context_event_id(self, batch_context_event_ids, context_id):
+        """Return the event_id of the first recorded event of a context."""
+        if context_id is None:
+            return None
+        if context_id in batch_context_event_ids:
+            return batch_context_event_ids[context_id]
+        return self._context_event_ids.get(context_id)
+
+    def _find_event_type_ids(self, event_types):
+        """Return the event_type_id of event types that are already stored."""
+        found = {}
+        missing = []
+        for event_type in event_types:
+            event_type_id = self._event_type_ids.get(event_type)
+            if event_type_id is None:
+                missing.append(event_type)
+            else:
+                found[event_type] = event_type_id
+
+        for idx in range(0, len(missing), SHARED_LOOKUP_CHUNK_SIZE):
+            found.update(
+                self.event_session.query(
+                    EventTypes.event_type, EventTypes.event_type_id
+                ).filter(
+                    EventTypes.event_type.in_(
+                        missing[idx : idx + SHARED_LOOKUP_CHUNK_SIZE]
                     )
-                except Exception as err:  # pylint: disable=broad-except
-                    # Must catch the exception to prevent the loop from collapsing
-                    _LOGGER.exception("Error adding state change: %s", err)
+                )
+            )
 
-            # If they do not have a commit interval
-            # than we commit right away
-            if not self.commit_interval:
-                self._commit_event_session_or_retry()
+        return found
+
+    def _find_shared_ids(self, model, id_column, shared_column, cache, all_shared):
+        """Return the id of event data or attributes that are already stored.
+
+        Recently used ones are found in memory, the others are looked up by
+        their hash in the table of the model.
+        """
+        found = {}
+        missing = {}
+        for shared in all_shared:
+            shared_id = cache.get(shared)
+            if shared_id is None:
+                missing[shared] = model.hash_shared(shared)
+            else:
+                cache.move_to_end(shared)
+                found[shared] = shared_id
+
+        hashes = list(set(missing.values()))
+        for idx in range(0, len(hashes), SHARED_LOOKUP_CHUNK_SIZE):
+            for shared_id, shared in self.event_session.query(
+                id_column, shared_column
+            ).filter(model.hash.in_(hashes[idx : idx + SHARED_LOOKUP_CHUNK_SIZE])):
+                if shared in missing:
+                    found[shared] = shared_id
+
+        return found
+
+    def _stop_timers(self):
+        """Cancel the keep alive and commit timers."""
+        if self._keep_alive_listener:
+            self._keep_alive_listener()
+            self._keep_alive_listener = None
+        if self._commit_listener:
+            self._commit_listener()
+            self._commit_listener = None
+
+    @callback
+    def _async_keep_alive(self, now):
+        """Queue a keep alive of the database connection."""
+        self.queue.put(KeepAliveTask())
+
+    @callback
+    def _async_compile_statistics(self, now):
+        """Queue compiling the statistics of the period that just ended."""
+        self.queue.put(
+            StatisticsTask(statistics.period_start(now) - statistics.SHORT_TERM_PERIOD)
+        )
+
+    @callback
+    def _async_write_state_checkpoint(self, now):
+        """Queue a checkpoint of the last recorded state of each entity."""
+        # Not the scheduled time, the states set since then are queued before
+        self.queue.put(StateCheckpointTask(dt_util.utcnow()))
+
+    def _write_state_checkpoint(self, checkpoint_time):
+        """Store the state_id of the last recorded state of each entity.
+
+        History looks up the states at a point in time from the last
+        checkpoint before it and the states recorded since that checkpoint.
+        """
+        if not self._old_state_ids_complete:
+            return
+        self._commit_event_session_or_retry()
+        if not self._old_state_ids:
+            return
+
+        try:
+            with session_scope(session=self.get_session()) as session:
+                session.execute(
+                    StateCheckpoints.__table__.insert(),
+                    [
+                        {"checkpoint_time": checkpoint_time, "state_id": state_id}
+                        for state_id in self._old_state_ids.values()
+                    ],
+                )
+        except exc.SQLAlchemyError as err:
+            _LOGGER.warning("Error writing state checkpoint: %s", err)
+
+    @callback
+    def async_commit(self):
+        """Commit the events queued so far.
+
+        Returns a future that is done once they are in the database.
+        """
+        future = self.hass.loop.create_future()
+        self.queue.put(CommitTask(future))
+        return future
+
+    @callback
+    def _async_commit(self, now):
+        """Queue a commit if events were recorded since the last one."""
+        if self._pending_commit:
+            self._pending_commit = False
+            self.queue.put(CommitTask())
 
     def _send_keep_alive(self):
         try:
@@ -473,6 +872,7 @@ class Recorder(threading.Thread):
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
                 _LOGGER.exception("Error saving events: %s", err)
+                self._pending_rows = []
                 return
 
         _LOGGER.error(
@@ -481,7 +881,18 @@ class Recorder(threading.Thread):
         )
         self._reopen_event_session()
 
+    def _clear_id_caches(self):
+        """Forget the ids of recorded rows, they may no longer be in the database."""
+        self._old_state_ids = {}
+        # Checkpoints would miss the entities recorded before
+        self._old_state_ids_complete = False
+        self._event_type_ids = {}
+        self._data_ids.clear()
+        self._attributes_ids.clear()
+        self._context_event_ids.clear()
+
     def _reopen_event_session(self):
+        self._pending_rows = []
         try:
             self.event_session.rollback()
         except Exception as err:  # pylint: disable=broad-except
@@ -504,28 +915,55 @@ class Recorder(threading.Thread):
     def _commit_event_session(self):
         self._commits_without_expire += 1
 
-        try:
-            if self._pending_expunge:
-                self.event_session.flush()
-                for dbstate in self._pending_expunge:
-                    # Expunge the state so its not expired
-                    # until we use it later for dbstate.old_state
-                    if dbstate in self.event_session:
-                        self.event_session.expunge(dbstate)
-                self._pending_expunge = []
-            self.event_session.commit()
-        except exc.IntegrityError as err:
-            _LOGGER.error(
-                "Integrity error executing query (database likely deleted out from under us): %s",
-                err,
+        tries = 0
+        while True:
+            try:
+                batch_ids = None
+                if self._pending_rows:
+                    batch_ids = self._insert_pending_rows()
+                self.event_session.commit()
+                break
+            except exc.IntegrityError as err:
+                self.event_session.rollback()
+                self._clear_id_caches()
+                tries += 1
+                if self._pending_rows and tries <= 1:
+                    # Another writer took the keys assigned to the batch
+                    _LOGGER.warning(
+                        "Integrity error inserting rows, retrying with new keys: %s",
+                        err,
+                    )
+                    continue
+                _LOGGER.error(
+                    "Integrity error executing query (database likely deleted out from under us): %s",
+                    err,
+                )
+                raise
+            except Exception as err:
+                _LOGGER.error("Error executing query: %s", err)
+                self.event_session.rollback()
+                raise
+
+        if batch_ids is not None:
+            self._pending_rows = []
+            (
+                batch_state_ids,
+                batch_event_type_ids,
+                batch_data_ids,
+                batch_attributes_ids,
+                batch_context_event_ids,
+            ) = batch_ids
+            for entity_id, state_id in batch_state_ids.items():
+                if state_id is None:
+                    self._old_state_ids.pop(entity_id, None)
+                else:
+                    self._old_state_ids[entity_id] = state_id
+            self._event_type_ids.update(batch_event_type_ids)
+            _remember_shared_ids(self._data_ids, batch_data_ids)
+            _remember_shared_ids(self._attributes_ids, batch_attributes_ids)
+            _remember_shared_ids(
+                self._context_event_ids, batch_context_event_ids, CONTEXT_CACHE_SIZE
             )
-            self.event_session.rollback()
-            self._old_states = {}
-            raise
-        except Exception as err:
-            _LOGGER.error("Error executing query: %s", err)
-            self.event_session.rollback()
-            raise
 
         # Expire is an expensive operation (frequently more expensive
         # than the flush and commit itself) so we only
@@ -537,6 +975,7 @@ class Recorder(threading.Thread):
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
+        self._pending_commit = True
         self.queue.put(event)
 
     def block_till_done(self):
@@ -648,3 +1087,20 @@ class Recorder(threading.Thread):
             self.event_session.close()
 
         self.run_info = None
+
+
+def _add_row(rows, last_ids, table, row):
+    """Assign the next primary key of the table to a row and queue it."""
+    last_ids[table] += 1
+    row[ASSIGNED_ID_COLUMNS[table].name] = last_ids[table]
+    rows[table].append(row)
+    return last_ids[table]
+
+
+def _remember_shared_ids(cache, batch_ids, max_size=SHARED_CACHE_SIZE):
+    """Remember the id of recently recorded event data, attributes or contexts."""
+    for shared, shared_id in batch_ids.items():
+        cache[shared] = shared_id
+        cache.move_to_end(shared)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
@@ -7,7 +7,14 @@ from sqlalchemy.exc import InternalError, OperationalError, SQLAlchemyError
 from sqlalchemy.schema import AddConstraint, DropConstraint
 
 from .const import DOMAIN
-from .models import SCHEMA_VERSION, TABLE_STATES, Base, SchemaChanges
+from .models import (
+    SCHEMA_VERSION,
+    TABLE_EVENT_TYPES,
+    TABLE_EVENTS,
+    TABLE_STATES,
+    Base,
+    SchemaChanges,
+)
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
@@ -206,6 +213,30 @@ def _add_columns(engine, table_name, columns_def):
             )
 
 
+def _intern_event_types(engine):
+    """Move the event types of existing events to the event_types table."""
+    _LOGGER.warning(
+        "Interning the event types of existing events. Note: this can take "
+        "several minutes on large databases and slow computers. Please "
+        "be patient!"
+    )
+    engine.execute(
+        text(
+            f"INSERT INTO {TABLE_EVENT_TYPES} (event_type) "
+            f"SELECT DISTINCT event_type FROM {TABLE_EVENTS} "
+            "WHERE event_type IS NOT NULL"
+        )
+    )
+    engine.execute(
+        text(
+            f"UPDATE {TABLE_EVENTS} SET event_type_id = ("
+            f"SELECT event_type_id FROM {TABLE_EVENT_TYPES} "
+            f"WHERE {TABLE_EVENT_TYPES}.event_type = {TABLE_EVENTS}.event_type"
+            ") WHERE event_type IS NOT NULL"
+        )
+    )
+
+
 def _update_states_table_with_foreign_key_options(engine):
     """Add the options to foreign key constraints."""
     inspector = reflection.Inspector.from_engine(engine)
@@ -323,6 +354,31 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 11:
         _create_index(engine, "states", "ix_states_old_state_id")
         _update_states_table_with_foreign_key_options(engine)
+    elif new_version == 12:
+        # The state_attributes table is created with the other missing
+        # tables, existing states keep their attributes in the states table
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 13:
+        # The event_data and event_types tables are created with the other
+        # missing tables, existing events keep their data in the events table
+        _add_columns(engine, "events", ["event_type_id INTEGER", "data_id INTEGER"])
+        _create_index(engine, "events", "ix_events_data_id")
+        _intern_event_types(engine)
+        _create_index(engine, "events", "ix_events_event_type_id_time_fired")
+        _drop_index(engine, "events", "ix_events_event_type_time_fired")
+    elif new_version == 14:
+        # The statistics tables are created with the other missing tables
+        pass
+    elif new_version == 15:
+        # The state_checkpoints table is created with the other missing tables
+        pass
+    elif new_version == 16:
+        _add_columns(engine, "events", ["origin_event_id INTEGER"])
+        _create_index(engine, "events", "ix_events_origin_event_id")
+    elif new_version == 17:
+        _add_columns(engine, "statistics", ["seconds FLOAT"])
+        _add_columns(engine, "statistics_short_term", ["seconds FLOAT"])
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
@@ -1,11 +1,15 @@
 """Models for SQLAlchemy."""
+from datetime import timedelta
 import json
 import logging
+import zlib
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -25,18 +29,35 @@ import homeassistant.util.dt as dt_util
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 11
+SCHEMA_VERSION = 17
 
 _LOGGER = logging.getLogger(__name__)
 
 DB_TIMEZONE = "+00:00"
 
 TABLE_EVENTS = "events"
+TABLE_EVENT_DATA = "event_data"
+TABLE_EVENT_TYPES = "event_types"
 TABLE_STATES = "states"
+TABLE_STATE_ATTRIBUTES = "state_attributes"
+TABLE_STATE_CHECKPOINTS = "state_checkpoints"
 TABLE_RECORDER_RUNS = "recorder_runs"
+TABLE_STATISTICS = "statistics"
+TABLE_STATISTICS_SHORT_TERM = "statistics_short_term"
 TABLE_SCHEMA_CHANGES = "schema_changes"
 
-ALL_TABLES = [TABLE_STATES, TABLE_EVENTS, TABLE_RECORDER_RUNS, TABLE_SCHEMA_CHANGES]
+ALL_TABLES = [
+    TABLE_STATES,
+    TABLE_STATE_ATTRIBUTES,
+    TABLE_STATE_CHECKPOINTS,
+    TABLE_EVENTS,
+    TABLE_EVENT_DATA,
+    TABLE_EVENT_TYPES,
+    TABLE_RECORDER_RUNS,
+    TABLE_SCHEMA_CHANGES,
+    TABLE_STATISTICS,
+    TABLE_STATISTICS_SHORT_TERM,
+]
 
 
 class Events(Base):  # type: ignore
@@ -56,25 +77,53 @@ class Events(Base):  # type: ignore
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
     context_parent_id = Column(String(36), index=True)
+    event_type_id = Column(Integer, ForeignKey("event_types.event_type_id"))
+    data_id = Column(Integer, ForeignKey("event_data.data_id"), index=True)
+    # The first recorded event of the context, or of the parent context
+    # for the first event of a context, see logbook
+    origin_event_id = Column(
+        Integer, ForeignKey("events.event_id", ondelete="SET NULL"), index=True
+    )
+    interned_event_type = relationship("EventTypes", lazy="joined")
+    shared_event_data = relationship("EventData", lazy="joined")
 
     __table_args__ = (
         # Used for fetching events at a specific time
         # see logbook
-        Index("ix_events_event_type_time_fired", "event_type", "time_fired"),
+        Index("ix_events_event_type_id_time_fired", "event_type_id", "time_fired"),
     )
 
     @staticmethod
     def from_event(event, event_data=None):
         """Create an event database object from a native event."""
-        return Events(
-            event_type=event.event_type,
-            event_data=event_data or json.dumps(event.data, cls=JSONEncoder),
-            origin=str(event.origin.value),
-            time_fired=event.time_fired,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            context_parent_id=event.context.parent_id,
-        )
+        return Events(**Events.row_from_event(event, event_data))
+
+    @staticmethod
+    def row_from_event(event, event_data=None):
+        """Create the column values of an events row from a native event."""
+        return {
+            "event_type": event.event_type,
+            "event_data": event_data or json.dumps(event.data, cls=JSONEncoder),
+            "origin": str(event.origin.value),
+            "time_fired": event.time_fired,
+            "context_id": event.context.id,
+            "context_user_id": event.context.user_id,
+            "context_parent_id": event.context.parent_id,
+        }
+
+    @property
+    def shared_event_type(self):
+        """Return the event type, from the event_types table if interned."""
+        if self.interned_event_type is not None:
+            return self.interned_event_type.event_type
+        return self.event_type
+
+    @property
+    def shared_data(self):
+        """Return the event data JSON, from the event_data table if shared."""
+        if self.shared_event_data is not None:
+            return self.shared_event_data.shared_data
+        return self.event_data
 
     def to_native(self, validate_entity_id=True):
         """Convert to a natve HA Event."""
@@ -85,8 +134,8 @@ class Events(Base):  # type: ignore
         )
         try:
             return Event(
-                self.event_type,
-                json.loads(self.event_data),
+                self.shared_event_type,
+                json.loads(self.shared_data),
                 EventOrigin(self.origin),
                 process_timestamp(self.time_fired),
                 context=context,
@@ -119,8 +168,12 @@ class States(Base):  # type: ignore
     old_state_id = Column(
         Integer, ForeignKey("states.state_id", ondelete="SET NULL"), index=True
     )
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     event = relationship("Events", uselist=False)
     old_state = relationship("States", remote_side=[state_id])
+    state_attributes = relationship("StateAttributes", lazy="joined")
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -131,26 +184,46 @@ class States(Base):  # type: ignore
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
+        return States(**States.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Create the column values of a states row from a state_changed event."""
         entity_id = event.data["entity_id"]
         state = event.data.get("new_state")
 
-        dbstate = States(entity_id=entity_id)
-
         # State got deleted
         if state is None:
-            dbstate.state = ""
-            dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
-            dbstate.last_changed = event.time_fired
-            dbstate.last_updated = event.time_fired
-        else:
-            dbstate.domain = state.domain
-            dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
-            dbstate.last_changed = state.last_changed
-            dbstate.last_updated = state.last_updated
-
-        return dbstate
+            return {
+                "entity_id": entity_id,
+                "domain": split_entity_id(entity_id)[0],
+                "state": "",
+                "attributes": "{}",
+                "last_changed": event.time_fired,
+                "last_updated": event.time_fired,
+            }
+
+        try:
+            attributes = state.attributes_json()
+        except ValueError:
+            # Strict JSON rejects NaN and infinity, which we still store
+            attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
+
+        return {
+            "entity_id": entity_id,
+            "domain": state.domain,
+            "state": state.state,
+            "attributes": attributes,
+            "last_changed": state.last_changed,
+            "last_updated": state.last_updated,
+        }
+
+    @property
+    def shared_attrs(self):
+        """Return the attributes JSON, from the state_attributes table if shared."""
+        if self.state_attributes is not None:
+            return self.state_attributes.shared_attrs
+        return self.attributes
 
     def to_native(self, validate_entity_id=True):
         """Convert to an HA state object."""
@@ -158,7 +231,7 @@ class States(Base):  # type: ignore
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
+                json.loads(self.shared_attrs),
                 process_timestamp(self.last_changed),
                 process_timestamp(self.last_updated),
                 # Join the events table on event_id to get the context instead
@@ -172,6 +245,99 @@ class States(Base):  # type: ignore
             return None
 
 
+class EventData(Base):  # type: ignore
+    """Data of events, shared by the events that have the same data."""
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_EVENT_DATA
+    data_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_data = Column(Text)
+
+    @staticmethod
+    def hash_shared(shared_data):
+        """Return the hash used to look up event data JSON."""
+        return zlib.crc32(shared_data.encode("utf-8"))
+
+
+class EventTypes(Base):  # type: ignore
+    """Event types, interned so events can reference them by id."""
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_EVENT_TYPES
+    event_type_id = Column(Integer, primary_key=True)
+    event_type = Column(String(64), index=True, unique=True)
+
+
+class StateAttributes(Base):  # type: ignore
+    """Attributes of states, shared by the states that have the same ones."""
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_STATE_ATTRIBUTES
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def hash_shared(shared_attrs):
+        """Return the hash used to look up attributes JSON."""
+        return zlib.crc32(shared_attrs.encode("utf-8"))
+
+
+class StateCheckpoints(Base):  # type: ignore
+    """The last recorded state of each entity at a point in time."""
+
+    __tablename__ = TABLE_STATE_CHECKPOINTS
+    checkpoint_id = Column(Integer, primary_key=True)
+    checkpoint_time = Column(DateTime(timezone=True), index=True)
+    state_id = Column(Integer, ForeignKey("states.state_id"), index=True)
+
+
+class StatisticsBase:
+    """Statistics of a numeric entity over a period of time."""
+
+    id = Column(Integer, primary_key=True)
+    created = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    entity_id = Column(String(255))
+    start = Column(DateTime(timezone=True))
+    mean = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+    last = Column(Float)
+    sum = Column(Float)
+    # Seconds of the period the entity had a numeric value, the mean covers
+    seconds = Column(Float)
+
+    duration: timedelta
+
+
+class Statistics(Base, StatisticsBase):  # type: ignore
+    """Hourly statistics of numeric entities."""
+
+    __tablename__ = TABLE_STATISTICS
+    __table_args__ = (Index("ix_statistics_entity_id_start", "entity_id", "start"),)
+    duration = timedelta(hours=1)
+
+
+class StatisticsShortTerm(Base, StatisticsBase):  # type: ignore
+    """Statistics of numeric entities over 5 minutes."""
+
+    __tablename__ = TABLE_STATISTICS_SHORT_TERM
+    __table_args__ = (
+        Index("ix_statistics_short_term_entity_id_start", "entity_id", "start"),
+    )
+    duration = timedelta(minutes=5)
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -229,6 +395,15 @@ def process_timestamp(ts):
     return dt_util.as_utc(ts)
 
 
+def process_timestamp_to_utc_timestamp(ts):
+    """Process a timestamp into seconds since the epoch."""
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=dt_util.UTC).timestamp()
+    return ts.timestamp()
+
+
 def process_timestamp_to_utc_isoformat(ts):
     """Process a timestamp into UTC isotime."""
     if ts is None:
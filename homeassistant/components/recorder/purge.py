@@ -1,67 +1,109 @@
 """Purge old data helper."""
-from datetime import timedelta
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import logging
 import time
+from typing import List, Set
 
+from sqlalchemy import func
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 import homeassistant.util.dt as dt_util
 
-from .models import Events, RecorderRuns, States
-from .util import execute, session_scope
+from .models import (
+    EventData,
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    StateCheckpoints,
+    States,
+    StatisticsShortTerm,
+)
+from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Older SQLite versions do not allow more bound parameters in one statement
+SQLITE_MAX_BIND_VARS = 998
+
+
+@dataclass
+class PurgeMetrics:
+    """Class for keeping track of the progress of a purge.
+
+    purge_before: Rows older than this are purged
+    started: Monotonic time the purge started at
+    deleted_rows: Number of states, events and short term statistics deleted
+    remaining_rows: Estimated number of states and events left to delete
+    rows_per_second: Average number of rows deleted per second
+    finished: Whether the purge is done
+    """
+
+    purge_before: datetime
+    started: float
+    deleted_rows: int = 0
+    remaining_rows: int = 0
+    rows_per_second: float = 0.0
+    finished: bool = False
+
+    @property
+    def progress(self) -> float:
+        """Return the fraction of the rows to purge that were deleted."""
+        total = self.deleted_rows + self.remaining_rows
+        return self.deleted_rows / total if total else 1.0
+
+    def add_deleted_rows(self, count: int) -> None:
+        """Account for a batch of deleted rows."""
+        self.deleted_rows += count
+        self.remaining_rows = max(self.remaining_rows - count, 0)
+        elapsed = time.monotonic() - self.started
+        if elapsed > 0:
+            self.rows_per_second = self.deleted_rows / elapsed
+
 
 def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
-    """Purge events and states older than purge_days ago.
+    """Purge events, states and short term statistics older than purge_days ago.
 
-    Cleans up an timeframe of an hour, based on the oldest record.
+    Deletes one batch of at most purge_batch_size rows, selected by primary
+    key, and returns False as long as there may be more rows to delete so
+    the recorder can process its queue before the next batch. The event data
+    and attributes of the batch are deleted with it once no longer used.
     """
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug("Purging states and events before target %s", purge_before)
+    batch_size = instance.purge_batch_size
 
     try:
         with session_scope(session=instance.get_session()) as session:
-            # Purge a max of 1 hour, based on the oldest states or events record
-            batch_purge_before = purge_before
-
-            query = session.query(States).order_by(States.last_updated.asc()).limit(1)
-            states = execute(query, to_native=True, validate_entity_ids=False)
-            if states:
-                batch_purge_before = min(
-                    batch_purge_before,
-                    states[0].last_updated + timedelta(hours=1),
-                )
-
-            query = session.query(Events).order_by(Events.time_fired.asc()).limit(1)
-            events = execute(query, to_native=True)
-            if events:
-                batch_purge_before = min(
-                    batch_purge_before,
-                    events[0].time_fired + timedelta(hours=1),
+            metrics = instance.purge_metrics
+            if metrics is None or metrics.finished:
+                _LOGGER.debug("Purging states and events before %s", purge_before)
+                metrics = instance.purge_metrics = PurgeMetrics(
+                    purge_before=purge_before,
+                    started=time.monotonic(),
+                    remaining_rows=_estimate_rows_to_purge(session, purge_before),
                 )
 
-            _LOGGER.debug("Purging states and events before %s", batch_purge_before)
+            state_ids = _select_state_ids_to_purge(session, purge_before, batch_size)
+            if state_ids:
+                _purge_state_ids(session, state_ids)
+                metrics.add_deleted_rows(len(state_ids))
+                _log_progress(metrics)
+                return False
 
-            deleted_rows = (
-                session.query(States)
-                .filter(States.last_updated < batch_purge_before)
-                .delete(synchronize_session=False)
-            )
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            event_ids = _select_event_ids_to_purge(session, purge_before, batch_size)
+            if event_ids:
+                _purge_event_ids(session, event_ids)
+                metrics.add_deleted_rows(len(event_ids))
+                _log_progress(metrics)
+                return False
 
-            deleted_rows = (
-                session.query(Events)
-                .filter(Events.time_fired < batch_purge_before)
-                .delete(synchronize_session=False)
+            statistics_ids = _select_short_term_statistics_ids_to_purge(
+                session, purge_before, batch_size
             )
-            _LOGGER.debug("Deleted %s events", deleted_rows)
-
-            # If states or events purging isn't processing the purge_before yet,
-            # return false, as we are not done yet.
-            if batch_purge_before != purge_before:
-                _LOGGER.debug("Purging hasn't fully completed yet")
+            if statistics_ids:
+                _purge_short_term_statistics_ids(session, statistics_ids)
+                metrics.add_deleted_rows(len(statistics_ids))
+                _log_progress(metrics)
                 return False
 
             # Recorder runs is small, no need to batch run it
@@ -73,6 +115,9 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
             )
             _LOGGER.debug("Deleted %s recorder_runs", deleted_rows)
 
+            metrics.remaining_rows = 0
+            metrics.finished = True
+
         if repack:
             # Execute sqlite or postgresql vacuum command to free up space on disk
             if instance.engine.driver in ("pysqlite", "postgresql"):
@@ -81,7 +126,10 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
             # Optimize mysql / mariadb tables to free up space on disk
             elif instance.engine.driver in ("mysqldb", "pymysql"):
                 _LOGGER.debug("Optimizing SQL DB to free space")
-                instance.engine.execute("OPTIMIZE TABLE states, events, recorder_runs")
+                instance.engine.execute(
+                    "OPTIMIZE TABLE states, state_attributes, state_checkpoints, "
+                    "events, event_data, statistics_short_term, recorder_runs"
+                )
 
     except OperationalError as err:
         # Retry when one of the following MySQL errors occurred:
@@ -98,6 +146,206 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
             return False
 
         _LOGGER.warning("Error purging history: %s", err)
+        _purge_failed(instance)
     except SQLAlchemyError as err:
         _LOGGER.warning("Error purging history: %s", err)
+        _purge_failed(instance)
     return True
+
+
+def _purge_failed(instance) -> None:
+    """Stop reporting a purge that will not continue."""
+    if instance.purge_metrics is not None:
+        instance.purge_metrics.finished = True
+
+
+def _estimate_rows_to_purge(session, purge_before: datetime) -> int:
+    """Return the estimated number of states and events older than purge_before.
+
+    Counting the rows scans them all on large databases, instead the rows are
+    assumed to be numbered in the order they were recorded.
+    """
+    return _estimate_ids_before(
+        session, States.state_id, States.last_updated, purge_before
+    ) + _estimate_ids_before(session, Events.event_id, Events.time_fired, purge_before)
+
+
+def _estimate_ids_before(
+    session, id_column, time_column, purge_before: datetime
+) -> int:
+    """Return the number of ids between the first and the first to keep."""
+    first_id = session.query(func.min(id_column)).scalar()
+    if first_id is None:
+        return 0
+    keep_id = (
+        session.query(id_column)
+        .filter(time_column >= purge_before)
+        .order_by(time_column)
+        .limit(1)
+        .scalar()
+    )
+    if keep_id is None:
+        return session.query(func.max(id_column)).scalar() - first_id + 1
+    return max(keep_id - first_id, 0)
+
+
+def _select_state_ids_to_purge(
+    session, purge_before: datetime, batch_size: int
+) -> List[int]:
+    """Return a batch of state_ids older than purge_before."""
+    return [
+        state_id
+        for (state_id,) in session.query(States.state_id)
+        .filter(States.last_updated < purge_before)
+        .limit(batch_size)
+    ]
+
+
+def _select_event_ids_to_purge(
+    session, purge_before: datetime, batch_size: int
+) -> List[int]:
+    """Return a batch of event_ids older than purge_before."""
+    return [
+        event_id
+        for (event_id,) in session.query(Events.event_id)
+        .filter(Events.time_fired < purge_before)
+        .limit(batch_size)
+    ]
+
+
+def _select_short_term_statistics_ids_to_purge(
+    session, purge_before: datetime, batch_size: int
+) -> List[int]:
+    """Return a batch of short term statistics ids older than purge_before.
+
+    The hourly statistics are kept.
+    """
+    return [
+        statistics_id
+        for (statistics_id,) in session.query(StatisticsShortTerm.id)
+        .filter(StatisticsShortTerm.start < purge_before)
+        .limit(batch_size)
+    ]
+
+
+def _purge_state_ids(session, state_ids: List[int]) -> None:
+    """Delete states, after removing the references to them."""
+    attributes_ids: Set[int] = set()
+    for chunk in _chunked(state_ids):
+        attributes_ids.update(
+            attributes_id
+            for (attributes_id,) in session.query(States.attributes_id)
+            .filter(States.state_id.in_(chunk))
+            .filter(States.attributes_id.isnot(None))
+            .distinct()
+        )
+        session.query(StateCheckpoints).filter(
+            StateCheckpoints.state_id.in_(chunk)
+        ).delete(synchronize_session=False)
+        # Not all engines enforce the ON DELETE SET NULL of the foreign key
+        session.query(States).filter(States.old_state_id.in_(chunk)).update(
+            {States.old_state_id: None}, synchronize_session=False
+        )
+    deleted_rows = 0
+    for chunk in _chunked(state_ids):
+        deleted_rows += (
+            session.query(States)
+            .filter(States.state_id.in_(chunk))
+            .delete(synchronize_session=False)
+        )
+    _LOGGER.debug("Deleted %s states", deleted_rows)
+
+    deleted_rows = _purge_unused_ids(
+        session,
+        StateAttributes,
+        StateAttributes.attributes_id,
+        States.attributes_id,
+        attributes_ids,
+    )
+    _LOGGER.debug("Deleted %s state attributes", deleted_rows)
+
+
+def _purge_event_ids(session, event_ids: List[int]) -> None:
+    """Delete events, after removing the references to them."""
+    data_ids: Set[int] = set()
+    for chunk in _chunked(event_ids):
+        data_ids.update(
+            data_id
+            for (data_id,) in session.query(Events.data_id)
+            .filter(Events.event_id.in_(chunk))
+            .filter(Events.data_id.isnot(None))
+            .distinct()
+        )
+        # Not all engines enforce the ON DELETE SET NULL of the foreign key
+        session.query(Events).filter(Events.origin_event_id.in_(chunk)).update(
+            {Events.origin_event_id: None}, synchronize_session=False
+        )
+    deleted_rows = 0
+    for chunk in _chunked(event_ids):
+        deleted_rows += (
+            session.query(Events)
+            .filter(Events.event_id.in_(chunk))
+            .delete(synchronize_session=False)
+        )
+    _LOGGER.debug("Deleted %s events", deleted_rows)
+
+    deleted_rows = _purge_unused_ids(
+        session, EventData, EventData.data_id, Events.data_id, data_ids
+    )
+    _LOGGER.debug("Deleted %s event data", deleted_rows)
+
+
+def _purge_short_term_statistics_ids(session, statistics_ids: List[int]) -> None:
+    """Delete short term statistics."""
+    deleted_rows = 0
+    for chunk in _chunked(statistics_ids):
+        deleted_rows += (
+            session.query(StatisticsShortTerm)
+            .filter(StatisticsShortTerm.id.in_(chunk))
+            .delete(synchronize_session=False)
+        )
+    _LOGGER.debug("Deleted %s short term statistics", deleted_rows)
+
+
+def _purge_unused_ids(
+    session, model, id_column, reference_column, ids: Set[int]
+) -> int:
+    """Delete the rows with one of ids that are no longer referenced.
+
+    Only the ids used by the purged rows are checked, in chunks, instead of
+    scanning the whole table for rows that are not referenced.
+    """
+    deleted_rows = 0
+    for chunk in _chunked(list(ids)):
+        used_ids = {
+            used_id
+            for (used_id,) in session.query(reference_column)
+            .filter(reference_column.in_(chunk))
+            .distinct()
+        }
+        unused_ids = [unused_id for unused_id in chunk if unused_id not in used_ids]
+        if unused_ids:
+            deleted_rows += (
+                session.query(model)
+                .filter(id_column.in_(unused_ids))
+                .delete(synchronize_session=False)
+            )
+    return deleted_rows
+
+
+def _chunked(ids: List[int]) -> List[List[int]]:
+    """Split ids in chunks that can be bound to one statement."""
+    return [
+        ids[idx : idx + SQLITE_MAX_BIND_VARS]
+        for idx in range(0, len(ids), SQLITE_MAX_BIND_VARS)
+    ]
+
+
+def _log_progress(metrics: PurgeMetrics) -> None:
+    """Log the progress of the purge."""
+    _LOGGER.debug(
+        "Purged %s rows (%.0f rows/sec), %s rows remaining",
+        metrics.deleted_rows,
+        metrics.rows_per_second,
+        metrics.remaining_rows,
+    )
@@ -0,0 +1,243 @@
+"""Statistics of numeric entities, compiled by the recorder."""
+from datetime import datetime, timedelta
+import logging
+import math
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import State
+
+from .models import Statistics, StatisticsShortTerm, process_timestamp_to_utc_isoformat
+from .util import session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+SHORT_TERM_PERIOD = timedelta(minutes=5)
+
+STATISTIC_PERIODS = {
+    "5minute": StatisticsShortTerm,
+    "hour": Statistics,
+}
+
+
+def period_start(now: datetime) -> datetime:
+    """Return the start of the short term period now is in."""
+    return now.replace(minute=now.minute - now.minute % 5, second=0, microsecond=0)
+
+
+def state_value(state: Optional[State]) -> Optional[float]:
+    """Return the value of a state of a numeric entity or None."""
+    if state is None or ATTR_UNIT_OF_MEASUREMENT not in state.attributes:
+        return None
+    try:
+        value = float(state.state)
+    except ValueError:
+        return None
+    if not math.isfinite(value):
+        return None
+    return value
+
+
+class _EntityStatistics:
+    """Time weighted statistics of an entity in the current period."""
+
+    __slots__ = ["value", "since", "area", "duration", "min", "max", "sum"]
+
+    def __init__(self, value: Optional[float], since: datetime) -> None:
+        """Start tracking an entity from its value at since."""
+        self.value = value
+        self.since = since
+        self.area = 0.0
+        self.duration = 0.0
+        self.min = value
+        self.max = value
+        self.sum = 0.0
+
+    def advance(self, until: datetime) -> None:
+        """Account for the current value being held until the given time."""
+        if until <= self.since:
+            return
+        if self.value is not None:
+            seconds = (until - self.since).total_seconds()
+            self.area += self.value * seconds
+            self.duration += seconds
+        self.since = until
+
+    def set_value(self, value: Optional[float], when: datetime) -> None:
+        """Change the value of the entity."""
+        self.advance(when)
+        if value is not None:
+            if self.value is not None and value > self.value:
+                self.sum += value - self.value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+        self.value = value
+
+    def reset(self) -> None:
+        """Start a new period with the current value."""
+        self.area = 0.0
+        self.duration = 0.0
+        self.min = self.value
+        self.max = self.value
+        self.sum = 0.0
+
+
+class StatisticsCollector:
+    """Collect the statistics of numeric entities from the recorded states.
+
+    Only accessed from the recorder thread.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the collector."""
+        self._entities: Dict[str, _EntityStatistics] = {}
+
+    def add_state(
+        self, entity_id: str, state: Optional[State], time_fired: datetime
+    ) -> None:
+        """Account for a recorded state change, None if the entity was removed."""
+        value = state_value(state)
+        entity = self._entities.get(entity_id)
+        if entity is None:
+            if value is not None:
+                self._entities[entity_id] = _EntityStatistics(value, time_fired)
+            return
+
+        entity.set_value(value, time_fired)
+
+    def compile(self, start: datetime) -> List[dict]:
+        """Return the statistics rows of the period starting at start."""
+        end = start + SHORT_TERM_PERIOD
+        rows = []
+        for entity_id, entity in list(self._entities.items()):
+            entity.advance(end)
+            if entity.duration:
+                rows.append(
+                    {
+                        "entity_id": entity_id,
+                        "start": start,
+                        "mean": entity.area / entity.duration,
+                        "min": entity.min,
+                        "max": entity.max,
+                        "last": entity.value,
+                        "sum": entity.sum,
+                        "seconds": entity.duration,
+                    }
+                )
+            if entity.value is None:
+                # Tracked again once it has a numeric value
+                del self._entities[entity_id]
+            else:
+                entity.reset()
+        return rows
+
+
+def compile_statistics(instance, start: datetime) -> None:
+    """Store the statistics of the short term period starting at start.
+
+    At the end of an hour the hourly statistics are compiled from the short
+    term statistics of that hour.
+    """
+    rows = instance.statistics_collector.compile(start)
+    end = start + SHORT_TERM_PERIOD
+
+    try:
+        with session_scope(session=instance.get_session()) as session:
+            if rows:
+                session.execute(StatisticsShortTerm.__table__.insert(), rows)
+            _LOGGER.debug("Compiled statistics of %s entities for %s", len(rows), start)
+            if end.minute == 0:
+                _compile_hourly_statistics(session, end - Statistics.duration)
+    except SQLAlchemyError as err:
+        _LOGGER.warning("Error compiling statistics: %s", err)
+
+
+def _compile_hourly_statistics(session, hour_start: datetime) -> None:
+    """Store the hourly statistics compiled from the short term statistics.
+
+    The mean is weighted by the seconds each short term mean covers, periods
+    without a value, like while the recorder was stopped, do not count.
+    """
+    end = hour_start + Statistics.duration
+
+    hourly: Dict[str, dict] = {}
+    for row in (
+        session.query(StatisticsShortTerm)
+        .filter(StatisticsShortTerm.start >= hour_start)
+        .filter(StatisticsShortTerm.start < end)
+        .order_by(StatisticsShortTerm.start)
+    ):
+        # Rows compiled before the seconds were stored covered their period
+        seconds = (
+            StatisticsShortTerm.duration.total_seconds()
+            if row.seconds is None
+            else row.seconds
+        )
+        hour = hourly.get(row.entity_id)
+        if hour is None:
+            hourly[row.entity_id] = {
+                "entity_id": row.entity_id,
+                "start": hour_start,
+                "mean": row.mean * seconds,
+                "min": row.min,
+                "max": row.max,
+                "last": row.last,
+                "sum": row.sum,
+                "seconds": seconds,
+            }
+            continue
+        hour["mean"] += row.mean * seconds
+        hour["min"] = min(hour["min"], row.min)
+        hour["max"] = max(hour["max"], row.max)
+        hour["last"] = row.last
+        hour["sum"] += row.sum
+        hour["seconds"] += seconds
+
+    for hour in hourly.values():
+        hour["mean"] /= hour["seconds"]
+    if hourly:
+        session.execute(Statistics.__table__.insert(), list(hourly.values()))
+
+
+def statistics_during_period(
+    hass,
+    start_time: datetime,
+    end_time: Optional[datetime] = None,
+    entity_ids: Optional[Iterable[str]] = None,
+    period: str = "hour",
+) -> Dict[str, List[dict]]:
+    """Return the statistics of the periods starting between the given times."""
+    table = STATISTIC_PERIODS[period]
+
+    with session_scope(hass=hass) as session:
+        query = session.query(
+            table.entity_id,
+            table.start,
+            table.mean,
+            table.min,
+            table.max,
+            table.last,
+            table.sum,
+        ).filter(table.start >= start_time)
+        if end_time is not None:
+            query = query.filter(table.start < end_time)
+        if entity_ids is not None:
+            query = query.filter(table.entity_id.in_(entity_ids))
+        query = query.order_by(table.entity_id, table.start)
+
+        result: Dict[str, List[dict]] = {}
+        for row in query:
+            result.setdefault(row.entity_id, []).append(
+                {
+                    "entity_id": row.entity_id,
+                    "start": process_timestamp_to_utc_isoformat(row.start),
+                    "mean": row.mean,
+                    "min": row.min,
+                    "max": row.max,
+                    "last": row.last,
+                    "sum": row.sum,
+                }
+            )
+        return result
@@ -0,0 +1,29 @@
+"""Provide info to system health."""
+from homeassistant.components import system_health
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_INSTANCE
+
+
+@callback
+def async_register(
+    hass: HomeAssistant, register: system_health.SystemHealthRegistration
+) -> None:
+    """Register system health callbacks."""
+    register.async_register_info(system_health_info)
+
+
+async def system_health_info(hass):
+    """Get info for the info page."""
+    metrics = hass.data[DATA_INSTANCE].purge_metrics
+    if metrics is None:
+        return {}
+
+    return {
+        "purge_running": not metrics.finished,
+        "purge_before": metrics.purge_before.isoformat(),
+        "purge_progress": f"{metrics.progress:.0%}",
+        "purge_deleted_rows": metrics.deleted_rows,
+        "purge_remaining_rows": metrics.remaining_rows,
+        "purge_rows_per_second": round(metrics.rows_per_second),
+    }
@@ -43,10 +43,11 @@ def auth_invalid_message(message):
 class AuthPhase:
     """Connection that requires client to authenticate first."""
 
-    def __init__(self, logger, hass, send_message, request):
+    def __init__(self, logger, hass, send_message, request, drain=None):
         """Initialize the authentiated connection."""
         self._hass = hass
         self._send_message = send_message
+        self._drain = drain
         self._logger = logger
         self._request = request
         self._authenticated = False
@@ -84,5 +85,10 @@ class AuthPhase:
         await process_success_login(self._request)
         self._send_message(auth_ok_message())
         return ActiveConnection(
-            self._logger, self._hass, self._send_message, user, refresh_token
+            self._logger,
+            self._hass,
+            self._send_message,
+            user,
+            refresh_token,
+            drain=self._drain,
         )
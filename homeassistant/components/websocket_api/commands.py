@@ -15,8 +15,13 @@ from homeassistant.exceptions import (
 )
 from homeassistant.helpers import config_validation as cv, entity
 from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.json import json_dumps_with_fallback
 from homeassistant.helpers.service import async_get_all_descriptions
-from homeassistant.helpers.template import Template
+from homeassistant.helpers.template import (
+    Template,
+    async_render_cache_info,
+    async_render_statistics,
+)
 from homeassistant.loader import IntegrationNotFound, async_get_integration
 
 from . import const, decorators, messages
@@ -28,6 +33,7 @@ from . import const, decorators, messages
 def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_subscribe_events)
+    async_reg(hass, handle_subscribe_entities)
     async_reg(hass, handle_unsubscribe_events)
     async_reg(hass, handle_call_service)
     async_reg(hass, handle_get_states)
@@ -35,11 +41,14 @@ def async_register_commands(hass, async_reg):
     async_reg(hass, handle_get_config)
     async_reg(hass, handle_ping)
     async_reg(hass, handle_render_template)
+    async_reg(hass, handle_render_template_cache)
+    async_reg(hass, handle_render_template_statistics)
     async_reg(hass, handle_manifest_list)
     async_reg(hass, handle_manifest_get)
     async_reg(hass, handle_entity_source)
     async_reg(hass, handle_subscribe_trigger)
     async_reg(hass, handle_test_condition)
+    async_reg(hass, handle_supported_features)
 
 
 def pong_message(iden):
@@ -68,32 +77,103 @@ def handle_subscribe_events(hass, connection, msg):
     if event_type == EVENT_STATE_CHANGED:
 
         @callback
-        def forward_events(event):
-            """Forward state changed events to websocket."""
-            if not connection.user.permissions.check_entity(
+        def event_filter(event):
+            """Filter out state changes the user is not allowed to read."""
+            return connection.user.permissions.check_entity(
                 event.data["entity_id"], POLICY_READ
-            ):
-                return
-
-            connection.send_message(messages.cached_event_message(msg["id"], event))
+            )
 
     else:
 
         @callback
-        def forward_events(event):
-            """Forward events to websocket."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
+        def event_filter(event):
+            """Filter out time changed events."""
+            return event.event_type != EVENT_TIME_CHANGED
 
-            connection.send_message(messages.cached_event_message(msg["id"], event))
+    @callback
+    def forward_events(event):
+        """Forward events to websocket."""
+        if event.event_type == EVENT_STATE_CHANGED:
+            # A newer state of the entity supersedes a queued one
+            connection.send_message(
+                messages.cached_event_message(msg["id"], event),
+                (msg["id"], event.data.get("entity_id")),
+            )
+            return
+        connection.send_message(messages.cached_event_message(msg["id"], event))
 
     connection.subscriptions[msg["id"]] = hass.bus.async_listen(
-        event_type, forward_events
+        event_type, forward_events, event_filter=event_filter
     )
 
     connection.send_message(messages.result_message(msg["id"]))
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends the compressed states of the entities and then only their changes.
+    """
+    entity_ids = msg.get("entity_ids")
+    if entity_ids is not None:
+        entity_ids = set(entity_ids)
+    entity_perm = connection.user.permissions.check_entity
+
+    @callback
+    def entity_filter(event):
+        """Filter out the entities not subscribed to or not allowed to read."""
+        entity_id = event.data["entity_id"]
+        return (entity_ids is None or entity_id in entity_ids) and entity_perm(
+            entity_id, POLICY_READ
+        )
+
+    @callback
+    def forward_entity_changes(event):
+        """Forward the changes of the entities to websocket."""
+        connection.send_message(messages.cached_state_diff_message(msg["id"], event))
+
+    # No events are fired until the initial states are sent
+    connection.subscriptions[msg["id"]] = hass.bus.async_listen(
+        EVENT_STATE_CHANGED, forward_entity_changes, event_filter=entity_filter
+    )
+    connection.send_message(messages.result_message(msg["id"]))
+
+    if entity_ids is None:
+        states = hass.states.async_all()
+    else:
+        states = [
+            state
+            for state in (hass.states.get(entity_id) for entity_id in entity_ids)
+            if state is not None
+        ]
+    if not connection.user.permissions.access_all_entities("read"):
+        states = [state for state in states if entity_perm(state.entity_id, "read")]
+
+    connection.send_message(
+        json_dumps_with_fallback(
+            lambda: messages.entities_initial_message_json(msg["id"], states),
+            lambda: messages.message_to_json(
+                messages.event_message(
+                    msg["id"],
+                    {
+                        messages.ENTITY_EVENT_ADD: {
+                            state.entity_id: state.as_compressed_state()
+                            for state in states
+                        }
+                    },
+                )
+            ),
+        )
+    )
+
+
 @callback
 @decorators.websocket_command(
     {
@@ -186,7 +266,14 @@ def handle_get_states(hass, connection, msg):
             if entity_perm(state.entity_id, "read")
         ]
 
-    connection.send_message(messages.result_message(msg["id"], states))
+    connection.send_message(
+        json_dumps_with_fallback(
+            lambda: messages.states_result_message_json(msg["id"], states),
+            lambda: messages.message_to_json(
+                messages.result_message(msg["id"], states)
+            ),
+        )
+    )
 
 
 @decorators.websocket_command({vol.Required("type"): "get_services"})
@@ -234,6 +321,19 @@ async def handle_manifest_get(hass, connection, msg):
         connection.send_error(msg["id"], const.ERR_NOT_FOUND, "Integration not found")
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "supported_features",
+        vol.Required("features"): {str: int},
+    }
+)
+def handle_supported_features(hass, connection, msg):
+    """Handle the features the client declares it supports."""
+    connection.supported_features = msg["features"]
+    connection.send_result(msg["id"])
+
+
 @callback
 @decorators.websocket_command({vol.Required("type"): "ping"})
 def handle_ping(hass, connection, msg):
@@ -307,6 +407,22 @@ async def handle_render_template(hass, connection, msg):
     hass.loop.call_soon_threadsafe(info.async_refresh)
 
 
+@callback
+@decorators.websocket_command({vol.Required("type"): "render_template/cache"})
+@decorators.require_admin
+def handle_render_template_cache(hass, connection, msg):
+    """Handle render_template/cache command."""
+    connection.send_result(msg["id"], async_render_cache_info(hass))
+
+
+@callback
+@decorators.websocket_command({vol.Required("type"): "render_template/statistics"})
+@decorators.require_admin
+def handle_render_template_statistics(hass, connection, msg):
+    """Handle render_template/statistics command."""
+    connection.send_result(msg["id"], async_render_statistics(hass))
+
+
 @callback
 @decorators.websocket_command(
     {vol.Required("type"): "entity/source", vol.Optional("entity_id"): [cv.entity_id]}
@@ -1,6 +1,6 @@
 """Connection session."""
 import asyncio
-from typing import Any, Callable, Dict, Hashable, Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
 
 import voluptuous as vol
 
@@ -15,11 +15,20 @@ from . import const, messages
 class ActiveConnection:
     """Handle an active websocket client connection."""
 
-    def __init__(self, logger, hass, send_message, user, refresh_token):
+    def __init__(
+        self,
+        logger,
+        hass,
+        send_message,
+        user,
+        refresh_token,
+        drain: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
         """Initialize an active connection."""
         self.logger = logger
         self.hass = hass
         self.send_message = send_message
+        self._drain = drain
         self.user = user
         if refresh_token:
             self.refresh_token_id = refresh_token.id
@@ -27,6 +36,7 @@ class ActiveConnection:
             self.refresh_token_id = None
 
         self.subscriptions: Dict[Hashable, Callable[[], Any]] = {}
+        self.supported_features: Dict[str, float] = {}
         self.last_id = 0
 
     def context(self, msg):
@@ -48,6 +58,14 @@ class ActiveConnection:
         )
         self.send_message(content)
 
+    async def async_drain(self, max_pending: int = 0) -> None:
+        """Wait until at most max_pending messages are waiting to be written.
+
+        Lets a producer of many messages keep pace with the client.
+        """
+        if self._drain is not None:
+            await self._drain(max_pending)
+
     @callback
     def send_error(self, msg_id: int, code: str, message: str) -> None:
         """Send a error message."""
@@ -19,6 +19,16 @@ URL = "/api/websocket"
 PENDING_MSG_PEAK = 512
 PENDING_MSG_PEAK_TIME = 5
 MAX_PENDING_MSG = 2048
+# Factor of MAX_PENDING_MSG a client reading batches can have pending
+MAX_PENDING_MSG_BATCHED = 4
+
+CONF_COMPRESSION_LEVEL = "compression_level"
+CONF_COMPRESSION_THRESHOLD = "compression_threshold"
+
+# Compress with permessage-deflate as fast as aiohttp does by default
+DEFAULT_COMPRESSION_LEVEL = 1
+# Smaller messages are sent uncompressed, they are hardly reduced
+DEFAULT_COMPRESSION_THRESHOLD = 256
 
 ERR_ID_REUSE = "id_reuse"
 ERR_INVALID_FORMAT = "invalid_format"
@@ -45,4 +55,11 @@ SIGNAL_WEBSOCKET_DISCONNECTED = "websocket_disconnected"
 # Data used to store the current connection list
 DATA_CONNECTIONS = f"{DOMAIN}.connections"
 
+# Data used to store the metrics of the messages written to the clients
+DATA_WRITER_METRICS = f"{DOMAIN}.writer_metrics"
+
+# Features a client declares it supports with the supported_features command
+# Messages are sent batched in JSON arrays and superseded states coalesced
+FEATURE_COALESCE_MESSAGES = "coalesce_messages"
+
 JSON_DUMP = partial(json.dumps, cls=JSONEncoder, allow_nan=False)
@@ -2,9 +2,11 @@
 import asyncio
 from contextlib import suppress
 import logging
-from typing import Optional
+from typing import Hashable, List, Optional, Set, Tuple
+import zlib
 
 from aiohttp import WSMsgType, web
+from aiohttp.http_websocket import WebSocketWriter
 import async_timeout
 
 from homeassistant.components.http import HomeAssistantView
@@ -16,7 +18,12 @@ from .auth import AuthPhase, auth_required_message
 from .const import (
     CANCELLATION_ERRORS,
     DATA_CONNECTIONS,
+    DATA_WRITER_METRICS,
+    DEFAULT_COMPRESSION_LEVEL,
+    DEFAULT_COMPRESSION_THRESHOLD,
+    FEATURE_COALESCE_MESSAGES,
     MAX_PENDING_MSG,
+    MAX_PENDING_MSG_BATCHED,
     PENDING_MSG_PEAK,
     PENDING_MSG_PEAK_TIME,
     SIGNAL_WEBSOCKET_CONNECTED,
@@ -29,6 +36,17 @@ from .messages import message_to_json
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
 _WS_LOGGER = logging.getLogger(f"{__name__}.connection")
 
+# Tuning the compression and counting the sent bytes replaces writer internals
+# of the pinned aiohttp version, other versions use the public compress option
+WRITER_INTERNALS = all(
+    callable(getattr(cls, name, None))
+    for cls, name in (
+        (WebSocketWriter, "_send_frame"),
+        (WebSocketWriter, "_write"),
+        (web.WebSocketResponse, "_pre_start"),
+    )
+)
+
 
 class WebsocketAPIView(HomeAssistantView):
     """View to serve a websockets endpoint."""
@@ -37,9 +55,127 @@ class WebsocketAPIView(HomeAssistantView):
     url = URL
     requires_auth = False
 
+    def __init__(
+        self,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+    ) -> None:
+        """Initialize the websocket view."""
+        self.compression_level = compression_level
+        self.compression_threshold = compression_threshold
+
     async def get(self, request: web.Request) -> web.WebSocketResponse:
         """Handle an incoming websocket connection."""
-        return await WebSocketHandler(request.app["hass"], request).async_handle()
+        return await WebSocketHandler(
+            request.app["hass"],
+            request,
+            self.compression_level,
+            self.compression_threshold,
+        ).async_handle()
+
+
+class WriterMetrics:
+    """Metrics of the messages written to the websocket clients."""
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self.handlers: Set["WebSocketHandler"] = set()
+        self.batched_frames = 0
+        self.coalesced_messages = 0
+        self.slow_client_disconnects = 0
+
+        self.sent_bytes = 0
+
+    @property
+    def pending_messages(self) -> int:
+        """Return the number of messages waiting to be written."""
+        return sum(handler.pending_messages for handler in self.handlers)
+
+
+class _WebSocketWriter(WebSocketWriter):
+    """Write frames deflating the messages from a threshold size on.
+
+    Each connection keeps its own deflate context, the repetitive entity
+    ids and attribute keys of earlier messages make later ones smaller.
+    """
+
+    def __init__(self, *args, level, threshold, metrics, **kwargs):
+        """Initialize the writer."""
+        super().__init__(*args, **kwargs)
+        self._threshold = threshold
+        self._metrics = metrics
+        # Frames are sent one at a time, small messages turn off
+        # compression while their frame is written and drained
+        self._send_lock = asyncio.Lock()
+        if self.compress and hasattr(self, "_compressobj"):
+            self._compressobj = zlib.compressobj(level=level, wbits=-self.compress)
+
+    async def _send_frame(self, message, opcode, compress=None):
+        """Send a frame, uncompressed if the message is small."""
+        async with self._send_lock:
+            if not self.compress or len(message) >= self._threshold:
+                await super()._send_frame(message, opcode, compress)
+                return
+
+            # Messages can be sent uncompressed with permessage-deflate negotiated
+            wbits, self.compress = self.compress, 0
+            try:
+                await super()._send_frame(message, opcode, compress)
+            finally:
+                self.compress = wbits
+
+    def _write(self, data):
+        """Write data to the transport."""
+        super()._write(data)
+        self._metrics.sent_bytes += len(data)
+
+
+class _WebSocketResponse(web.WebSocketResponse):
+    """A websocket response negotiating permessage-deflate as configured."""
+
+    def __init__(self, level, threshold, metrics, **kwargs):
+        """Initialize the websocket response."""
+        super().__init__(compress=level > 0, **kwargs)
+        self._compression_level = level
+        self._compression_threshold = threshold
+        self._metrics = metrics
+
+    def _pre_start(self, request):
+        """Replace the writer of the negotiated connection."""
+        protocol, writer = super()._pre_start(request)
+        return (
+            protocol,
+            _WebSocketWriter(
+                writer.protocol,
+                writer.transport,
+                compress=writer.compress,
+                notakeover=writer.notakeover,
+                level=self._compression_level,
+                threshold=self._compression_threshold,
+                metrics=self._metrics,
+            ),
+        )
+
+
+class _CoalescedMessage:
+    """A queued message that is replaced by newer ones with the same key."""
+
+    __slots__ = ("key", "message")
+
+    def __init__(self, key, message):
+        """Initialize the queued message."""
+        self.key = key
+        self.message = message
+
+
+class _BatchedMessages:
+    """Queued messages that were serialized together to free the queue."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self, messages):
+        """Initialize the batch of serialized messages."""
+        self.messages = messages
 
 
 class WebSocketAdapter(logging.LoggerAdapter):
@@ -53,16 +189,44 @@ class WebSocketAdapter(logging.LoggerAdapter):
 class WebSocketHandler:
     """Handle an active websocket client connection."""
 
-    def __init__(self, hass, request):
+    def __init__(
+        self,
+        hass,
+        request,
+        compression_level=DEFAULT_COMPRESSION_LEVEL,
+        compression_threshold=DEFAULT_COMPRESSION_THRESHOLD,
+    ):
         """Initialize an active connection."""
         self.hass = hass
         self.request = request
+        self._compression_level = compression_level
+        self._compression_threshold = compression_threshold
         self.wsock: Optional[web.WebSocketResponse] = None
         self._to_write: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_MSG)
         self._handle_task = None
         self._writer_task = None
         self._logger = WebSocketAdapter(_WS_LOGGER, {"connid": id(self)})
         self._peak_checker_unsub = None
+        self._connection = None
+        # The queued messages that newer messages with the same key replace
+        self._coalesced = {}
+        # Messages in the queue besides the first of each batch
+        self._batched_pending = 0
+        # Futures waiting for the queue to drain to their number of messages
+        self._drain_waiters: List[Tuple[int, asyncio.Future]] = []
+        self._metrics: WriterMetrics = hass.data[DATA_WRITER_METRICS]
+
+    @property
+    def pending_messages(self) -> int:
+        """Return the number of messages waiting to be written."""
+        return self._to_write.qsize() + self._batched_pending
+
+    @property
+    def _coalesce_messages(self) -> bool:
+        """Return if the client accepts batched and coalesced messages."""
+        return self._connection is not None and bool(
+            self._connection.supported_features.get(FEATURE_COALESCE_MESSAGES)
+        )
 
     async def _writer(self):
         """Write outgoing messages."""
@@ -73,36 +237,147 @@ class WebSocketHandler:
                 if message is None:
                     break
 
-                self._logger.debug("Sending %s", message)
+                if not self._coalesce_messages:
+                    await self._send_str(self._message_json(message))
+                    self._release_drain_waiters()
+                    continue
+
+                # Send everything queued meanwhile in a single frame
+                messages = self._messages_json(message)
+                while not self._to_write.empty():
+                    message = self._to_write.get_nowait()
+                    if message is None:
+                        break
+                    messages.extend(self._messages_json(message))
+
+                if len(messages) == 1:
+                    await self._send_str(messages[0])
+                else:
+                    self._metrics.batched_frames += 1
+                    await self._send_str(f'[{",".join(messages)}]')
+                self._release_drain_waiters()
 
-                if not isinstance(message, str):
-                    message = message_to_json(message)
+                if message is None:
+                    break
 
-                await self.wsock.send_str(message)
+        # Nothing is written anymore, do not keep producers waiting
+        self._release_drain_waiters(closed=True)
 
         # Clean up the peaker checker when we shut down the writer
         if self._peak_checker_unsub:
             self._peak_checker_unsub()
             self._peak_checker_unsub = None
 
+    async def _send_str(self, data: str) -> None:
+        """Send a text frame to the client."""
+        await self.wsock.send_str(data)
+        if not WRITER_INTERNALS:
+            # The payload size, the writer counts the frames otherwise
+            self._metrics.sent_bytes += len(data)
+
+    async def _async_drain(self, max_pending: int) -> None:
+        """Wait until at most max_pending messages are waiting to be written."""
+        if self.pending_messages <= max_pending or (
+            self._writer_task is not None and self._writer_task.done()
+        ):
+            return
+        future = self.hass.loop.create_future()
+        self._drain_waiters.append((max_pending, future))
+        await future
+
+    @callback
+    def _release_drain_waiters(self, closed: bool = False) -> None:
+        """Wake up the producers waiting for the queue to drain."""
+        if not self._drain_waiters:
+            return
+        pending = self.pending_messages
+        waiters, self._drain_waiters = self._drain_waiters, []
+        for max_pending, future in waiters:
+            if future.done():
+                continue
+            if closed or pending <= max_pending:
+                future.set_result(None)
+            else:
+                self._drain_waiters.append((max_pending, future))
+
+    def _messages_json(self, message) -> List[str]:
+        """Return a queued message or batch of messages serialized to JSON."""
+        if isinstance(message, _BatchedMessages):
+            self._batched_pending -= len(message.messages) - 1
+            return message.messages
+        return [self._message_json(message)]
+
     @callback
-    def _send_message(self, message):
+    def _batch_queued_messages(self) -> None:
+        """Serialize the queued messages into a single one to free the queue."""
+        messages: List[str] = []
+        closing = False
+        while not self._to_write.empty():
+            message = self._to_write.get_nowait()
+            if message is None:
+                closing = True
+                break
+            messages.extend(self._messages_json(message))
+
+        if messages:
+            self._batched_pending += len(messages) - 1
+            self._to_write.put_nowait(_BatchedMessages(messages))
+        if closing:
+            self._to_write.put_nowait(None)
+
+    def _message_json(self, message) -> str:
+        """Return a queued message serialized to JSON."""
+        if isinstance(message, _CoalescedMessage):
+            del self._coalesced[message.key]
+            message = message.message
+
+        self._logger.debug("Sending %s", message)
+
+        if not isinstance(message, str):
+            message = message_to_json(message)
+        return message
+
+    @callback
+    def _send_message(self, message, coalesce_key: Optional[Hashable] = None):
         """Send a message to the client.
 
+        A message with a coalesce key replaces the queued message with the
+        same key if the client supports it, like a newer state of an entity.
+
         Closes connection if the client is not reading the messages.
 
         Async friendly.
         """
+        if coalesce_key is not None and self._coalesce_messages:
+            queued = self._coalesced.get(coalesce_key)
+            if queued is not None:
+                queued.message = message
+                self._metrics.coalesced_messages += 1
+                return
+            message = self._coalesced[coalesce_key] = _CoalescedMessage(
+                coalesce_key, message
+            )
+
         try:
             self._to_write.put_nowait(message)
         except asyncio.QueueFull:
-            self._logger.error(
-                "Client exceeded max pending messages [2]: %s", MAX_PENDING_MSG
-            )
+            if (
+                not self._coalesce_messages
+                or self.pending_messages >= MAX_PENDING_MSG * MAX_PENDING_MSG_BATCHED
+            ):
+                self._logger.error(
+                    "Client exceeded max pending messages [2]: %s", MAX_PENDING_MSG
+                )
+                self._metrics.slow_client_disconnects += 1
 
-            self._cancel()
+                self._cancel()
+                return
 
-        if self._to_write.qsize() < PENDING_MSG_PEAK:
+            # The client reads batches, make room by batching the queue
+            self._batch_queued_messages()
+            self._to_write.put_nowait(message)
+
+        if self.pending_messages < PENDING_MSG_PEAK:
             if self._peak_checker_unsub:
                 self._peak_checker_unsub()
                 self._peak_checker_unsub = None
@@ -118,7 +393,7 @@ class WebSocketHandler:
         """Check that we are no longer above the write peak."""
         self._peak_checker_unsub = None
 
-        if self._to_write.qsize() < PENDING_MSG_PEAK:
+        if self.pending_messages < PENDING_MSG_PEAK:
             return
 
         self._logger.error(
@@ -126,6 +401,7 @@ class WebSocketHandler:
             PENDING_MSG_PEAK,
             PENDING_MSG_PEAK_TIME,
         )
+        self._metrics.slow_client_disconnects += 1
         self._cancel()
 
     @callback
@@ -137,7 +413,17 @@ class WebSocketHandler:
     async def async_handle(self) -> web.WebSocketResponse:
         """Handle a websocket response."""
         request = self.request
-        wsock = self.wsock = web.WebSocketResponse(heartbeat=55)
+        if WRITER_INTERNALS:
+            wsock = self.wsock = _WebSocketResponse(
+                self._compression_level,
+                self._compression_threshold,
+                self._metrics,
+                heartbeat=55,
+            )
+        else:
+            wsock = self.wsock = web.WebSocketResponse(
+                compress=self._compression_level > 0, heartbeat=55
+            )
         await wsock.prepare(request)
         self._logger.debug("Connected from %s", request.remote)
         self._handle_task = asyncio.current_task()
@@ -154,8 +440,11 @@ class WebSocketHandler:
         # As the webserver is now started before the start
         # event we do not want to block for websocket responses
         self._writer_task = asyncio.create_task(self._writer())
+        self._metrics.handlers.add(self)
 
-        auth = AuthPhase(self._logger, self.hass, self._send_message, request)
+        auth = AuthPhase(
+            self._logger, self.hass, self._send_message, request, self._async_drain
+        )
         connection = None
         disconnect_warn = None
 
@@ -184,7 +473,7 @@ class WebSocketHandler:
                 raise Disconnect from err
 
             self._logger.debug("Received %s", msg_data)
-            connection = await auth.async_handle(msg_data)
+            connection = self._connection = await auth.async_handle(msg_data)
             self.hass.data[DATA_CONNECTIONS] = (
                 self.hass.data.get(DATA_CONNECTIONS, 0) + 1
             )
@@ -223,6 +512,7 @@ class WebSocketHandler:
 
         finally:
             unsub_stop()
+            self._metrics.handlers.discard(self)
 
             if connection is not None:
                 connection.async_close()
@@ -2,12 +2,21 @@
 
 from functools import lru_cache
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
 
 import voluptuous as vol
 
-from homeassistant.core import Event
+from homeassistant.const import (
+    COMPRESSED_STATE_ATTRIBUTES,
+    COMPRESSED_STATE_CONTEXT,
+    COMPRESSED_STATE_LAST_CHANGED,
+    COMPRESSED_STATE_LAST_UPDATED,
+    COMPRESSED_STATE_STATE,
+    EVENT_STATE_CHANGED,
+)
+from homeassistant.core import Event, State
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.json import json_dumps_with_fallback
 from homeassistant.util.json import (
     find_paths_unserializable_data,
     format_unserializable_data,
@@ -31,6 +40,17 @@ BASE_COMMAND_MESSAGE_SCHEMA = vol.Schema({vol.Required("id"): cv.positive_int})
 IDEN_TEMPLATE = "__IDEN__"
 IDEN_JSON_TEMPLATE = '"__IDEN__"'
 
+STATE_CHANGED_DATA_KEYS = {"entity_id", "old_state", "new_state"}
+
+# Keys of the entity events sent to subscribe_entities subscribers
+ENTITY_EVENT_ADD = "a"
+ENTITY_EVENT_REMOVE = "r"
+ENTITY_EVENT_CHANGE = "c"
+
+# Keys of the diff of a changed entity
+STATE_DIFF_ADDITIONS = "+"
+STATE_DIFF_REMOVALS = "-"
+
 
 def result_message(iden: int, result: Any = None) -> Dict:
     """Return a success result message."""
@@ -71,9 +91,130 @@ def _cached_event_message(event: Event) -> str:
     The IDEN_TEMPLATE is used which will be replaced
     with the actual iden in cached_event_message
     """
+    if event.event_type == EVENT_STATE_CHANGED:
+        return json_dumps_with_fallback(
+            lambda: _state_changed_event_message_json(event),
+            lambda: message_to_json(event_message(IDEN_TEMPLATE, event)),
+        )
     return message_to_json(event_message(IDEN_TEMPLATE, event))
 
 
+def _state_changed_event_message_json(event: Event) -> str:
+    """Serialize a state changed event message from the cached state JSON.
+
+    Raises TypeError if the event data is not the one fired by the state machine.
+    """
+    if event.data.keys() != STATE_CHANGED_DATA_KEYS:
+        raise TypeError
+    states = []
+    for key in ("old_state", "new_state"):
+        state = event.data[key]
+        if state is None:
+            states.append("null")
+        elif isinstance(state, State):
+            states.append(state.as_json())
+        else:
+            raise TypeError
+    event_dict = event.as_dict()
+    return (
+        f'{{"id": {IDEN_JSON_TEMPLATE}, "type": "event", "event": '
+        f'{{"event_type": {const.JSON_DUMP(event.event_type)}, "data": '
+        f'{{"entity_id": {const.JSON_DUMP(event.data["entity_id"])}, '
+        f'"old_state": {states[0]}, "new_state": {states[1]}}}, '
+        f'"origin": {const.JSON_DUMP(event_dict["origin"])}, '
+        f'"time_fired": {const.JSON_DUMP(event_dict["time_fired"])}, '
+        f'"context": {const.JSON_DUMP(event_dict["context"])}}}}}'
+    )
+
+
+def cached_state_diff_message(iden: int, event: Event) -> str:
+    """Return an entity event message for a state changed event.
+
+    Serialize to json once per message, like cached_event_message.
+    """
+    return _cached_state_diff_message(event).replace(IDEN_JSON_TEMPLATE, str(iden), 1)
+
+
+@lru_cache(maxsize=128)
+def _cached_state_diff_message(event: Event) -> str:
+    """Cache and serialize the entity event of a state changed event to json.
+
+    The IDEN_TEMPLATE is used which will be replaced
+    with the actual iden in cached_state_diff_message
+    """
+    return message_to_json(event_message(IDEN_TEMPLATE, _state_diff_event(event)))
+
+
+def _state_diff_event(event: Event) -> Dict:
+    """Convert a state changed event to the entity event of its changes."""
+    new_state = event.data["new_state"]
+    if new_state is None:
+        return {ENTITY_EVENT_REMOVE: [event.data["entity_id"]]}
+    old_state = event.data["old_state"]
+    if old_state is None:
+        return {
+            ENTITY_EVENT_ADD: {new_state.entity_id: new_state.as_compressed_state()}
+        }
+    return {
+        ENTITY_EVENT_CHANGE: {new_state.entity_id: _state_diff(old_state, new_state)}
+    }
+
+
+def _state_diff(old_state: State, new_state: State) -> Dict:
+    """Create a diff of the compressed states of an entity.
+
+    A new last_changed also replaces last_updated unless it is included.
+    """
+    additions: Dict[str, Any] = {}
+    diff = {STATE_DIFF_ADDITIONS: additions}
+    if old_state.state != new_state.state:
+        additions[COMPRESSED_STATE_STATE] = new_state.state
+    if old_state.last_changed != new_state.last_changed:
+        additions[COMPRESSED_STATE_LAST_CHANGED] = new_state.last_changed.timestamp()
+        if new_state.last_updated != new_state.last_changed:
+            additions[
+                COMPRESSED_STATE_LAST_UPDATED
+            ] = new_state.last_updated.timestamp()
+    elif old_state.last_updated != new_state.last_updated:
+        additions[COMPRESSED_STATE_LAST_UPDATED] = new_state.last_updated.timestamp()
+    if old_state.context != new_state.context:
+        additions[COMPRESSED_STATE_CONTEXT] = new_state.context.as_compressed()
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    if old_attributes != new_attributes:
+        changed = {
+            key: value
+            for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value
+        }
+        if changed:
+            additions[COMPRESSED_STATE_ATTRIBUTES] = changed
+        removed = [key for key in old_attributes if key not in new_attributes]
+        if removed:
+            diff[STATE_DIFF_REMOVALS] = {COMPRESSED_STATE_ATTRIBUTES: removed}
+    return diff
+
+
+def entities_initial_message_json(iden: int, states: Iterable[State]) -> str:
+    """Serialize the entity event adding the compressed states of a subscription."""
+    compressed_states = ", ".join(
+        f"{const.JSON_DUMP(state.entity_id)}: {state.as_compressed_state_json()}"
+        for state in states
+    )
+    return (
+        f'{{"id": {iden}, "type": "event", '
+        f'"event": {{"{ENTITY_EVENT_ADD}": {{{compressed_states}}}}}}}'
+    )
+
+
+def states_result_message_json(iden: int, states: Iterable[State]) -> str:
+    """Serialize a result message listing states from the cached state JSON."""
+    return (
+        f'{{"id": {iden}, "type": "{const.TYPE_RESULT}", "success": true, '
+        f'"result": [{", ".join(state.as_json() for state in states)}]}}'
+    )
+
+
 def message_to_json(message: Any) -> str:
     """Serialize a websocket message to json."""
     try:
@@ -0,0 +1,27 @@
+"""Provide info to system health."""
+from homeassistant.components import system_health
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_CONNECTIONS, DATA_WRITER_METRICS
+
+
+@callback
+def async_register(
+    hass: HomeAssistant, register: system_health.SystemHealthRegistration
+) -> None:
+    """Register system health callbacks."""
+    register.async_register_info(system_health_info)
+
+
+async def system_health_info(hass):
+    """Get info for the info page."""
+    metrics = hass.data[DATA_WRITER_METRICS]
+
+    return {
+        "connected_clients": hass.data.get(DATA_CONNECTIONS, 0),
+        "pending_messages": metrics.pending_messages,
+        "batched_frames": metrics.batched_frames,
+        "coalesced_messages": metrics.coalesced_messages,
+        "slow_client_disconnects": metrics.slow_client_disconnects,
+        "sent_bytes": metrics.sent_bytes,
+    }
@@ -38,6 +38,8 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_PACKAGES,
     CONF_TEMPERATURE_UNIT,
+    CONF_TEMPLATE_CPU_BUDGET,
+    CONF_TEMPLATE_OPERATION_LIMIT,
     CONF_TIME_ZONE,
     CONF_TYPE,
     CONF_UNIT_SYSTEM,
@@ -226,6 +228,10 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend(
         # pylint: disable=no-value-for-parameter
         vol.Optional(CONF_MEDIA_DIRS): cv.schema_with_slug_keys(vol.IsDir()),
         vol.Optional(CONF_LEGACY_TEMPLATES): cv.boolean,
+        vol.Optional(CONF_TEMPLATE_CPU_BUDGET): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+        vol.Optional(CONF_TEMPLATE_OPERATION_LIMIT): cv.positive_int,
     }
 )
 
@@ -506,6 +512,8 @@ async def async_process_ha_core_config(hass: HomeAssistant, config: Dict) -> Non
         (CONF_EXTERNAL_URL, "external_url"),
         (CONF_MEDIA_DIRS, "media_dirs"),
         (CONF_LEGACY_TEMPLATES, "legacy_templates"),
+        (CONF_TEMPLATE_CPU_BUDGET, "template_cpu_budget"),
+        (CONF_TEMPLATE_OPERATION_LIMIT, "template_operation_limit"),
     ):
         if key in config:
             setattr(hac, attr, config[key])
@@ -172,6 +172,8 @@ CONF_STRUCTURE = "structure"
 CONF_SWITCHES = "switches"
 CONF_TARGET = "target"
 CONF_TEMPERATURE_UNIT = "temperature_unit"
+CONF_TEMPLATE_CPU_BUDGET = "template_cpu_budget"
+CONF_TEMPLATE_OPERATION_LIMIT = "template_operation_limit"
 CONF_TIMEOUT = "timeout"
 CONF_TIME_ZONE = "time_zone"
 CONF_TOKEN = "token"
@@ -373,6 +375,14 @@ ATTR_DEVICE_CLASS = "device_class"
 # Temperature attribute
 ATTR_TEMPERATURE = "temperature"
 
+# #### COMPRESSED STATE ####
+# Short keys of the compressed states sent to websocket subscribers
+COMPRESSED_STATE_STATE = "s"
+COMPRESSED_STATE_ATTRIBUTES = "a"
+COMPRESSED_STATE_CONTEXT = "c"
+COMPRESSED_STATE_LAST_CHANGED = "lc"
+COMPRESSED_STATE_LAST_UPDATED = "lu"
+
 # #### UNITS OF MEASUREMENT ####
 # Power units
 POWER_WATT = "W"
@@ -5,6 +5,7 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+from collections import deque
 import datetime
 import enum
 import functools
@@ -23,18 +24,19 @@ from typing import (
     Callable,
     Collection,
     Coroutine,
+    Deque,
     Dict,
     Iterable,
     List,
     Mapping,
     Optional,
     Set,
+    Tuple,
     TypeVar,
     Union,
     cast,
 )
 
-import attr
 import voluptuous as vol
 import yarl
 
@@ -46,6 +48,11 @@ from homeassistant.const import (
     ATTR_SECONDS,
     ATTR_SERVICE,
     ATTR_SERVICE_DATA,
+    COMPRESSED_STATE_ATTRIBUTES,
+    COMPRESSED_STATE_CONTEXT,
+    COMPRESSED_STATE_LAST_CHANGED,
+    COMPRESSED_STATE_LAST_UPDATED,
+    COMPRESSED_STATE_STATE,
     CONF_UNIT_SYSTEM_IMPERIAL,
     EVENT_CALL_SERVICE,
     EVENT_CORE_CONFIG_UPDATE,
@@ -73,6 +80,7 @@ from homeassistant.exceptions import (
 from homeassistant.util import location, network
 from homeassistant.util.async_ import fire_coroutine_threadsafe, run_callback_threadsafe
 import homeassistant.util.dt as dt_util
+from homeassistant.util.json_encoding import json_dumps
 from homeassistant.util.timeout import TimeoutManager
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM, UnitSystem
 import homeassistant.util.uuid as uuid_util
@@ -88,6 +96,8 @@ block_async_io.enable()
 
 T = TypeVar("T")
 _UNDEF: dict = {}  # Internal; not helpers.typing.UNDEFINED due to circular dependency
+# Guards the lazy generation of context ids, contexts are read by the recorder thread
+_CONTEXT_ID_LOCK = threading.Lock()
 # pylint: disable=invalid-name
 CALLABLE_T = TypeVar("CALLABLE_T", bound=Callable)
 CALLBACK_TYPE = Callable[[], None]
@@ -563,17 +573,86 @@ class HomeAssistant:
             self._stopped.set()
 
 
-@attr.s(slots=True, frozen=True)
 class Context:
-    """The context that triggered something."""
+    """The context that triggered something.
 
-    user_id: str = attr.ib(default=None)
-    parent_id: Optional[str] = attr.ib(default=None)
-    id: str = attr.ib(factory=uuid_util.random_uuid_hex)
+    A context is immutable. Its id is only generated when it is first
+    accessed, as many contexts are never looked at. The generation is
+    guarded by a lock as contexts are also accessed outside the event loop.
+    """
+
+    __slots__ = ("user_id", "parent_id", "_id", "_as_dict")
+
+    user_id: Optional[str]
+    parent_id: Optional[str]
+
+    def __init__(
+        self,
+        user_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        id: Optional[str] = _UNDEF,  # type: ignore  # pylint: disable=redefined-builtin
+    ) -> None:
+        """Initialize a new context."""
+        object.__setattr__(self, "user_id", user_id)
+        object.__setattr__(self, "parent_id", parent_id)
+        object.__setattr__(self, "_id", id)
+        object.__setattr__(self, "_as_dict", None)
+
+    @property
+    def id(self) -> Optional[str]:  # pylint: disable=invalid-name
+        """Return the id of the context."""
+        if self._id is _UNDEF:
+            with _CONTEXT_ID_LOCK:
+                if self._id is _UNDEF:
+                    object.__setattr__(self, "_id", uuid_util.random_uuid_hex())
+        return self._id
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevent changing the context."""
+        raise AttributeError(f"Context is immutable, cannot set {name}")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Support copy and pickle, which cannot set the slots."""
+        return (self.__class__, (self.user_id, self.parent_id, self.id))
+
+    def __eq__(self, other: Any) -> bool:
+        """Return the comparison."""
+        return (  # type: ignore
+            self.__class__ == other.__class__
+            and self.id == other.id
+            and self.user_id == other.user_id
+            and self.parent_id == other.parent_id
+        )
+
+    def __hash__(self) -> int:
+        """Make hashable."""
+        return hash((self.id, self.user_id, self.parent_id))
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return (
+            f"Context(user_id={self.user_id!r}, parent_id={self.parent_id!r},"
+            f" id={self.id!r})"
+        )
 
     def as_dict(self) -> Dict[str, Optional[str]]:
-        """Return a dictionary representation of the context."""
-        return {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id}
+        """Return a dictionary representation of the context.
+
+        The dictionary is cached and must not be modified.
+        """
+        if self._as_dict is None:
+            object.__setattr__(
+                self,
+                "_as_dict",
+                {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id},
+            )
+        return self._as_dict  # type: ignore
+
+    def as_compressed(self) -> Union[Optional[str], Dict[str, Optional[str]]]:
+        """Return the id of the context, or its dict if it has more."""
+        if self.parent_id is None and self.user_id is None:
+            return self.id
+        return self.as_dict()
 
 
 class EventOrigin(enum.Enum):
@@ -590,7 +669,7 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = ["event_type", "data", "origin", "time_fired", "context", "_as_dict"]
 
     def __init__(
         self,
@@ -606,6 +685,7 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        self._as_dict: Optional[Dict[str, Any]] = None
 
     def __hash__(self) -> int:
         """Make hashable."""
@@ -616,14 +696,18 @@ class Event:
         """Create a dict representation of this Event.
 
         Async friendly.
+
+        The dictionary is cached as events are not changed once fired.
         """
-        return {
-            "event_type": self.event_type,
-            "data": dict(self.data),
-            "origin": str(self.origin.value),
-            "time_fired": self.time_fired.isoformat(),
-            "context": self.context.as_dict(),
-        }
+        if self._as_dict is None:
+            self._as_dict = {
+                "event_type": self.event_type,
+                "data": dict(self.data),
+                "origin": str(self.origin.value),
+                "time_fired": self.time_fired.isoformat(),
+                "context": self.context.as_dict(),
+            }
+        return self._as_dict
 
     def __repr__(self) -> str:
         """Return the representation."""
@@ -645,12 +729,58 @@ class Event:
         )
 
 
+EventFilterType = Union[Callable[[Event], bool], Mapping[str, Any]]
+_FilteredJobType = Tuple[HassJob, Optional[Callable[[Event], bool]]]
+
+
+def _build_event_data_filter(match: Mapping[str, Any]) -> Callable[[Event], bool]:
+    """Build an event filter from a mapping of event data keys to values.
+
+    A value can be a single value or a collection of accepted values.
+    """
+    matchers = [
+        (
+            key,
+            frozenset(value)
+            if isinstance(value, (list, set, frozenset, tuple))
+            else frozenset((value,)),
+        )
+        for key, value in match.items()
+    ]
+
+    @callback
+    def _event_data_filter(event: Event) -> bool:
+        """Return if the event data matches."""
+        data = event.data
+        try:
+            for key, accepted in matchers:
+                if data.get(key) not in accepted:
+                    return False
+        except TypeError:
+            # Unhashable values can never match
+            return False
+        return True
+
+    return _event_data_filter
+
+
 class EventBus:
     """Allow the firing of and listening for events."""
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners: Dict[str, List[HassJob]] = {}
+        self._listeners: Dict[str, List[_FilteredJobType]] = {}
+        # Immutable snapshot of the jobs to run per event type, including
+        # the MATCH_ALL listeners. Rebuilt lazily after listen/unlisten.
+        self._dispatch: Dict[str, Tuple[_FilteredJobType, ...]] = {}
+        # Events fired by a listener while we are already dispatching
+        # callbacks inline are queued so listeners see events in order.
+        self._dispatch_queue: Deque[
+            Tuple[Tuple[_FilteredJobType, ...], Event]
+        ] = deque()
+        self._dispatching = False
+        # Called when an event type gains its first or loses its last listener
+        self._presence_watchers: Dict[str, Callable[[bool], None]] = {}
         self._hass = hass
 
     @callback
@@ -691,32 +821,139 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        listeners = self._listeners.get(event_type, [])
+        jobs = self._dispatch.get(event_type)
+        if jobs is None:
+            jobs = self._async_build_dispatch(event_type)
 
-        # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
-            listeners = match_all_listeners + listeners
+        if not jobs:
+            if event_type != EVENT_TIME_CHANGED and _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Bus:Handling %s",
+                    Event(event_type, event_data, origin, time_fired, context),
+                )
+            return
 
         event = Event(event_type, event_data, origin, time_fired, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
+        self._dispatch_queue.append((jobs, event))
+        self._async_drain_dispatch_queue()
+
+    @callback
+    def async_fire_many(
+        self,
+        event_type: str,
+        events: Iterable[
+            Tuple[Optional[Dict[str, Any]], Optional[Context], datetime.datetime]
+        ],
+        origin: EventOrigin = EventOrigin.local,
+    ) -> None:
+        """Fire a batch of events of the same type in one dispatch pass.
+
+        Each item is a tuple of event data, context and time fired.
+
+        This method must be run in the event loop.
+        """
+        jobs = self._dispatch.get(event_type)
+        if jobs is None:
+            jobs = self._async_build_dispatch(event_type)
+
+        log_events = event_type != EVENT_TIME_CHANGED and _LOGGER.isEnabledFor(
+            logging.DEBUG
+        )
+
+        if not jobs and not log_events:
             return
 
-        for job in listeners:
-            self._hass.async_add_hass_job(job, event)
+        for event_data, context, time_fired in events:
+            event = Event(event_type, event_data, origin, time_fired, context)
+            if log_events:
+                _LOGGER.debug("Bus:Handling %s", event)
+            self._dispatch_queue.append((jobs, event))
+
+        self._async_drain_dispatch_queue()
 
-    def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    @callback
+    def _async_drain_dispatch_queue(self) -> None:
+        """Run the jobs of all queued events."""
+        if self._dispatching:
+            # A listener fired this event; the outer loop will pick it up.
+            return
+
+        self._dispatching = True
+        try:
+            while self._dispatch_queue:
+                self._async_run_jobs(*self._dispatch_queue.popleft())
+        finally:
+            self._dispatching = False
+
+    @callback
+    def _async_run_jobs(self, jobs: Tuple[_FilteredJobType, ...], event: Event) -> None:
+        """Run the jobs listening to an event.
+
+        Callbacks are run inline, everything else is scheduled.
+        """
+        for job, event_filter in jobs:
+            if event_filter is not None:
+                try:
+                    if not event_filter(event):
+                        continue
+                except Exception as err:  # pylint: disable=broad-except
+                    self._hass.loop.call_exception_handler(
+                        {
+                            "message": f"Exception in event filter {event_filter!r}",
+                            "exception": err,
+                        }
+                    )
+                    continue
+            if job.job_type != HassJobType.Callback:
+                self._hass.async_add_hass_job(job, event)
+                continue
+            try:
+                job.target(event)
+            except Exception as err:  # pylint: disable=broad-except
+                self._hass.loop.call_exception_handler(
+                    {
+                        "message": f"Exception in event listener {job.target!r}",
+                        "exception": err,
+                    }
+                )
+
+    @callback
+    def _async_build_dispatch(self, event_type: str) -> Tuple[_FilteredJobType, ...]:
+        """Build and cache the jobs to run for an event type."""
+        jobs = tuple(self._listeners.get(event_type, ()))
+
+        # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
+        if event_type != EVENT_HOMEASSISTANT_CLOSE:
+            jobs = tuple(self._listeners.get(MATCH_ALL, ())) + jobs
+
+        self._dispatch[event_type] = jobs
+        return jobs
+
+    @callback
+    def _async_invalidate_dispatch(self, event_type: str) -> None:
+        """Drop cached dispatch tuples affected by a listener change."""
+        if event_type == MATCH_ALL:
+            self._dispatch.clear()
+        else:
+            self._dispatch.pop(event_type, None)
+
+    def listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[EventFilterType] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
         """
         async_remove_listener = run_callback_threadsafe(
-            self._hass.loop, self.async_listen, event_type, listener
+            self._hass.loop, self.async_listen, event_type, listener, event_filter
         ).result()
 
         def remove_listener() -> None:
@@ -726,19 +963,41 @@ class EventBus:
         return remove_listener
 
     @callback
-    def async_listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def async_listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[EventFilterType] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        The optional event_filter is evaluated in the event loop before the
+        listener is run or scheduled. It is either a callback that receives
+        the event and returns a boolean, or a mapping of event data keys to
+        an accepted value or a collection of accepted values.
+
         This method must be run in the event loop.
         """
-        return self._async_listen_job(event_type, HassJob(listener))
+        if event_filter is not None and not callable(event_filter):
+            event_filter = _build_event_data_filter(event_filter)
+        return self._async_listen_job(event_type, HassJob(listener), event_filter)
 
     @callback
-    def _async_listen_job(self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
-        self._listeners.setdefault(event_type, []).append(hassjob)
+    def _async_listen_job(
+        self,
+        event_type: str,
+        hassjob: HassJob,
+        event_filter: Optional[Callable[[Event], bool]] = None,
+    ) -> CALLBACK_TYPE:
+        listeners = self._listeners.setdefault(event_type, [])
+        listeners.append((hassjob, event_filter))
+        self._async_invalidate_dispatch(event_type)
+
+        if len(listeners) == 1 and event_type in self._presence_watchers:
+            self._presence_watchers[event_type](True)
 
         def remove_listener() -> None:
             """Remove the listener."""
@@ -797,6 +1056,28 @@ class EventBus:
 
         return self._async_listen_job(event_type, job)
 
+    @callback
+    def _async_watch_listeners(
+        self, event_type: str, action: Callable[[bool], None]
+    ) -> CALLBACK_TYPE:
+        """Call action with whether there are listeners for an event type.
+
+        The action is called right away and again every time the event type
+        gains its first listener or loses its last one.
+
+        This method must be run in the event loop.
+        """
+        self._presence_watchers[event_type] = action
+        action(event_type in self._listeners)
+
+        @callback
+        def remove_watcher() -> None:
+            """Stop watching the listeners."""
+            if self._presence_watchers.get(event_type) is action:
+                self._presence_watchers.pop(event_type)
+
+        return remove_watcher
+
     @callback
     def _async_remove_listener(self, event_type: str, hassjob: HassJob) -> None:
         """Remove a listener of a specific event_type.
@@ -804,14 +1085,25 @@ class EventBus:
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(hassjob)
+            listeners = self._listeners[event_type]
+            listeners.remove(
+                next(
+                    filtered_job
+                    for filtered_job in listeners
+                    if filtered_job[0] is hassjob
+                )
+            )
+
+            self._async_invalidate_dispatch(event_type)
 
             # delete event_type list if empty
-            if not self._listeners[event_type]:
+            if not listeners:
                 self._listeners.pop(event_type)
-        except (KeyError, ValueError):
+                if event_type in self._presence_watchers:
+                    self._presence_watchers[event_type](False)
+        except (KeyError, StopIteration):
             # KeyError is key event_type listener did not exist
-            # ValueError if listener did not exist within event_type
+            # StopIteration if listener did not exist within event_type
             _LOGGER.exception("Unable to remove unknown job listener %s", hassjob)
 
 
@@ -838,6 +1130,10 @@ class State:
         "domain",
         "object_id",
         "_as_dict",
+        "_as_json",
+        "_attributes_json",
+        "_as_compressed_state_json",
+        "_json_error",
     ]
 
     def __init__(
@@ -873,6 +1169,10 @@ class State:
         self.context = context or Context()
         self.domain, self.object_id = split_entity_id(self.entity_id)
         self._as_dict: Optional[Dict[str, Collection[Any]]] = None
+        self._as_json: Optional[str] = None
+        self._attributes_json: Optional[str] = None
+        self._as_compressed_state_json: Optional[str] = None
+        self._json_error: Optional[Exception] = None
 
     @property
     def name(self) -> str:
@@ -905,6 +1205,91 @@ class State:
             }
         return self._as_dict
 
+    def as_json(self) -> str:
+        """Return the State serialized to JSON.
+
+        Async friendly.
+
+        The result is cached so the REST API, the websocket API and the
+        recorder share a single serialization of each state. It is compact
+        like the output of json_dumps it embeds.
+        """
+        if self._as_json is None:
+            attributes_json = self.attributes_json()
+            as_dict = self.as_dict()
+            self._as_json = (
+                f'{{"entity_id":{json_dumps(self.entity_id)},'
+                f'"state":{json_dumps(self.state)},'
+                f'"attributes":{attributes_json},'
+                f'"last_changed":"{as_dict["last_changed"]}",'
+                f'"last_updated":"{as_dict["last_updated"]}",'
+                f'"context":{json_dumps(as_dict["context"])}}}'
+            )
+        return self._as_json
+
+    def attributes_json(self) -> str:
+        """Return the attributes of the State serialized to JSON.
+
+        Async friendly.
+
+        Raises ValueError or TypeError if the attributes are not serializable.
+        The failure is cached as well, so the attributes are only tried once.
+        """
+        if self._attributes_json is None:
+            if self._json_error is not None:
+                raise self._json_error.__class__(*self._json_error.args)
+            try:
+                self._attributes_json = json_dumps(self.as_dict()["attributes"])
+            except (ValueError, TypeError) as err:
+                self._json_error = err
+                raise
+        return self._attributes_json
+
+    def as_compressed_state(self) -> Dict:
+        """Return a compressed dict representation of the State.
+
+        Async friendly.
+
+        Uses short keys, timestamps instead of isoformat strings and leaves
+        out last_updated when it equals last_changed. The context is only
+        its id unless it has a parent or a user.
+        """
+        compressed = {
+            COMPRESSED_STATE_STATE: self.state,
+            COMPRESSED_STATE_ATTRIBUTES: self.as_dict()["attributes"],
+            COMPRESSED_STATE_CONTEXT: self.context.as_compressed(),
+            COMPRESSED_STATE_LAST_CHANGED: self.last_changed.timestamp(),
+        }
+        if self.last_changed != self.last_updated:
+            compressed[COMPRESSED_STATE_LAST_UPDATED] = self.last_updated.timestamp()
+        return compressed
+
+    def as_compressed_state_json(self) -> str:
+        """Return the compressed State serialized to JSON.
+
+        Async friendly.
+
+        The result is cached and shares the attributes JSON with as_json.
+        """
+        if self._as_compressed_state_json is None:
+            attributes_json = self.attributes_json()
+            compressed = self.as_compressed_state()
+            compressed_json = (
+                f'{{"{COMPRESSED_STATE_STATE}":{json_dumps(self.state)},'
+                f'"{COMPRESSED_STATE_ATTRIBUTES}":{attributes_json},'
+                f'"{COMPRESSED_STATE_CONTEXT}":'
+                f"{json_dumps(compressed[COMPRESSED_STATE_CONTEXT])},"
+                f'"{COMPRESSED_STATE_LAST_CHANGED}":'
+                f"{json_dumps(compressed[COMPRESSED_STATE_LAST_CHANGED])}"
+            )
+            if COMPRESSED_STATE_LAST_UPDATED in compressed:
+                compressed_json += (
+                    f',"{COMPRESSED_STATE_LAST_UPDATED}":'
+                    f"{json_dumps(compressed[COMPRESSED_STATE_LAST_UPDATED])}"
+                )
+            self._as_compressed_state_json = f"{compressed_json}}}"
+        return self._as_compressed_state_json
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -1153,6 +1538,65 @@ class StateMachine:
 
         This method must be run in the event loop.
         """
+        now = dt_util.utcnow()
+        event_data = self._async_apply_state(
+            entity_id, new_state, attributes, force_update, context, now
+        )
+        if event_data is None:
+            return
+
+        self._bus.async_fire(
+            EVENT_STATE_CHANGED,
+            event_data,
+            EventOrigin.local,
+            event_data["new_state"].context,
+            time_fired=now,
+        )
+
+    @callback
+    def async_set_many(
+        self,
+        updates: Iterable[
+            Tuple[str, str, Optional[Mapping[str, Any]], bool, Optional[Context]]
+        ],
+    ) -> None:
+        """Set the state of multiple entities at once.
+
+        Each update is a tuple of the arguments of async_set: entity_id,
+        new_state, attributes, force_update and context.
+
+        All states are written before the first state changed event is fired
+        and the events are dispatched to the listeners in one pass.
+
+        This method must be run in the event loop.
+        """
+        now = dt_util.utcnow()
+        events = []
+
+        for entity_id, new_state, attributes, force_update, context in updates:
+            event_data = self._async_apply_state(
+                entity_id, new_state, attributes, force_update, context, now
+            )
+            if event_data is not None:
+                events.append((event_data, event_data["new_state"].context, now))
+
+        if events:
+            self._bus.async_fire_many(EVENT_STATE_CHANGED, events)
+
+    @callback
+    def _async_apply_state(
+        self,
+        entity_id: str,
+        new_state: str,
+        attributes: Optional[Mapping[str, Any]],
+        force_update: bool,
+        context: Optional[Context],
+        now: datetime.datetime,
+    ) -> Optional[Dict[str, Any]]:
+        """Write a new state to the state machine.
+
+        Returns the state changed event data or None if nothing changed.
+        """
         entity_id = entity_id.lower()
         new_state = str(new_state)
         attributes = attributes or {}
@@ -1167,13 +1611,11 @@ class StateMachine:
             last_changed = old_state.last_changed if same_state else None
 
         if same_state and same_attr:
-            return
+            return None
 
         if context is None:
             context = Context()
 
-        now = dt_util.utcnow()
-
         state = State(
             entity_id,
             new_state,
@@ -1184,13 +1626,7 @@ class StateMachine:
             old_state is None,
         )
         self._states[entity_id] = state
-        self._bus.async_fire(
-            EVENT_STATE_CHANGED,
-            {"entity_id": entity_id, "old_state": old_state, "new_state": state},
-            EventOrigin.local,
-            context,
-            time_fired=now,
-        )
+        return {"entity_id": entity_id, "old_state": old_state, "new_state": state}
 
 
 class Service:
@@ -1527,6 +1963,10 @@ class Config:
         # Use legacy template behavior
         self.legacy_templates: bool = False
 
+        # Render budget of tracked templates, None for the default
+        self.template_cpu_budget: Optional[float] = None
+        self.template_operation_limit: Optional[int] = None
+
     def distance(self, lat: float, lon: float) -> Optional[float]:
         """Calculate distance from Home Assistant.
 
@@ -1737,8 +2177,12 @@ class Config:
 
 
 def _async_create_timer(hass: HomeAssistant) -> None:
-    """Create a timer that will start on HOMEASSISTANT_START."""
+    """Create a timer that will start on HOMEASSISTANT_START.
+
+    The timer only ticks while there are listeners for EVENT_TIME_CHANGED.
+    """
     handle = None
+    ticking = False
     timer_context = Context()
 
     def schedule_tick(now: datetime.datetime) -> None:
@@ -1752,6 +2196,9 @@ def _async_create_timer(hass: HomeAssistant) -> None:
     @callback
     def fire_time_event(target: float) -> None:
         """Fire next time event."""
+        nonlocal handle
+
+        handle = None
         now = dt_util.utcnow()
 
         hass.bus.async_fire(
@@ -1768,15 +2215,32 @@ def _async_create_timer(hass: HomeAssistant) -> None:
                 context=timer_context,
             )
 
-        schedule_tick(now)
+        # A listener may have stopped or restarted the timer
+        if ticking and handle is None:
+            schedule_tick(now)
+
+    @callback
+    def listeners_changed(has_listeners: bool) -> None:
+        """Start or stop ticking when EVENT_TIME_CHANGED listeners come and go."""
+        nonlocal handle, ticking
+
+        ticking = has_listeners
+        if not ticking and handle is not None:
+            handle.cancel()
+            handle = None
+        elif ticking and handle is None:
+            schedule_tick(dt_util.utcnow())
 
     @callback
     def stop_timer(_: Event) -> None:
         """Stop the timer."""
-        if handle is not None:
-            handle.cancel()
+        remove_watcher()
+        listeners_changed(False)
 
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_timer)
 
     _LOGGER.info("Timer:starting")
-    schedule_tick(dt_util.utcnow())
+    # pylint: disable=protected-access
+    remove_watcher = hass.bus._async_watch_listeners(
+        EVENT_TIME_CHANGED, listeners_changed
+    )
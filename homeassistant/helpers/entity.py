@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 import functools as ft
 import logging
 from timeit import default_timer as timer
-from typing import Any, Awaitable, Dict, Iterable, List, Optional
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple
 
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.const import (
@@ -123,6 +123,9 @@ class Entity(ABC):
     # If entity is added to an entity platform
     _added = False
 
+    # If state writes are queued on the platform while the entity is added
+    _batch_state_writes = False
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -298,6 +301,26 @@ class Entity(ABC):
     @callback
     def _async_write_ha_state(self) -> None:
         """Write the state to the state machine."""
+        state_update = self._async_calculate_state_update()
+        if state_update is None:
+            return
+
+        if self._batch_state_writes:
+            assert self.platform is not None
+            self.platform.async_queue_state_write(state_update)
+            return
+
+        assert self.hass is not None
+        self.hass.states.async_set(*state_update)
+
+    @callback
+    def _async_calculate_state_update(
+        self,
+    ) -> Optional[Tuple[str, str, Dict[str, Any], bool, Optional[Context]]]:
+        """Calculate the arguments to write the state to the state machine.
+
+        Returns None if the entity is disabled.
+        """
         if self.registry_entry and self.registry_entry.disabled_by:
             if not self._disabled_reported:
                 self._disabled_reported = True
@@ -307,7 +330,7 @@ class Entity(ABC):
                     self.entity_id,
                     self.platform.platform_name,
                 )
-            return
+            return None
 
         start = timer()
 
@@ -405,9 +428,7 @@ class Entity(ABC):
             self._context = None
             self._context_set = None
 
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update, self._context
-        )
+        return (self.entity_id, state, attr, self.force_update, self._context)
 
     def schedule_update_ha_state(self, force_refresh: bool = False) -> None:
         """Schedule an update ha state change task.
@@ -62,6 +62,8 @@ class EntityPlatform:
         self.config_entry: Optional[config_entries.ConfigEntry] = None
         self.entities: Dict[str, Entity] = {}  # pylint: disable=used-before-assignment
         self._tasks: List[asyncio.Future] = []
+        self._pending_state_writes: List[tuple] = []
+        self._batched_entities: List["Entity"] = []
         # Stop tracking tasks after setup is completed
         self._setup_complete = False
         # Method to cancel the state change listener
@@ -327,6 +329,9 @@ class EntityPlatform:
                 self.platform_name,
             )
             raise
+        finally:
+            # States of the new entities are available when we return
+            self._async_flush_state_writes()
 
         if self._async_unsub_polling is not None or not any(
             entity.should_poll for entity in self.entities.values()
@@ -503,7 +508,41 @@ class EntityPlatform:
 
         entity.async_on_remove(lambda: self.entities.pop(entity_id))
 
-        await entity.add_to_platform_finish()
+        # Queue the state writes of the entity until the next flush so
+        # entities that finish in the same iteration are written together.
+        entity._batch_state_writes = True  # pylint: disable=protected-access
+        try:
+            await entity.add_to_platform_finish()
+        finally:
+            if self._pending_state_writes:
+                self._batched_entities.append(entity)
+            else:
+                entity._batch_state_writes = False  # pylint: disable=protected-access
+
+    @callback
+    def async_queue_state_write(self, state_update: tuple) -> None:
+        """Queue the state write of an entity that is being added.
+
+        Queued writes are written with a single call to async_set_many once
+        per event loop iteration.
+        """
+        if not self._pending_state_writes:
+            self.hass.loop.call_soon(self._async_flush_state_writes)
+        self._pending_state_writes.append(state_update)
+
+    @callback
+    def _async_flush_state_writes(self) -> None:
+        """Write the queued states of entities that are being added."""
+        pending = self._pending_state_writes
+        self._pending_state_writes = []
+        for entity in self._batched_entities:
+            entity._batch_state_writes = False  # pylint: disable=protected-access
+        self._batched_entities.clear()
+
+        # Skip entities that have been removed in the meantime
+        updates = [update for update in pending if update[0] in self.entities]
+        if updates:
+            self.hass.states.async_set_many(updates)
 
     async def async_reset(self) -> None:
         """Remove all entities and reset data.
@@ -11,6 +11,7 @@ from typing import (
     Awaitable,
     Callable,
     Dict,
+    Hashable,
     Iterable,
     List,
     Optional,
@@ -23,10 +24,8 @@ import attr
 
 from homeassistant.const import (
     ATTR_ENTITY_ID,
-    ATTR_NOW,
     EVENT_CORE_CONFIG_UPDATE,
     EVENT_STATE_CHANGED,
-    EVENT_TIME_CHANGED,
     MATCH_ALL,
     SUN_EVENT_SUNRISE,
     SUN_EVENT_SUNSET,
@@ -53,6 +52,9 @@ from homeassistant.util.async_ import run_callback_threadsafe
 TRACK_STATE_CHANGE_CALLBACKS = "track_state_change_callbacks"
 TRACK_STATE_CHANGE_LISTENER = "track_state_change_listener"
 
+TRACK_STATE_MATCH_GROUPS = "track_state_match_groups"
+TRACK_STATE_MATCH_LISTENERS = "track_state_match_listeners"
+
 TRACK_STATE_ADDED_DOMAIN_CALLBACKS = "track_state_added_domain_callbacks"
 TRACK_STATE_ADDED_DOMAIN_LISTENER = "track_state_added_domain_listener"
 
@@ -285,6 +287,96 @@ def async_track_state_change_event(
     return remove_listener
 
 
+@bind_hass
+def async_track_state_change_match(
+    hass: HomeAssistant,
+    entity_ids: Union[str, Iterable[str]],
+    match_key: Hashable,
+    match: Callable[[Event], Any],
+    action: Callable[[Event, Any], Any],
+) -> Callable[[], None]:
+    """Track state changes of entities with a matcher shared by equal keys.
+
+    Trackers of an entity that register an equal match_key must pass
+    an equivalent match; it is called once per state change for all of
+    them. The action is called with the event and the result of match
+    unless the result is None.
+    """
+    entity_ids = _async_string_to_lower_list(entity_ids)
+    if not entity_ids:
+        return _remove_empty_listener
+
+    entity_groups: Dict[
+        str, Dict[Hashable, Tuple[Callable, List[HassJob]]]
+    ] = hass.data.setdefault(TRACK_STATE_MATCH_GROUPS, {})
+    listeners: Dict[str, CALLBACK_TYPE] = hass.data.setdefault(
+        TRACK_STATE_MATCH_LISTENERS, {}
+    )
+    job = HassJob(action)
+
+    for entity_id in entity_ids:
+        groups = entity_groups.get(entity_id)
+        if groups is None:
+            groups = entity_groups[entity_id] = {}
+            listeners[entity_id] = async_track_state_change_event(
+                hass, entity_id, _async_state_match_dispatcher(hass, groups)
+            )
+        if match_key not in groups:
+            groups[match_key] = (match, [])
+        groups[match_key][1].append(job)
+
+    @callback
+    def remove_listener() -> None:
+        """Remove state change listener, calling it again does nothing."""
+        while entity_ids:
+            entity_id = entity_ids.pop()
+            groups = entity_groups[entity_id]
+            jobs = groups[match_key][1]
+            jobs.remove(job)
+            if jobs:
+                continue
+            del groups[match_key]
+            if groups:
+                continue
+            del entity_groups[entity_id]
+            listeners.pop(entity_id)()
+
+    return remove_listener
+
+
+def _async_state_match_dispatcher(
+    hass: HomeAssistant, groups: Dict[Hashable, Tuple[Callable, List[HassJob]]]
+) -> Callable[[Event], None]:
+    """Return a dispatcher evaluating each match group of an entity once."""
+
+    @callback
+    def _async_dispatch(event: Event) -> None:
+        """Dispatch a state change to the trackers of matching groups."""
+        for match, jobs in list(groups.values()):
+            try:
+                result = match(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error while matching state changed for %s",
+                    event.data.get("entity_id"),
+                )
+                continue
+
+            if result is None:
+                continue
+
+            for job in jobs[:]:
+                try:
+                    hass.async_run_hass_job(job, event, result)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(
+                        "Error while processing state changed for %s",
+                        event.data.get("entity_id"),
+                    )
+
+    return _async_dispatch
+
+
 @callback
 def _remove_empty_listener() -> None:
     """Remove a listener that does nothing."""
@@ -1332,15 +1424,39 @@ def async_track_utc_time_change(
 
     job = HassJob(action)
     # We do not have to wrap the function with time pattern matching logic
-    # if no pattern given
+    # if no pattern given. Schedule the start of every second directly
+    # instead of listening to the EVENT_TIME_CHANGED tick. Like the tick,
+    # the action is called with the UTC time even if local is set.
     if all(val is None for val in (hour, minute, second)):
+        second_listener: Optional[CALLBACK_TYPE] = None
+
+        def next_second() -> datetime:
+            """Return the start of the next second."""
+            return dt_util.utcnow().replace(microsecond=0) + timedelta(seconds=1)
+
+        @callback
+        def second_change_listener(_: datetime) -> None:
+            """Fire every time a second rolls around."""
+            nonlocal second_listener
+
+            now = time_tracker_utcnow()
+            second_listener = async_track_point_in_utc_time(
+                hass, second_change_job, next_second()
+            )
+            hass.async_run_hass_job(job, now)
+
+        second_change_job = HassJob(second_change_listener)
+        second_listener = async_track_point_in_utc_time(
+            hass, second_change_job, next_second()
+        )
 
         @callback
-        def time_change_listener(event: Event) -> None:
-            """Fire every time event that comes in."""
-            hass.async_run_hass_job(job, event.data[ATTR_NOW])
+        def unsub_second_change_listener() -> None:
+            """Cancel the second listener."""
+            assert second_listener is not None
+            second_listener()
 
-        return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
+        return unsub_second_change_listener
 
     matching_seconds = dt_util.parse_time_expression(second, 0, 59)
     matching_minutes = dt_util.parse_time_expression(minute, 0, 59)
@@ -2,7 +2,10 @@
 from ast import literal_eval
 import asyncio
 import base64
+from bisect import bisect_left
 import collections.abc
+from contextvars import ContextVar
+from copy import copy
 from datetime import datetime, timedelta
 from functools import partial, wraps
 import json
@@ -11,7 +14,21 @@ import math
 from operator import attrgetter
 import random
 import re
-from typing import Any, Dict, Generator, Iterable, Optional, Type, Union, cast
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 from urllib.parse import urlencode as urllib_urlencode
 import weakref
 
@@ -29,7 +46,13 @@ from homeassistant.const import (
     LENGTH_METERS,
     STATE_UNKNOWN,
 )
-from homeassistant.core import State, callback, split_entity_id, valid_entity_id
+from homeassistant.core import (
+    Config,
+    State,
+    callback,
+    split_entity_id,
+    valid_entity_id,
+)
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.helpers.typing import HomeAssistantType, TemplateVarsType
@@ -46,8 +69,18 @@ DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 _RENDER_INFO = "template.render_info"
 _ENVIRONMENT = "template.environment"
+_RENDER_CACHE = "template.render_cache"
+_RENDER_STATISTICS = "template.render_statistics"
 
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{|\{#")
+# Match templates that only call states, is_state or state_attr with
+# string literals, optionally followed by a float or int filter.
+_RE_TRIVIAL_TEMPLATE = re.compile(
+    r"^\{\{-?\s*(states|is_state|state_attr)\(\s*"
+    r"(?:'([^'\\]*)'|\"([^\"\\]*)\")"
+    r"(?:\s*,\s*(?:'([^'\\]*)'|\"([^\"\\]*)\"))?"
+    r"\s*\)(?:\s*\|\s*(float|int))?\s*-?\}\}$"
+)
 # Match "simple" ints and floats. -1.0, 1, +5, 5.0
 _IS_NUMERIC = re.compile(r"^[+-]?(?!0\d)\d*(?:\.\d*)?$")
 
@@ -69,6 +102,16 @@ _COLLECTABLE_STATE_ATTRIBUTES = {
 ALL_STATES_RATE_LIMIT = timedelta(minutes=1)
 DOMAIN_STATES_RATE_LIMIT = timedelta(seconds=1)
 
+RENDER_CACHE_SIZE = 512
+
+# Default budget of a single render of a tracked template
+RENDER_CPU_BUDGET = 0.25
+RENDER_OPERATION_LIMIT = 250000
+RENDER_QUARANTINE = timedelta(minutes=1)
+# Upper bounds in seconds of the render time histogram buckets
+RENDER_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+_BUDGET_CHECK_INTERVAL = 128
+
 
 @bind_hass
 def attach(hass: HomeAssistantType, obj: Any) -> None:
@@ -205,6 +248,7 @@ class RenderInfo:
         self.entities = set()
         self.rate_limit: Optional[timedelta] = None
         self.has_time = False
+        self.is_volatile = False
 
     def __repr__(self) -> str:
         """Representation of RenderInfo."""
@@ -269,6 +313,285 @@ class RenderInfo:
             self.filter = _false
 
 
+def _render_cache_key(
+    template: str, variables: Dict[str, Any]
+) -> Optional[Tuple[str, Hashable]]:
+    """Return the render cache key or None if the variables are not hashable."""
+    try:
+        return (
+            template,
+            frozenset((name, type(value), value) for name, value in variables.items()),
+        )
+    except TypeError:
+        return None
+
+
+def _render_info_states(
+    hass: HomeAssistantType, render_info: RenderInfo
+) -> Tuple[Optional[State], ...]:
+    """Return the states a render depended on.
+
+    States are immutable and replaced on every change, so the identity
+    of the state objects acts as the version of the render inputs.
+    """
+    states = hass.states
+    snapshot = tuple(states.get(entity_id) for entity_id in render_info.entities)
+    if render_info.domains or render_info.domains_lifecycle:
+        snapshot += tuple(
+            states.async_all(render_info.domains | render_info.domains_lifecycle)
+        )
+    return snapshot
+
+
+def _same_states(
+    first: Tuple[Optional[State], ...], second: Tuple[Optional[State], ...]
+) -> bool:
+    """Return if both snapshots reference the same state objects."""
+    return len(first) == len(second) and all(
+        state is other for state, other in zip(first, second)
+    )
+
+
+class RenderCache:
+    """Memoize template render results keyed on the states they read."""
+
+    def __init__(self, hass: HomeAssistantType, size: int = RENDER_CACHE_SIZE):
+        """Initialize the render cache."""
+        self.hass = hass
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "collections.OrderedDict[Hashable, Tuple[RenderInfo, Tuple[Optional[State], ...]]]" = (
+            collections.OrderedDict()
+        )
+        self._template_stats: "collections.OrderedDict[str, List[int]]" = (
+            collections.OrderedDict()
+        )
+
+    def _template_counters(self, template: str) -> List[int]:
+        """Return the [hits, misses] counters of a template."""
+        counters = self._template_stats.get(template)
+        if counters is None:
+            counters = self._template_stats[template] = [0, 0]
+            if len(self._template_stats) > self.size:
+                self._template_stats.popitem(last=False)
+        else:
+            self._template_stats.move_to_end(template)
+        return counters
+
+    @callback
+    def async_get(self, key: Hashable) -> Optional[RenderInfo]:
+        """Return the cached render info if none of its inputs changed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            render_info, snapshot = entry
+            if _same_states(snapshot, _render_info_states(self.hass, render_info)):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._template_counters(key[0])[0] += 1  # type: ignore[index]
+                return render_info
+            del self._entries[key]
+
+        self.misses += 1
+        self._template_counters(key[0])[1] += 1  # type: ignore[index]
+        return None
+
+    @callback
+    def async_set(self, key: Hashable, render_info: RenderInfo) -> None:
+        """Store a frozen render info unless its result is not reproducible.
+
+        Renders reading all states are not stored, any state change
+        would invalidate them.
+        """
+        if (
+            render_info.exception
+            or render_info.has_time
+            or render_info.is_volatile
+            or render_info.all_states
+            or render_info.all_states_lifecycle
+        ):
+            return
+        self._entries[key] = (render_info, _render_info_states(self.hass, render_info))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    @callback
+    def async_info(self) -> Dict[str, Any]:
+        """Return the cache counters, most used templates first."""
+        templates = sorted(
+            self._template_stats.items(),
+            key=lambda item: (item[1][0], item[1][1]),
+            reverse=True,
+        )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "templates": [
+                {"template": template, "hits": hits, "misses": misses}
+                for template, (hits, misses) in templates
+            ],
+        }
+
+
+@callback
+@bind_hass
+def async_render_cache_info(hass: HomeAssistantType) -> Dict[str, Any]:
+    """Return the render cache hit and miss counters."""
+    render_cache: Optional[RenderCache] = hass.data.get(_RENDER_CACHE)
+    if render_cache is None:
+        return {"hits": 0, "misses": 0, "size": 0, "templates": []}
+    return render_cache.async_info()
+
+
+class _RenderBudget:
+    """Track the sandbox operations and CPU time used by a render."""
+
+    __slots__ = ("operations", "operation_limit", "cpu_budget", "deadline", "exceeded")
+
+    def __init__(self, cpu_budget: float, operation_limit: int) -> None:
+        """Initialize the budget."""
+        self.operations = 0
+        self.operation_limit = operation_limit
+        self.cpu_budget = cpu_budget
+        self.deadline = time.thread_time() + cpu_budget
+        self.exceeded = False
+
+    @classmethod
+    def from_config(cls, config: Config) -> "_RenderBudget":
+        """Return a budget as configured, the defaults otherwise."""
+        cpu_budget = config.template_cpu_budget
+        operation_limit = config.template_operation_limit
+        return cls(
+            RENDER_CPU_BUDGET if cpu_budget is None else cpu_budget,
+            RENDER_OPERATION_LIMIT if operation_limit is None else operation_limit,
+        )
+
+    def charge(self) -> None:
+        """Charge an operation and raise if the budget is exhausted."""
+        self.operations += 1
+        if self.operations > self.operation_limit:
+            self.exceeded = True
+            raise TimeoutError(
+                f"Template exceeded the limit of {self.operation_limit} operations"
+            )
+        if (
+            not self.operations % _BUDGET_CHECK_INTERVAL
+            and time.thread_time() > self.deadline
+        ):
+            self.exceeded = True
+            raise TimeoutError(
+                f"Template exceeded the CPU budget of {self.cpu_budget}s"
+            )
+
+
+_render_budget: ContextVar[Optional[_RenderBudget]] = ContextVar(
+    "render_budget", default=None
+)
+
+
+class _TemplateStatistics:
+    """Render statistics of a single template."""
+
+    __slots__ = (
+        "histogram",
+        "renders",
+        "total_time",
+        "max_time",
+        "budget_exceeded",
+        "quarantined_until",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.histogram = [0] * (len(RENDER_TIME_BUCKETS) + 1)
+        self.renders = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.budget_exceeded = 0
+        self.quarantined_until: Optional[datetime] = None
+
+
+class RenderStatistics:
+    """Record render times of tracked templates and quarantine expensive ones."""
+
+    def __init__(self, size: int = RENDER_CACHE_SIZE):
+        """Initialize the render statistics."""
+        self.size = size
+        self._templates: "collections.OrderedDict[str, _TemplateStatistics]" = (
+            collections.OrderedDict()
+        )
+
+    @callback
+    def async_record(
+        self, template: str, duration: float, exceeded: bool
+    ) -> Optional[datetime]:
+        """Record a render and return until when it is quarantined if it is."""
+        stats = self._templates.get(template)
+        if stats is None:
+            stats = self._templates[template] = _TemplateStatistics()
+            if len(self._templates) > self.size:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(template)
+
+        stats.histogram[bisect_left(RENDER_TIME_BUCKETS, duration)] += 1
+        stats.renders += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+        if not exceeded:
+            return None
+
+        stats.budget_exceeded += 1
+        until = stats.quarantined_until = dt_util.utcnow() + RENDER_QUARANTINE
+        _LOGGER.warning(
+            "Template exceeded its render budget after %.3fs, rendering it is "
+            "suspended until %s: %s",
+            duration,
+            until,
+            template,
+        )
+        return until
+
+    @callback
+    def async_info(self) -> Dict[str, Any]:
+        """Return the statistics, most expensive templates first."""
+        templates = sorted(
+            self._templates.items(),
+            key=lambda item: item[1].total_time,
+            reverse=True,
+        )
+        now = dt_util.utcnow()
+        return {
+            "buckets": list(RENDER_TIME_BUCKETS),
+            "templates": [
+                {
+                    "template": template,
+                    "renders": stats.renders,
+                    "total_time": stats.total_time,
+                    "max_time": stats.max_time,
+                    "histogram": list(stats.histogram),
+                    "budget_exceeded": stats.budget_exceeded,
+                    "quarantined_until": stats.quarantined_until
+                    if stats.quarantined_until and stats.quarantined_until > now
+                    else None,
+                }
+                for template, stats in templates
+            ],
+        }
+
+
+@callback
+@bind_hass
+def async_render_statistics(hass: HomeAssistantType) -> Dict[str, Any]:
+    """Return the render time statistics of tracked templates."""
+    statistics: Optional[RenderStatistics] = hass.data.get(_RENDER_STATISTICS)
+    if statistics is None:
+        return {"buckets": list(RENDER_TIME_BUCKETS), "templates": []}
+    return statistics.async_info()
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -279,6 +602,8 @@ class Template:
         "is_static",
         "_compiled_code",
         "_compiled",
+        "_fast_render",
+        "_quarantined_until",
     )
 
     def __init__(self, template, hass=None):
@@ -291,6 +616,11 @@ class Template:
         self._compiled: Optional[Template] = None
         self.hass = hass
         self.is_static = not is_template_string(template)
+        self._fast_render: Optional[Callable[["TemplateEnvironment"], Any]] = (
+            None if self.is_static else _trivial_template_renderer(self.template)
+        )
+        # Each instance is quarantined on its own, trackers hold their own
+        self._quarantined_until: Optional[datetime] = None
 
     @property
     def _env(self) -> "TemplateEnvironment":
@@ -344,15 +674,18 @@ class Template:
                 return self.template
             return self._parse_result(self.template)
 
-        compiled = self._compiled or self._ensure_compiled()
-
         if variables is not None:
             kwargs.update(variables)
 
-        try:
-            render_result = compiled.render(kwargs)
-        except Exception as err:  # pylint: disable=broad-except
-            raise TemplateError(err) from err
+        if self._fast_render is not None and _TRIVIAL_GLOBALS.isdisjoint(kwargs):
+            render_result = str(self._fast_render(self._env))
+        else:
+            compiled = self._compiled or self._ensure_compiled()
+
+            try:
+                render_result = compiled.render(kwargs)
+            except Exception as err:  # pylint: disable=broad-except
+                raise TemplateError(err) from err
 
         render_result = render_result.strip()
 
@@ -457,15 +790,58 @@ class Template:
             render_info._freeze_static()
             return render_info
 
+        statistics: Optional[RenderStatistics] = self.hass.data.get(_RENDER_STATISTICS)
+        if statistics is None:
+            statistics = self.hass.data[_RENDER_STATISTICS] = RenderStatistics()
+
+        quarantined_until = self._quarantined_until
+        if quarantined_until is not None:
+            if dt_util.utcnow() < quarantined_until:
+                render_info.exception = TemplateError(
+                    TimeoutError(
+                        f"Template exceeded its render budget, rendering is "
+                        f"suspended until {quarantined_until}"
+                    )
+                )
+                render_info.rate_limit = RENDER_QUARANTINE
+                render_info._freeze()
+                return render_info
+            self._quarantined_until = None
+
+        render_cache: Optional[RenderCache] = self.hass.data.get(_RENDER_CACHE)
+        if render_cache is None:
+            render_cache = self.hass.data[_RENDER_CACHE] = RenderCache(self.hass)
+
+        cache_key = _render_cache_key(self.template, {**kwargs, **(variables or {})})
+        if cache_key is not None:
+            cached = render_cache.async_get(cache_key)
+            if cached is not None:
+                render_info = copy(cached)
+                render_info.template = self
+                return render_info
+
+        budget = _RenderBudget.from_config(self.hass.config)
+        budget_token = _render_budget.set(budget)
         self.hass.data[_RENDER_INFO] = render_info
+        start = time.perf_counter()
         try:
             render_info._result = self.async_render(variables, **kwargs)
         except TemplateError as ex:
             render_info.exception = ex
         finally:
+            duration = time.perf_counter() - start
             del self.hass.data[_RENDER_INFO]
+            _render_budget.reset(budget_token)
+
+        self._quarantined_until = statistics.async_record(
+            self.template, duration, budget.exceeded
+        )
+        if self._quarantined_until is not None:
+            render_info.rate_limit = RENDER_QUARANTINE
 
         render_info._freeze()
+        if cache_key is not None:
+            render_cache.async_set(cache_key, render_info)
         return render_info
 
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
@@ -527,10 +903,14 @@ class Template:
 
         env = self._env
 
-        self._compiled = cast(
-            Template,
-            jinja2.Template.from_code(env, self._compiled_code, env.globals, None),
-        )
+        # Share the bound template between instances with the same source
+        compiled = env.compiled_cache.get(self.template)
+        if compiled is None:
+            compiled = env.compiled_cache[self.template] = jinja2.Template.from_code(
+                env, self._compiled_code, env.globals, None
+            )
+
+        self._compiled = cast(Template, compiled)
 
         return self._compiled
 
@@ -997,6 +1377,46 @@ def state_attr(hass, entity_id, name):
     return None
 
 
+_TRIVIAL_GLOBALS = frozenset(("states", "is_state", "state_attr"))
+
+
+def _trivial_template_renderer(
+    template: str,
+) -> Optional[Callable[["TemplateEnvironment"], Any]]:
+    """Return a renderer bypassing jinja if the template is trivial.
+
+    The renderer mirrors AllStates.__call__, is_state and state_attr,
+    including the entity collected for the render info.
+    """
+    match = _RE_TRIVIAL_TEMPLATE.match(template)
+    if match is None:
+        return None
+
+    func, entity_id, entity_id_dq, arg, arg_dq, filter_name = match.groups()
+    if entity_id is None:
+        entity_id = entity_id_dq
+    if arg is None:
+        arg = arg_dq
+    if (func == "states") != (arg is None):
+        return None
+
+    def render(env: "TemplateEnvironment") -> Any:
+        hass = env.hass
+        state = hass.states.get(entity_id)
+        _collect_state(hass, entity_id if state is None else state.entity_id)
+        if func == "states":
+            value = STATE_UNKNOWN if state is None else state.state
+        elif func == "is_state":
+            value = state is not None and state.state == arg
+        else:
+            value = None if state is None else state.attributes.get(arg)
+        if filter_name is not None:
+            value = env.filters[filter_name](value)
+        return value
+
+    return render
+
+
 def now(hass):
     """Record fetching now."""
     render_info = hass.data.get(_RENDER_INFO)
@@ -1300,6 +1720,7 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         super().__init__()
         self.hass = hass
         self.template_cache = weakref.WeakValueDictionary()
+        self.compiled_cache = weakref.WeakValueDictionary()
         self.filters["round"] = forgiving_round
         self.filters["multiply"] = multiply
         self.filters["log"] = logarithm
@@ -1367,17 +1788,63 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
 
             return contextfunction(wrapper)
 
+        # Results of these functions differ between renders with the
+        # same inputs, or depend on the configuration like the home
+        # location and the time zone, so the render must not be memoized.
+        def volatilefunction(func):
+            """Wrap function that mark the render as not reproducible."""
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                render_info = hass.data.get(_RENDER_INFO)
+                if render_info is not None:
+                    render_info.is_volatile = True
+                return func(*args, **kwargs)
+
+            return wrapper
+
         self.globals["expand"] = hassfunction(expand)
         self.filters["expand"] = contextfilter(self.globals["expand"])
-        self.globals["closest"] = hassfunction(closest)
-        self.filters["closest"] = contextfilter(hassfunction(closest_filter))
-        self.globals["distance"] = hassfunction(distance)
+        self.globals["closest"] = hassfunction(volatilefunction(closest))
+        self.filters["closest"] = contextfilter(
+            hassfunction(volatilefunction(closest_filter))
+        )
+        self.globals["distance"] = hassfunction(volatilefunction(distance))
         self.globals["is_state"] = hassfunction(is_state)
         self.globals["is_state_attr"] = hassfunction(is_state_attr)
         self.globals["state_attr"] = hassfunction(state_attr)
         self.globals["states"] = AllStates(hass)
         self.globals["utcnow"] = hassfunction(utcnow)
         self.globals["now"] = hassfunction(now)
+        self.globals["relative_time"] = volatilefunction(relative_time)
+        self.filters["random"] = volatilefunction(random_every_time)
+        for name in ("as_local", "as_timestamp"):
+            self.globals[name] = volatilefunction(self.globals[name])
+        for name in ("as_local", "as_timestamp", "timestamp_custom", "timestamp_local"):
+            self.filters[name] = volatilefunction(self.filters[name])
+
+    def getattr(self, obj, attribute):
+        """Get an attribute, charging the render budget."""
+        budget = _render_budget.get()
+        if budget is not None:
+            budget.charge()
+        return super().getattr(obj, attribute)
+
+    def getitem(self, obj, argument):
+        """Get an item, charging the render budget."""
+        budget = _render_budget.get()
+        if budget is not None:
+            budget.charge()
+        return super().getitem(obj, argument)
+
+    def call(
+        __self, __context, __obj, *args, **kwargs
+    ):  # pylint: disable=no-self-argument
+        """Call an object, charging the render budget."""
+        budget = _render_budget.get()
+        if budget is not None:
+            budget.charge()
+        return super().call(__context, __obj, *args, **kwargs)
 
     def is_safe_callable(self, obj):
         """Test if callback is safe."""
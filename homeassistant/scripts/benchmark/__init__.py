@@ -3,17 +3,25 @@ import argparse
 import asyncio
 import collections
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import logging
+import os
 from timeit import default_timer as timer
+import tracemalloc
 from typing import Callable, Dict, TypeVar
 
 from homeassistant import core
 from homeassistant.components.websocket_api.const import JSON_DUMP
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+    MATCH_ALL,
+)
 from homeassistant.helpers.entityfilter import convert_include_exclude_filter
 from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.template import Template
 from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
@@ -75,14 +83,63 @@ async def fire_events(hass):
 
     hass.bus.async_listen(event_name, listener)
 
+    start = timer()
+
     for _ in range(10 ** 6):
         hass.bus.async_fire(event_name)
 
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def fire_events_10_listeners(hass):
+    """Fire 100k events to 10 listeners."""
+    return await _fire_events_to_listeners(hass, 10)
+
+
+@benchmark
+async def fire_events_100_listeners(hass):
+    """Fire 100k events to 100 listeners."""
+    return await _fire_events_to_listeners(hass, 100)
+
+
+@benchmark
+async def fire_events_1000_listeners(hass):
+    """Fire 100k events to 1000 listeners."""
+    return await _fire_events_to_listeners(hass, 1000)
+
+
+async def _fire_events_to_listeners(hass, listener_count):
+    """Fire 100k events to a number of listeners and report events/sec."""
+    event_count = 10 ** 5
+    count = 0
+    event_name = "benchmark_event"
+    event = asyncio.Event()
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == event_count * listener_count:
+            event.set()
+
+    for _ in range(listener_count):
+        hass.bus.async_listen(event_name, listener)
+
     start = timer()
 
+    for _ in range(event_count):
+        hass.bus.async_fire(event_name)
+
     await event.wait()
 
-    return timer() - start
+    runtime = timer() - start
+    print(f"{listener_count} listeners: {event_count / runtime:.0f} events/sec")
+    return runtime
 
 
 @benchmark
@@ -185,6 +242,51 @@ async def state_changed_event_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def startup_set_states(hass):
+    """Write the initial states of 5000 entities one at a time."""
+    updates = _startup_state_updates(hass)
+
+    start = timer()
+
+    for entity_id, state, attributes, force_update, context in updates:
+        hass.states.async_set(entity_id, state, attributes, force_update, context)
+
+    await hass.async_block_till_done()
+
+    return timer() - start
+
+
+@benchmark
+async def startup_set_many_states(hass):
+    """Write the initial states of 5000 entities in one batch."""
+    updates = _startup_state_updates(hass)
+
+    start = timer()
+
+    hass.states.async_set_many(updates)
+
+    await hass.async_block_till_done()
+
+    return timer() - start
+
+
+def _startup_state_updates(hass):
+    """Listen for all events and return 5000 state updates to apply."""
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+
+    for _ in range(10):
+        hass.bus.async_listen(MATCH_ALL, listener)
+
+    return [
+        (f"sensor.power_{idx}", "on", {"friendly_name": f"Power {idx}"}, False, None)
+        for idx in range(5000)
+    ]
+
+
 @benchmark
 async def logbook_filtering_state(hass):
     """Filter state changes."""
@@ -310,6 +412,86 @@ async def valid_entity_id(hass):
     return timer() - start
 
 
+@benchmark
+async def render_trivial_templates(hass):
+    """Render trivial templates with the native fast path."""
+    return _render_trivial_templates(hass, True)
+
+
+@benchmark
+async def render_trivial_templates_jinja(hass):
+    """Render trivial templates through jinja."""
+    return _render_trivial_templates(hass, False)
+
+
+def _render_trivial_templates(hass, fast_path):
+    """Render trivial templates to info after every state change."""
+    count = 10 ** 5
+    templates = [
+        Template("{{ states('sensor.temperature') }}", hass),
+        Template("{{ is_state('light.kitchen', 'on') }}", hass),
+        Template("{{ state_attr('light.kitchen', 'brightness') | float }}", hass),
+    ]
+    if not fast_path:
+        for template in templates:
+            template._fast_render = None  # pylint: disable=protected-access
+
+    runtime = 0
+    for idx in range(count):
+        # Change the states so renders are not served from the render cache
+        hass.states.async_set("sensor.temperature", idx)
+        hass.states.async_set("light.kitchen", "on", {"brightness": idx})
+        start = timer()
+        for template in templates:
+            template.async_render_to_info()
+        runtime += timer() - start
+
+    print(f"{count * len(templates) / runtime:.0f} renders/s")
+    return runtime
+
+
+@benchmark
+async def state_triggers(hass):
+    """Change 100 entities watched by 800 state triggers 10k times."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.homeassistant.triggers import state
+
+    count = 0
+
+    @core.callback
+    def action(*args):
+        """Handle trigger."""
+        nonlocal count
+        count += 1
+
+    for idx in range(800):
+        config = state.TRIGGER_SCHEMA(
+            {
+                "platform": "state",
+                "entity_id": f"light.kitchen_{idx % 100}",
+                "to": "on" if idx // 100 % 2 else "off",
+            }
+        )
+        await state.async_attach_trigger(
+            hass, config, action, {"name": f"benchmark {idx}"}
+        )
+
+    for idx in range(100):
+        hass.states.async_set(f"light.kitchen_{idx}", "unknown")
+    await hass.async_block_till_done()
+
+    start = timer()
+    for idx in range(10 ** 4):
+        hass.states.async_set(
+            f"light.kitchen_{idx % 100}", "on" if idx % 200 < 100 else "off"
+        )
+    await hass.async_block_till_done()
+    runtime = timer() - start
+
+    print(f"{count} triggers fired")
+    return runtime
+
+
 @benchmark
 async def json_serialize_states(hass):
     """Serialize million states with websocket default encoder."""
@@ -323,6 +505,326 @@ async def json_serialize_states(hass):
     return timer() - start
 
 
+@benchmark
+async def json_serialize_cached_states(hass):
+    """Serialize 1000 states 1000 times, reusing the cached state JSON."""
+    states = [
+        core.State(f"light.kitchen_{idx}", "on", {"friendly_name": "Kitchen Lights"})
+        for idx in range(1000)
+    ]
+
+    start = timer()
+    for _ in range(1000):
+        f"[{', '.join(state.as_json() for state in states)}]"
+    return timer() - start
+
+
+@benchmark
+async def states_memory_10k(hass):
+    """Measure the memory used by 10k states and their events."""
+    return await _states_memory(hass, 10 ** 4)
+
+
+@benchmark
+async def states_memory_100k(hass):
+    """Measure the memory used by 100k states and their events."""
+    return await _states_memory(hass, 10 ** 5)
+
+
+async def _states_memory(hass, count):
+    """Write states, keep their events and report the memory used."""
+    events = []
+
+    @core.callback
+    def listener(event):
+        """Handle event."""
+        events.append(event)
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+
+    tracemalloc.start()
+    start = timer()
+
+    for idx in range(count):
+        hass.states.async_set(
+            f"sensor.power_{idx}", "on", {"friendly_name": f"Power {idx}"}
+        )
+
+    runtime = timer() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{count} states: {current / 2 ** 20:.1f} MiB")
+    return runtime
+
+
+@benchmark
+async def recorder_write_events(hass):
+    """Record 50k state changes and report the recorder throughput.
+
+    Uses an in memory SQLite database unless RECORDER_DB_URL is set,
+    for example to a local PostgreSQL or MariaDB database.
+    """
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import recorder
+
+    count = 5 * 10 ** 4
+    instance = await _async_start_recorder(hass)
+
+    start = timer()
+
+    for idx in range(count):
+        hass.states.async_set(
+            f"sensor.power_{idx % 1000}", idx, {"friendly_name": "Power"}
+        )
+    instance.queue.put(recorder.CommitTask())
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    runtime = timer() - start
+    print(f"{count / runtime:.0f} events/sec")
+    return runtime
+
+
+@benchmark
+async def history_stream(hass):
+    """Fetch 50k recorded states with and without streaming the response.
+
+    Reports the time to the first byte and the peak memory traced while
+    serving each response, the runtime is the one of the streamed response.
+    """
+    # pylint: disable=import-outside-toplevel
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    from sqlalchemy.ext import baked
+
+    from homeassistant.components import history, recorder
+
+    count = 5 * 10 ** 4
+    instance = await _async_start_recorder(hass)
+    hass.data[history.HISTORY_BAKERY] = baked.bakery()
+
+    start_time = dt_util.utcnow()
+    for idx in range(count):
+        hass.states.async_set(
+            f"sensor.power_{idx % 100}", idx, {"friendly_name": "Power"}
+        )
+    instance.queue.put(recorder.CommitTask())
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    view = history.HistoryPeriodView(None, False)
+    app = web.Application()
+    app["hass"] = hass
+    app.router.add_get("/{datetime}", view.get)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+
+    for name, params in (("buffered", {}), ("streamed", {"stream": ""})):
+        tracemalloc.start()
+        start = timer()
+        response = await client.get(f"/{start_time.isoformat()}", params=params)
+        size = len(await response.content.readany())
+        first_byte = timer() - start
+        async for data in response.content.iter_any():
+            size += len(data)
+        runtime = timer() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name}: first byte after {first_byte:.3f}s, "
+            f"{size / 2 ** 20:.1f} MiB in {runtime:.3f}s, "
+            f"peak memory {peak / 2 ** 20:.1f} MiB"
+        )
+
+    await client.close()
+    return runtime
+
+
+@benchmark
+async def websocket_broadcast(hass):
+    """Broadcast 2k state changes to 20 websocket clients.
+
+    Reports the bytes sent and the CPU time of the server and the clients
+    with permessage-deflate off, at the default and at a higher level.
+    The runtime is the one of the default compression.
+    """
+    # pylint: disable=import-outside-toplevel
+    from tempfile import TemporaryDirectory
+    import time
+
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from homeassistant.auth import auth_manager_from_config
+    from homeassistant.components import websocket_api
+    from homeassistant.components.websocket_api import commands, const, http
+
+    count = 2000
+    clients = 20
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        hass.auth = await auth_manager_from_config(hass, [], [])
+        user = await hass.auth.async_create_user("Benchmark", ["system-admin"])
+        refresh_token = await hass.auth.async_create_refresh_token(
+            user, "https://benchmark.local"
+        )
+        access_token = hass.auth.async_create_access_token(refresh_token)
+        hass.data[const.DATA_WRITER_METRICS] = metrics = http.WriterMetrics()
+        commands.async_register_commands(hass, websocket_api.async_register_command)
+
+        for level in (0, const.DEFAULT_COMPRESSION_LEVEL, 6):
+            view = http.WebsocketAPIView(level, const.DEFAULT_COMPRESSION_THRESHOLD)
+            app = web.Application()
+            app["hass"] = hass
+            app.router.add_get(const.URL, view.get)
+            client = TestClient(TestServer(app))
+            await client.start_server()
+
+            sockets = []
+            for _ in range(clients):
+                wsock = await client.ws_connect(const.URL, compress=15)
+                await wsock.receive_json()
+                await wsock.send_json({"type": "auth", "access_token": access_token})
+                await wsock.receive_json()
+                await wsock.send_json(
+                    {"id": 1, "type": "subscribe_events", "event_type": "state_changed"}
+                )
+                await wsock.receive_json()
+                sockets.append(wsock)
+
+            async def receive_all(wsock):
+                """Receive the state changed events."""
+                for _ in range(count):
+                    await wsock.receive_str()
+
+            sent_bytes = metrics.sent_bytes
+            cpu_start = time.process_time()
+            start = timer()
+            receivers = [asyncio.create_task(receive_all(ws)) for ws in sockets]
+            for idx in range(count):
+                hass.states.async_set(
+                    f"light.light_{idx % 200}",
+                    "on" if idx // 200 % 2 else "off",
+                    {
+                        "friendly_name": f"Light {idx % 200}",
+                        "supported_features": 63,
+                        "brightness": idx % 255,
+                        "color_mode": "hs",
+                        "hs_color": [30.0, 50.0],
+                        "min_mireds": 153,
+                        "max_mireds": 500,
+                    },
+                )
+                if idx % 100 == 0:
+                    await asyncio.sleep(0)
+            await asyncio.gather(*receivers)
+            elapsed = timer() - start
+            cpu = time.process_time() - cpu_start
+            sent = metrics.sent_bytes - sent_bytes
+            print(
+                f"level {level}: {sent / 2 ** 20:.2f} MiB sent, "
+                f"{sent / elapsed / 2 ** 20:.2f} MiB/sec, CPU {cpu:.3f}s"
+            )
+            if level == const.DEFAULT_COMPRESSION_LEVEL:
+                runtime = elapsed
+
+            for wsock in sockets:
+                await wsock.close()
+            await client.close()
+
+    return runtime
+
+
+@benchmark
+async def logbook_week(hass):
+    """Fetch a week of logbook with 500k recorded state changes.
+
+    Half of the state changes are caused by the state change before them,
+    the origin of their context is looked up for the logbook.
+    """
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import logbook, recorder
+
+    count = 5 * 10 ** 5
+    instance = await _async_start_recorder(hass)
+
+    end = dt_util.utcnow()
+    start_time = end - timedelta(days=7)
+    step = (end - start_time) / count
+    old_states = {}
+    context = None
+    for idx in range(count):
+        entity_id = f"switch.switch_{idx % 500}"
+        time_fired = start_time + step * idx
+        context = core.Context(parent_id=context.id if idx % 2 else None)
+        new_state = core.State(
+            entity_id,
+            "on" if idx // 500 % 2 else "off",
+            {"friendly_name": f"Switch {idx % 500}"},
+            last_updated=time_fired,
+            context=context,
+        )
+        instance.queue.put(
+            core.Event(
+                EVENT_STATE_CHANGED,
+                {
+                    "entity_id": entity_id,
+                    "old_state": old_states.get(entity_id),
+                    "new_state": new_state,
+                },
+                time_fired=time_fired,
+                context=context,
+            )
+        )
+        old_states[entity_id] = new_state
+        if idx % 10000 == 0:
+            # Do not queue all the events at once
+            await hass.async_add_executor_job(instance.block_till_done)
+    instance.queue.put(recorder.CommitTask())
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    start = timer()
+    entries = await hass.async_add_executor_job(
+        logbook._get_events,  # pylint: disable=protected-access
+        hass,
+        start_time,
+        end,
+    )
+    runtime = timer() - start
+    print(f"{len(entries)} logbook entries, {len(entries) / runtime:.0f} entries/sec")
+    return runtime
+
+
+async def _async_start_recorder(hass):
+    """Start a recorder that records all events.
+
+    Uses an in memory SQLite database unless RECORDER_DB_URL is set,
+    for example to a local PostgreSQL or MariaDB database.
+    """
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import recorder
+
+    instance = recorder.Recorder(
+        hass,
+        auto_purge=False,
+        keep_days=1,
+        purge_batch_size=1000,
+        commit_interval=1,
+        uri=os.environ.get("RECORDER_DB_URL", "sqlite://"),
+        db_max_retries=1,
+        db_retry_wait=1,
+        entity_filter=lambda entity_id: True,
+        exclude_t=[],
+        db_integrity_check=False,
+    )
+    hass.data[recorder.DATA_INSTANCE] = instance
+    hass.state = core.CoreState.running
+    instance.async_initialize()
+    instance.start()
+    await instance.async_db_ready
+    return instance
+
+
 def _create_state_changed_event_from_old_new(
     entity_id, event_time_fired, old_state, new_state
 ):
@@ -352,7 +854,9 @@ def _create_state_changed_event_from_old_new(
 
     row.event_type = EVENT_STATE_CHANGED
     row.event_data = "{}"
+    row.shared_data = None
     row.attributes = attributes_json
+    row.shared_attrs = None
     row.time_fired = event_time_fired
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
@@ -0,0 +1,86 @@
+"""Encode Home Assistant objects in JSON.
+
+Does not depend on the core so the core can serialize states with it.
+"""
+from datetime import datetime
+import json
+import math
+from typing import Any, Callable, TypeVar
+
+import orjson
+
+T = TypeVar("T")
+
+
+class JSONEncoder(json.JSONEncoder):
+    """JSONEncoder that supports Home Assistant objects."""
+
+    def default(self, o: Any) -> Any:
+        """Convert Home Assistant objects.
+
+        Hand other objects to the original method.
+        """
+        if isinstance(o, datetime):
+            return o.isoformat()
+        if isinstance(o, set):
+            return list(o)
+        if hasattr(o, "as_dict"):
+            return o.as_dict()
+
+        return json.JSONEncoder.default(self, o)
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Convert objects orjson does not handle natively."""
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+    raise TypeError
+
+
+def _check_finite(obj: Any) -> None:
+    """Raise ValueError if obj contains floats that are not JSON compliant."""
+    if isinstance(obj, float):
+        if not math.isfinite(obj):
+            raise ValueError("Out of range float values are not JSON compliant")
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _check_finite(value)
+    elif isinstance(obj, (list, tuple, set)):
+        for value in obj:
+            _check_finite(value)
+    elif hasattr(obj, "as_dict"):
+        _check_finite(obj.as_dict())
+
+
+def json_dumps(data: Any) -> str:
+    """Dump data to a strict JSON string.
+
+    orjson encodes NaN and infinity as null, so the data is checked for
+    them when the result contains a null. Data orjson cannot encode is
+    handed to the standard library encoder, which raises if it is not
+    serializable.
+    """
+    try:
+        dumped = orjson.dumps(
+            data, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+    except TypeError:
+        return json.dumps(data, cls=JSONEncoder, allow_nan=False)
+    if b"null" in dumped:
+        _check_finite(data)
+    return dumped.decode("utf-8")
+
+
+def json_dumps_with_fallback(dump: Callable[[], T], fallback: Callable[[], T]) -> T:
+    """Return the result of dump, or of fallback if the data is not serializable.
+
+    dump builds its result from cached JSON, which raises for data that
+    json_dumps rejects. The fallback serializes the data again with the error
+    handling of the caller.
+    """
+    try:
+        return dump()
+    except (ValueError, TypeError):
+        return fallback()
@@ -41,6 +41,7 @@ REQUIRES = [
     "ciso8601==2.1.3",
     "httpx==0.16.1",
     "jinja2>=2.11.2",
+    "orjson==3.5.1",
     "PyJWT==1.7.1",
     # PyJWT has loose dependency. We want the latest one.
     "cryptography==3.3.1",
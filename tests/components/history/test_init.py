@@ -4,10 +4,10 @@ from copy import copy
 from datetime import timedelta
 import json
 import unittest
-from unittest.mock import patch, sentinel
+from unittest.mock import Mock, patch, sentinel
 
 from homeassistant.components import history, recorder
-from homeassistant.components.recorder.models import process_timestamp
+from homeassistant.components.recorder.models import Statistics, process_timestamp
 import homeassistant.core as ha
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.setup import async_setup_component, setup_component
@@ -113,6 +113,46 @@ class TestComponentHistory(unittest.TestCase):
 
         assert history.get_state(self.hass, time_before_recorder_ran, "demo.id") is None
 
+    def test_get_states_from_checkpoint(self):
+        """Test getting states at a point in time after a state checkpoint."""
+        self.test_setup()
+        now = dt_util.utcnow()
+
+        with patch(
+            "homeassistant.components.recorder.dt_util.utcnow", return_value=now
+        ):
+            for entity_id in ("test.one", "test.two"):
+                mock_state_change_event(self.hass, ha.State(entity_id, "1"))
+            wait_recording_done(self.hass)
+
+        checkpoint_time = now + timedelta(seconds=1)
+        self.hass.data[recorder.DATA_INSTANCE].queue.put(
+            recorder.StateCheckpointTask(checkpoint_time)
+        )
+        wait_recording_done(self.hass)
+
+        with patch(
+            "homeassistant.components.recorder.dt_util.utcnow",
+            return_value=now + timedelta(seconds=2),
+        ):
+            mock_state_change_event(self.hass, ha.State("test.one", "2"))
+            wait_recording_done(self.hass)
+
+        def states_at(point_in_time):
+            return sorted(
+                (state.entity_id, state.state)
+                for state in history.get_states(self.hass, point_in_time)
+            )
+
+        assert states_at(now + timedelta(seconds=1.5)) == [
+            ("test.one", "1"),
+            ("test.two", "1"),
+        ]
+        assert states_at(now + timedelta(seconds=3)) == [
+            ("test.one", "2"),
+            ("test.two", "1"),
+        ]
+
     def test_state_changes_during_period(self):
         """Test state change during period."""
         self.test_setup()
@@ -769,6 +809,212 @@ async def test_fetch_period_api(hass, hass_client):
     assert response.status == 200
 
 
+async def test_fetch_period_api_with_resolution(hass, hass_client):
+    """Test the fetch period view serves statistics for a resolution."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=2
+    )
+
+    def _add_statistics():
+        with recorder.session_scope(hass=hass) as session:
+            for entity_id, mean in (("sensor.power", 10.0), ("sensor.other", 1.0)):
+                session.add(
+                    Statistics(
+                        entity_id=entity_id,
+                        start=start,
+                        mean=mean,
+                        min=mean,
+                        max=mean,
+                        last=mean,
+                        sum=0.0,
+                    )
+                )
+
+    await hass.async_add_executor_job(_add_statistics)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"resolution": "hour", "filter_entity_id": "sensor.power"},
+    )
+    assert response.status == 200
+    assert await response.json() == [
+        [
+            {
+                "entity_id": "sensor.power",
+                "start": start.isoformat(),
+                "mean": 10.0,
+                "min": 10.0,
+                "max": 10.0,
+                "last": 10.0,
+                "sum": 0.0,
+            }
+        ]
+    ]
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"resolution": "5minute"}
+    )
+    assert response.status == 200
+    assert await response.json() == []
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"resolution": "day"}
+    )
+    assert response.status == 400
+
+
+def test_downsample_states():
+    """Test numeric states are reduced to the extremes of each bucket."""
+    start = dt_util.utcnow()
+    values = ["5", "1", "9", "unavailable", "4", "7", "2", "6", "8", "0", "3", "4"]
+    db_states = [
+        ha.State("sensor.power", value, last_updated=start + timedelta(seconds=idx))
+        for idx, value in enumerate(values)
+    ]
+
+    downsampled = history._downsample_states(
+        iter(db_states), start, start + timedelta(seconds=12), 8
+    )
+
+    assert [state.state for state in downsampled] == [
+        "5",
+        "1",
+        "9",
+        "unavailable",
+        "4",
+        "7",
+        "2",
+        "8",
+        "0",
+        "4",
+    ]
+
+
+async def test_fetch_period_api_with_max_points(hass, hass_client):
+    """Test the fetch period view downsamples numeric states."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow() - timedelta(minutes=1)
+    for value in ["5", "1", "9", "3", "4", "7", "2", "6"]:
+        hass.states.async_set("sensor.power", value)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"filter_entity_id": "sensor.power", "max_points": "4"},
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert [state["state"] for state in response_json[0]] == ["5", "1", "9", "6"]
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"filter_entity_id": "sensor.power", "max_points": "2"},
+    )
+    assert response.status == 400
+
+
+def test_lazy_state_attributes_json():
+    """Test a lazy state returns the attributes JSON stored in the database."""
+    shared = Mock(entity_id="sensor.power", shared_attrs='{"a": 1}', attributes="{}")
+    legacy = Mock(entity_id="sensor.power", shared_attrs=None, attributes='{"a": 2}')
+
+    assert history.LazyState(shared).attributes_json() == '{"a": 1}'
+    assert history.LazyState(shared).attributes == {"a": 1}
+    assert history.LazyState(legacy).attributes_json() == '{"a": 2}'
+    assert history.LazyState(legacy).attributes == {"a": 2}
+
+
+async def test_fetch_period_api_with_compact_response(hass, hass_client):
+    """Test the fetch period view returns parallel arrays with compact_response."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    hass.states.async_set("sensor.power", "1", {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.power", "2", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.power", "3", {"unit_of_measurement": "kW"})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    last_updated = hass.states.get("sensor.power").last_updated
+
+    client = await hass_client()
+    for params in ({"compact_response": ""}, {"compact_response": "", "stream": ""}):
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}", params=params
+        )
+        assert response.status == 200
+        response_json = await response.json()
+        assert len(response_json) == 1
+        compact = response_json[0]
+        assert compact["entity_id"] == "sensor.power"
+        assert compact["state"] == ["1", "2", "3"]
+        assert compact["last_updated"][0] == start.timestamp()
+        assert compact["last_updated"][2] == last_updated.timestamp()
+        assert compact["attributes"] == [
+            [0, {"unit_of_measurement": "W"}],
+            [2, {"unit_of_measurement": "kW"}],
+        ]
+
+
+async def test_fetch_period_api_streamed(hass, hass_client):
+    """Test the fetch period view streams the history entity by entity."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    hass.states.async_set("sensor.power", "1")
+    hass.states.async_set("light.kitchen", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.power", "2")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"stream": ""}
+    )
+    assert response.status == 200
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    response_json = await response.json()
+    assert [[state["state"] for state in states] for states in response_json] == [
+        ["1", "2"],
+        ["on"],
+    ]
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"stream": "ndjson", "minimal_response": ""},
+    )
+    assert response.status == 200
+    assert response.content_type == "application/x-ndjson"
+    lines = (await response.text()).splitlines()
+    assert [[state["state"] for state in json.loads(line)] for line in lines] == [
+        ["1", "2"],
+        ["on"],
+    ]
+
+
 async def test_fetch_period_api_with_use_include_order(hass, hass_client):
     """Test the fetch period view for history with include order."""
     await hass.async_add_executor_job(init_recorder_component, hass)
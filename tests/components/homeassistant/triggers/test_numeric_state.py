@@ -572,6 +572,33 @@ async def test_if_not_fires_if_entity_not_match(hass, calls, below):
     assert len(calls) == 0
 
 
+async def test_attach_with_unhashable_attribute(hass, calls):
+    """Test a trigger with an unhashable attribute does not share its matcher."""
+    hass.states.async_set("test.entity", 11, {"test_attribute": 11})
+    await hass.async_block_till_done()
+
+    assert await async_setup_component(
+        hass,
+        automation.DOMAIN,
+        {
+            automation.DOMAIN: {
+                "trigger": {
+                    "platform": "numeric_state",
+                    "entity_id": "test.entity",
+                    "attribute": ["test_attribute"],
+                    "below": 10,
+                },
+                "action": {"service": "test.automation"},
+            }
+        },
+    )
+    assert hass.states.get("automation.automation_0").state == "on"
+
+    hass.states.async_set("test.entity", 9, {"test_attribute": 9})
+    await hass.async_block_till_done()
+    assert len(calls) == 0
+
+
 @pytest.mark.parametrize("below", (10, "input_number.value_10"))
 async def test_if_fires_on_entity_change_below_with_attribute(hass, calls, below):
     """Test attributes change."""
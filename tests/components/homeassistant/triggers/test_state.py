@@ -81,6 +81,53 @@ async def test_if_fires_on_entity_change(hass, calls):
     assert len(calls) == 1
 
 
+async def test_if_fires_on_entity_change_shared_trigger(hass, calls):
+    """Test automations with identical triggers share the state matching."""
+    assert await async_setup_component(
+        hass,
+        automation.DOMAIN,
+        {
+            automation.DOMAIN: [
+                {
+                    "alias": alias,
+                    "trigger": {
+                        "platform": "state",
+                        "entity_id": "test.entity",
+                        "from": ["hello", "planet"],
+                        "to": "world",
+                    },
+                    "action": {
+                        "service": "test.automation",
+                        "data": {"alias": alias},
+                    },
+                }
+                for alias in ("first", "second")
+            ]
+        },
+    )
+    await hass.async_block_till_done()
+
+    groups = hass.data["track_state_match_groups"]["test.entity"]
+    assert len(groups) == 1
+    assert len(next(iter(groups.values()))[1]) == 2
+
+    hass.states.async_set("test.entity", "world")
+    await hass.async_block_till_done()
+    assert sorted(call.data["alias"] for call in calls) == ["first", "second"]
+
+    await hass.services.async_call(
+        automation.DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: "automation.first"},
+        blocking=True,
+    )
+    hass.states.async_set("test.entity", "planet")
+    hass.states.async_set("test.entity", "world")
+    await hass.async_block_till_done()
+    assert len(calls) == 3
+    assert calls[2].data["alias"] == "second"
+
+
 async def test_if_fires_on_entity_change_with_from_filter(hass, calls):
     """Test for firing on entity change with filter."""
     assert await async_setup_component(
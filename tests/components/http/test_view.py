@@ -38,6 +38,19 @@ async def test_invalid_json(caplog):
     assert str(float("NaN")) in caplog.text
 
 
+async def test_invalid_json_stream(hass, caplog):
+    """Test trying to stream invalid JSON."""
+    view = HomeAssistantView()
+
+    def generate():
+        yield float("NaN")
+
+    with pytest.raises(HTTPInternalServerError):
+        await view.json_stream(Mock(app={"hass": hass}), generate)
+
+    assert "Unable to serialize to JSON" in caplog.text
+
+
 async def test_handling_unauthorized(mock_request):
     """Test handling unauth exceptions."""
     with pytest.raises(HTTPUnauthorized):
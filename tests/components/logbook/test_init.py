@@ -294,7 +294,9 @@ def create_state_changed_event_from_old_new(
 
     row.event_type = EVENT_STATE_CHANGED
     row.event_data = "{}"
+    row.shared_data = None
     row.attributes = attributes_json
+    row.shared_attrs = None
     row.time_fired = event_time_fired
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
@@ -317,6 +319,157 @@ async def test_logbook_view(hass, hass_client):
     assert response.status == 200
 
 
+async def test_logbook_view_streamed(hass, hass_client):
+    """Test the logbook view streams the entries."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("switch.test", STATE_OFF)
+    hass.states.async_set("switch.test", STATE_ON)
+    hass.states.async_set("switch.second", STATE_OFF)
+    hass.states.async_set("switch.second", STATE_ON)
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    start = dt_util.utcnow().date()
+    start_date = datetime(start.year, start.month, start.day)
+
+    response = await client.get(f"/api/logbook/{start_date.isoformat()}?stream")
+    assert response.status == 200
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    assert [
+        (entry["entity_id"], entry["state"]) for entry in await response.json()
+    ] == [
+        ("switch.test", STATE_ON),
+        ("switch.second", STATE_ON),
+    ]
+
+    response = await client.get(
+        f"/api/logbook/{start_date.isoformat()}?stream=ndjson&entity=switch.second"
+    )
+    assert response.status == 200
+    lines = (await response.text()).splitlines()
+    assert [json.loads(line)["entity_id"] for line in lines] == ["switch.second"]
+
+
+async def test_logbook_event_stream(hass, hass_ws_client):
+    """Test the logbook event stream sends recorded and then live entries."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("switch.test", STATE_OFF)
+    hass.states.async_set("switch.test", STATE_ON)
+    hass.states.async_set("switch.second", STATE_OFF)
+    hass.states.async_set("switch.second", STATE_ON)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    start_time = dt_util.utcnow() - timedelta(hours=1)
+    await client.send_json(
+        {
+            "id": 5,
+            "type": "logbook/event_stream",
+            "start_time": start_time.isoformat(),
+            "entity_ids": ["switch.test", "sensor.power"],
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    msg = await client.receive_json()
+    assert msg["event"]["partial"]
+    assert [
+        (entry["entity_id"], entry["state"]) for entry in msg["event"]["events"]
+    ] == [("switch.test", STATE_ON)]
+
+    msg = await client.receive_json()
+    assert msg["event"] == {"events": []}
+
+    context = ha.Context()
+    hass.states.async_set("sensor.power", 1, {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.power", 2, {"unit_of_measurement": "W"})
+    hass.states.async_set("switch.second", STATE_OFF)
+    hass.bus.async_fire(
+        EVENT_CALL_SERVICE,
+        {ATTR_DOMAIN: "switch", ATTR_SERVICE: "turn_off"},
+        context=context,
+    )
+    hass.states.async_set("switch.test", STATE_OFF, context=context)
+    await hass.async_block_till_done()
+
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    entries = msg["event"]["events"]
+    assert len(entries) == 1
+    assert entries[0]["entity_id"] == "switch.test"
+    assert entries[0]["state"] == STATE_OFF
+    assert entries[0]["context_domain"] == "switch"
+    assert entries[0]["context_service"] == "turn_off"
+
+    await client.send_json({"id": 6, "type": "unsubscribe_events", "subscription": 5})
+    msg = await client.receive_json()
+    assert msg["id"] == 6
+    assert msg["success"]
+
+
+async def test_logbook_event_stream_waits_for_client(hass, hass_ws_client):
+    """Test the logbook event stream waits for the client between chunks."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    for entity_id in ("switch.first", "switch.second"):
+        hass.states.async_set(entity_id, STATE_OFF)
+        hass.states.async_set(entity_id, STATE_ON)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    start_time = dt_util.utcnow() - timedelta(hours=1)
+    with patch.object(logbook, "EVENT_STREAM_CHUNK_SIZE", 1), patch(
+        "homeassistant.components.websocket_api.ActiveConnection.async_drain",
+        autospec=True,
+    ) as drain:
+        await client.send_json(
+            {
+                "id": 5,
+                "type": "logbook/event_stream",
+                "start_time": start_time.isoformat(),
+            }
+        )
+        msg = await client.receive_json()
+        assert msg["success"]
+
+        entity_ids = []
+        msg = await client.receive_json()
+        while msg["event"].get("partial"):
+            entity_ids.extend(entry["entity_id"] for entry in msg["event"]["events"])
+            msg = await client.receive_json()
+
+    assert entity_ids == ["switch.first", "switch.second"]
+    # Every chunk waits for the client before the next one is fetched
+    assert [call[1][1] for call in drain.mock_calls] == [
+        logbook.EVENT_STREAM_PENDING_MESSAGES
+    ] * 2
+
+
+async def test_logbook_event_stream_invalid_start_time(hass, hass_ws_client):
+    """Test the logbook event stream with an invalid start time."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {"id": 5, "type": "logbook/event_stream", "start_time": "invalid"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "invalid_start_time"
+
+
 async def test_logbook_view_period_entity(hass, hass_client):
     """Test the logbook view with period and entity."""
     await hass.async_add_executor_job(init_recorder_component, hass)
@@ -1129,6 +1282,42 @@ async def test_logbook_entity_context_parent_id(hass, hass_client):
     assert json_dict[8]["context_user_id"] == "485cacf93ef84d25a99ced3126b921d2"
 
 
+async def test_logbook_context_origin_filtered_away(hass, hass_client):
+    """Test the logbook view finds the origin of a context outside of the scan."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    context = ha.Context()
+    hass.states.async_set("switch.trigger", STATE_OFF)
+    hass.states.async_set(
+        "switch.trigger", STATE_ON, {ATTR_FRIENDLY_NAME: "Trigger"}, context=context
+    )
+    hass.states.async_set("light.kitchen", STATE_OFF)
+    await hass.async_block_till_done()
+    hass.states.async_set(
+        "light.kitchen", STATE_ON, context=ha.Context(parent_id=context.id)
+    )
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    start = dt_util.utcnow().date()
+    start_date = datetime(start.year, start.month, start.day)
+
+    response = await client.get(
+        f"/api/logbook/{start_date.isoformat()}?entity=light.kitchen"
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert len(response_json) == 1
+    assert response_json[0]["entity_id"] == "light.kitchen"
+    assert response_json[0]["context_entity_id"] == "switch.trigger"
+    assert response_json[0]["context_entity_id_name"] == "Trigger"
+    assert response_json[0]["context_event_type"] == "state_changed"
+
+
 async def test_logbook_context_from_template(hass, hass_client):
     """Test the logbook view with end_time and entity with automations and scripts."""
     await hass.async_add_executor_job(init_recorder_component, hass)
@@ -1,11 +1,6 @@
 """Common test utils for working with recorder."""
 
-from datetime import timedelta
-
 from homeassistant.components import recorder
-from homeassistant.util import dt as dt_util
-
-from tests.common import fire_time_changed
 
 
 def wait_recording_done(hass):
@@ -18,6 +13,7 @@ def wait_recording_done(hass):
 
 def trigger_db_commit(hass):
     """Force the recorder to commit."""
-    for _ in range(recorder.DEFAULT_COMMIT_INTERVAL):
-        # We only commit on time change
-        fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    # Go through the event loop so the commit is queued after pending events
+    hass.loop.call_soon_threadsafe(
+        hass.data[recorder.DATA_INSTANCE].queue.put, recorder.CommitTask()
+    )
@@ -3,27 +3,45 @@
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, OperationalError
 
 from homeassistant.components.recorder import (
     CONFIG_SCHEMA,
     DOMAIN,
     Recorder,
+    StateCheckpointTask,
     run_information,
     run_information_from_instance,
     run_information_with_session,
 )
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Events,
+    EventTypes,
+    RecorderRuns,
+    StateAttributes,
+    StateCheckpoints,
+    States,
+)
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.const import MATCH_ALL, STATE_LOCKED, STATE_UNLOCKED
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_STOP,
+    MATCH_ALL,
+    STATE_LOCKED,
+    STATE_UNLOCKED,
+)
 from homeassistant.core import Context, callback
 from homeassistant.setup import async_setup_component
 from homeassistant.util import dt as dt_util
 
 from .common import wait_recording_done
 
-from tests.common import fire_time_changed, get_test_home_assistant
+from tests.common import (
+    async_init_recorder_component,
+    fire_time_changed,
+    get_test_home_assistant,
+)
 
 
 def test_saving_state(hass, hass_recorder):
@@ -55,17 +73,17 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
     state = "restoring_from_db"
     attributes = {"test_attr": 5, "test_attr_10": "nice"}
 
-    def _throw_if_state_in_session(*args, **kwargs):
-        for obj in hass.data[DATA_INSTANCE].event_session:
-            if isinstance(obj, States):
-                raise OperationalError(
-                    "insert the state", "fake params", "forced to fail"
-                )
+    def _throw_if_state_in_batch(*args, **kwargs):
+        if any(
+            pending.state_row is not None
+            for pending in hass.data[DATA_INSTANCE]._pending_rows
+        ):
+            raise OperationalError("insert the state", "fake params", "forced to fail")
 
     with patch("time.sleep"), patch.object(
-        hass.data[DATA_INSTANCE].event_session,
-        "flush",
-        side_effect=_throw_if_state_in_session,
+        hass.data[DATA_INSTANCE],
+        "_insert_pending_rows",
+        side_effect=_throw_if_state_in_batch,
     ):
         hass.states.set(entity_id, "fail", attributes)
         wait_recording_done(hass)
@@ -85,6 +103,68 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
     assert "Error saving events" not in caplog.text
 
 
+def test_saving_event_after_another_writer(hass, hass_recorder):
+    """Test the keys of a batch follow rows inserted by another writer."""
+    hass = hass_recorder()
+
+    hass.bus.fire("EVENT_TEST_BEFORE")
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        next_event_id = session.query(func.max(Events.event_id)).scalar() + 1
+        session.add(
+            Events(
+                event_id=next_event_id,
+                origin="LOCAL",
+                time_fired=dt_util.utcnow(),
+            )
+        )
+
+    hass.bus.fire("EVENT_TEST_AFTER")
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        event = (
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == "EVENT_TEST_AFTER")
+            .one()
+        )
+        assert event.event_id > next_event_id
+
+
+def test_saving_event_retries_integrity_error(hass, hass_recorder, caplog):
+    """Test a batch is inserted again with new keys after an integrity error."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    insert_pending_rows = instance._insert_pending_rows
+    calls = []
+
+    def _fail_first_insert():
+        calls.append(None)
+        if len(calls) == 1:
+            raise IntegrityError("insert the event", "fake params", "forced to fail")
+        return insert_pending_rows()
+
+    with patch.object(instance, "_insert_pending_rows", side_effect=_fail_first_insert):
+        hass.bus.fire("EVENT_TEST", {"test_attr": 5})
+        wait_recording_done(hass)
+
+    assert len(calls) >= 2
+    assert "retrying with new keys" in caplog.text
+    assert "Error saving events" not in caplog.text
+
+    with session_scope(hass=hass) as session:
+        events = (
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == "EVENT_TEST")
+            .all()
+        )
+        assert len(events) == 1
+        assert events[0].to_native().data == {"test_attr": 5}
+
+
 def test_saving_event(hass, hass_recorder):
     """Test saving and restoring an event."""
     hass = hass_recorder()
@@ -112,7 +192,11 @@ def test_saving_event(hass, hass_recorder):
     hass.data[DATA_INSTANCE].block_till_done()
 
     with session_scope(hass=hass) as session:
-        db_events = list(session.query(Events).filter_by(event_type=event_type))
+        db_events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == event_type)
+        )
         assert len(db_events) == 1
         db_event = db_events[0].to_native()
 
@@ -318,6 +402,7 @@ def test_recorder_setup_failure():
             hass,
             auto_purge=True,
             keep_days=7,
+            purge_batch_size=1000,
             commit_interval=1,
             uri="sqlite://",
             db_max_retries=10,
@@ -406,6 +491,57 @@ def test_auto_purge(hass_recorder):
     dt_util.set_default_time_zone(original_tz)
 
 
+def test_commit_and_keep_alive_timers(hass_recorder):
+    """Test the recorder commits and keeps alive on its own timers."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    with patch.object(
+        instance, "_commit_event_session_or_retry"
+    ) as commit, patch.object(instance, "_send_keep_alive") as keep_alive:
+        # Commit the events of the startup
+        run_tasks_at_time(hass, dt_util.utcnow() + timedelta(seconds=1))
+        commit.reset_mock()
+
+        # Nothing to commit, the recorder is not woken up
+        run_tasks_at_time(hass, dt_util.utcnow() + timedelta(seconds=1))
+        assert len(commit.mock_calls) == 0
+
+        hass.states.set("test.recorder", "on")
+        run_tasks_at_time(hass, dt_util.utcnow() + timedelta(seconds=1))
+        assert len(commit.mock_calls) == 1
+        assert len(keep_alive.mock_calls) == 0
+
+        run_tasks_at_time(hass, dt_util.utcnow() + timedelta(seconds=30))
+        assert len(keep_alive.mock_calls) == 1
+
+    assert instance._keep_alive_listener is not None
+    assert instance._commit_listener is not None
+
+    # The timers are cancelled on shutdown
+    hass.bus.fire(EVENT_HOMEASSISTANT_STOP)
+    hass.block_till_done()
+    assert instance._keep_alive_listener is None
+    assert instance._commit_listener is None
+
+
+async def test_async_commit(hass):
+    """Test the recorder commits the queued events on request."""
+    await async_init_recorder_component(hass, {"commit_interval": 30})
+    await hass.async_block_till_done()
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.async_set("test.recorder", "on")
+    await hass.async_block_till_done()
+    await instance.async_commit()
+
+    def _count_states():
+        with session_scope(hass=hass) as session:
+            return session.query(States).filter_by(entity_id="test.recorder").count()
+
+    assert await hass.async_add_executor_job(_count_states) == 1
+
+
 def test_saving_sets_old_state(hass_recorder):
     """Test saving sets old state."""
     hass = hass_recorder()
@@ -432,6 +568,140 @@ def test_saving_sets_old_state(hass_recorder):
         assert states[3].old_state_id == states[1].state_id
 
 
+def test_saving_sets_old_state_within_batch(hass_recorder):
+    """Test saving sets old state for states committed together."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {})
+    hass.states.set("test.one", "off", {})
+    hass.states.remove("test.one")
+    hass.states.set("test.one", "on", {})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(
+            session.query(States).filter_by(entity_id="test.one").order_by("state_id")
+        )
+        assert [state.state for state in states] == ["on", "off", None, "on"]
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert states[2].old_state_id == states[1].state_id
+        assert states[3].old_state_id is None
+        for state in states:
+            assert state.event_id is not None
+            event = session.query(Events).get(state.event_id)
+            assert event.shared_event_type == "state_changed"
+
+
+def test_saving_shares_state_attributes(hass_recorder):
+    """Test states with identical attributes share one attributes row."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {"color": "red"})
+    hass.states.set("test.two", "on", {"color": "red"})
+    hass.states.set("test.one", "off", {"color": "blue"})
+    wait_recording_done(hass)
+    hass.states.set("test.two", "off", {"color": "blue"})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States).order_by("state_id"))
+        assert len(states) == 4
+        assert all(state.attributes is None for state in states)
+        assert states[0].attributes_id == states[1].attributes_id
+        assert states[2].attributes_id == states[3].attributes_id
+        assert states[0].attributes_id != states[2].attributes_id
+        assert session.query(StateAttributes).count() == 2
+        assert states[3].to_native().attributes == {"color": "blue"}
+
+    assert len(hass.data[DATA_INSTANCE]._attributes_ids) == 2
+
+
+def test_saving_state_checkpoint(hass_recorder):
+    """Test a checkpoint stores the last recorded state of each entity."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.set("test.one", "on")
+    hass.states.set("test.two", "on")
+    hass.states.set("test.three", "on")
+    hass.states.set("test.one", "off")
+    hass.states.remove("test.three")
+    checkpoint_time = dt_util.utcnow()
+    instance.queue.put(StateCheckpointTask(checkpoint_time))
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        checkpoints = (
+            session.query(States.entity_id, States.state)
+            .join(StateCheckpoints, States.state_id == StateCheckpoints.state_id)
+            .filter(StateCheckpoints.checkpoint_time == checkpoint_time)
+            .order_by(States.entity_id)
+        )
+        assert list(checkpoints) == [("test.one", "off"), ("test.two", "on")]
+
+
+def test_saving_event_context_origin(hass_recorder):
+    """Test events are linked to the first event of their (parent) context."""
+    hass = hass_recorder()
+
+    context = Context()
+    hass.bus.fire("test_first", context=context)
+    hass.bus.fire("test_same_context", context=context)
+    wait_recording_done(hass)
+    hass.bus.fire("test_child_context", context=Context(parent_id=context.id))
+    hass.bus.fire("test_other_context", context=Context())
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        events = {
+            event.shared_event_type: event
+            for event in session.query(Events).filter(Events.event_type_id.isnot(None))
+        }
+        first_event_id = events["test_first"].event_id
+        assert events["test_first"].origin_event_id is None
+        assert events["test_same_context"].origin_event_id == first_event_id
+        assert events["test_child_context"].origin_event_id == first_event_id
+        assert events["test_other_context"].origin_event_id is None
+
+
+def test_saving_shares_event_data_and_types(hass_recorder):
+    """Test events share their interned type and identical data."""
+    hass = hass_recorder()
+
+    hass.bus.fire("test_event", {"value": 1})
+    hass.bus.fire("test_event", {"value": 1})
+    wait_recording_done(hass)
+    hass.bus.fire("test_event", {"value": 2})
+    hass.bus.fire("other_event", {"value": 1})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type.in_(["test_event", "other_event"]))
+            .order_by(Events.event_id)
+        )
+        assert len(events) == 4
+        assert [event.event_type for event in events] == [
+            "test_event",
+            "test_event",
+            "test_event",
+            "other_event",
+        ]
+        assert all(event.event_data is None for event in events)
+        assert events[0].event_type_id == events[1].event_type_id
+        assert events[0].event_type_id == events[2].event_type_id
+        assert events[0].event_type_id != events[3].event_type_id
+        assert events[0].data_id == events[1].data_id == events[3].data_id
+        assert events[0].data_id != events[2].data_id
+        assert session.query(EventTypes).filter_by(event_type="test_event").count() == 1
+        native = events[3].to_native()
+        assert native.event_type == "other_event"
+        assert native.data == {"value": 1}
+
+
 def test_saving_state_with_serializable_data(hass_recorder, caplog):
     """Test saving data that cannot be serialized does not crash."""
     hass = hass_recorder()
@@ -1,11 +1,22 @@
 """Test data purging."""
 from datetime import datetime, timedelta
 import json
-from unittest.mock import patch
+from unittest.mock import call, patch
+
+from sqlalchemy.exc import SQLAlchemyError
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    EventData,
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    StateCheckpoints,
+    States,
+    Statistics,
+    StatisticsShortTerm,
+)
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.util import dt as dt_util
@@ -16,6 +27,7 @@ from .common import wait_recording_done
 def test_purge_old_states(hass, hass_recorder):
     """Test deleting old states."""
     hass = hass_recorder()
+    hass.data[DATA_INSTANCE].purge_batch_size = 2
     _add_test_states(hass)
 
     # make sure we start with 6 states
@@ -37,9 +49,72 @@ def test_purge_old_states(hass, hass_recorder):
         assert states.count() == 2
 
 
+def test_purge_old_states_clears_old_state_id(hass, hass_recorder):
+    """Test purging states removes references to them and reports progress."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance.purge_batch_size = 2
+    _add_test_states(hass)
+
+    with session_scope(hass=hass) as session:
+        states = session.query(States).order_by(States.state_id).all()
+        for old_state, state in zip(states, states[1:]):
+            state.old_state_id = old_state.state_id
+        for state in states:
+            session.add(
+                StateCheckpoints(
+                    checkpoint_time=state.last_updated, state_id=state.state_id
+                )
+            )
+
+    with session_scope(hass=hass) as session:
+        finished = purge_old_data(instance, 4, repack=False)
+        assert not finished
+        assert instance.purge_metrics.deleted_rows == 2
+        assert instance.purge_metrics.remaining_rows == 2
+        assert instance.purge_metrics.progress == 0.5
+        assert not instance.purge_metrics.finished
+
+        while not purge_old_data(instance, 4, repack=False):
+            pass
+
+        states = session.query(States).order_by(States.state_id).all()
+        assert [state.state for state in states] == ["dontpurgeme", "dontpurgeme"]
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert [
+            checkpoint.state_id for checkpoint in session.query(StateCheckpoints)
+        ] == [state.state_id for state in states]
+        assert instance.purge_metrics.deleted_rows == 4
+        assert instance.purge_metrics.remaining_rows == 0
+        assert instance.purge_metrics.finished
+
+
+def test_purge_error_finishes_metrics(hass, hass_recorder):
+    """Test a purge failing with a database error is no longer reported running."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    _add_test_states(hass)
+
+    with patch(
+        "homeassistant.components.recorder.purge._select_state_ids_to_purge",
+        side_effect=SQLAlchemyError("failed"),
+    ):
+        assert purge_old_data(instance, 4, repack=False)
+    metrics = instance.purge_metrics
+    assert metrics.remaining_rows == 4
+    assert metrics.finished
+
+    # The next purge starts over
+    assert not purge_old_data(instance, 4, repack=False)
+    assert instance.purge_metrics is not metrics
+    assert not instance.purge_metrics.finished
+
+
 def test_purge_old_events(hass, hass_recorder):
     """Test deleting old events."""
     hass = hass_recorder()
+    hass.data[DATA_INSTANCE].purge_batch_size = 2
     _add_test_events(hass)
 
     with session_scope(hass=hass) as session:
@@ -61,6 +136,87 @@ def test_purge_old_events(hass, hass_recorder):
         assert events.count() == 2
 
 
+def test_purge_unused_attributes_and_event_data(hass, hass_recorder):
+    """Test attributes and event data are purged with the last row using them."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance.purge_batch_size = 2
+    _add_test_states(hass)
+    _add_test_events(hass)
+
+    with session_scope(hass=hass) as session:
+        shared_ids = {}
+        for model, column, id_column in (
+            (StateAttributes, "shared_attrs", "attributes_id"),
+            (EventData, "shared_data", "data_id"),
+        ):
+            for shared in ("kept", "purged", "unused"):
+                row = model(hash=model.hash_shared(shared), **{column: shared})
+                session.add(row)
+                session.flush()
+                shared_ids[(model, shared)] = getattr(row, id_column)
+
+        for state in session.query(States):
+            shared = (
+                "kept" if state.state in ("autopurgeme", "dontpurgeme") else "purged"
+            )
+            state.attributes_id = shared_ids[(StateAttributes, shared)]
+        for event in session.query(Events).filter(
+            Events.event_type.like("EVENT_TEST%")
+        ):
+            shared = "kept" if event.event_type != "EVENT_TEST_PURGE" else "purged"
+            event.data_id = shared_ids[(EventData, shared)]
+
+    while not purge_old_data(instance, 4, repack=False):
+        pass
+
+    with session_scope(hass=hass) as session:
+        # Rows that were already unused are not looked at
+        assert {row.shared_attrs for row in session.query(StateAttributes)} >= {
+            "kept",
+            "unused",
+        }
+        assert "purged" not in {
+            row.shared_attrs for row in session.query(StateAttributes)
+        }
+        assert {row.shared_data for row in session.query(EventData)} >= {
+            "kept",
+            "unused",
+        }
+        assert "purged" not in {row.shared_data for row in session.query(EventData)}
+
+
+def test_purge_old_short_term_statistics(hass, hass_recorder):
+    """Test deleting old short term statistics keeps the hourly statistics."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance.purge_batch_size = 2
+    now = dt_util.utcnow()
+
+    with session_scope(hass=hass) as session:
+        for days in (11, 11, 11, 1):
+            for model in (StatisticsShortTerm, Statistics):
+                session.add(
+                    model(
+                        entity_id="sensor.power",
+                        start=now - timedelta(days=days),
+                        mean=1.0,
+                        seconds=300.0,
+                    )
+                )
+
+    with session_scope(hass=hass) as session:
+        short_term = session.query(StatisticsShortTerm)
+        assert not purge_old_data(instance, 4, repack=False)
+        assert short_term.count() == 2
+        assert instance.purge_metrics.deleted_rows == 2
+
+        while not purge_old_data(instance, 4, repack=False):
+            pass
+        assert short_term.count() == 1
+        assert session.query(Statistics).count() == 4
+
+
 def test_purge_old_recorder_runs(hass, hass_recorder):
     """Test deleting old recorder runs keeps current run."""
     hass = hass_recorder()
@@ -71,9 +227,10 @@ def test_purge_old_recorder_runs(hass, hass_recorder):
         recorder_runs = session.query(RecorderRuns)
         assert recorder_runs.count() == 7
 
-        # run purge_old_data()
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 0, repack=False)
-        assert finished
+        # run purge_old_data(), which first purges the events of the recorder
+        assert any(
+            purge_old_data(hass.data[DATA_INSTANCE], 0, repack=False) for _ in range(3)
+        )
         assert recorder_runs.count() == 1
 
 
@@ -138,8 +295,7 @@ def test_purge_method(hass, hass_recorder):
             hass.data[DATA_INSTANCE].block_till_done()
             wait_recording_done(hass)
             assert (
-                mock_logger.debug.mock_calls[5][1][0]
-                == "Vacuuming SQL DB to free space"
+                call("Vacuuming SQL DB to free space") in mock_logger.debug.mock_calls
             )
 
 
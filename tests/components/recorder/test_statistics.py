@@ -0,0 +1,143 @@
+"""The tests for the recorder statistics."""
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.statistics import (
+    StatisticsCollector,
+    compile_statistics,
+    period_start,
+    statistics_during_period,
+)
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import State
+import homeassistant.util.dt as dt_util
+
+from .common import wait_recording_done
+
+POWER_ATTRIBUTES = {ATTR_UNIT_OF_MEASUREMENT: "W"}
+
+
+def _power(value):
+    """Return a state of the power sensor."""
+    return State("sensor.power", value, POWER_ATTRIBUTES)
+
+
+def test_collector_time_weighted_statistics():
+    """Test the statistics are weighted by how long values were held."""
+    collector = StatisticsCollector()
+    start = datetime(2021, 3, 1, 12, 0, tzinfo=dt_util.UTC)
+
+    collector.add_state("sensor.power", _power("10"), start)
+    collector.add_state("sensor.power", _power("20"), start + timedelta(minutes=1))
+    collector.add_state("sensor.power", _power("5"), start + timedelta(minutes=4))
+    collector.add_state(
+        "sensor.text", State("sensor.text", "abc", POWER_ATTRIBUTES), start
+    )
+    collector.add_state("light.kitchen", State("light.kitchen", "on"), start)
+
+    assert collector.compile(start) == [
+        {
+            "entity_id": "sensor.power",
+            "start": start,
+            "mean": 15.0,
+            "min": 5.0,
+            "max": 20.0,
+            "last": 5.0,
+            "sum": 10.0,
+            "seconds": 300.0,
+        }
+    ]
+
+    # Unchanged values are carried over to the next period
+    next_start = start + timedelta(minutes=5)
+    collector.add_state("sensor.power", None, next_start + timedelta(minutes=1))
+    assert collector.compile(next_start) == [
+        {
+            "entity_id": "sensor.power",
+            "start": next_start,
+            "mean": 5.0,
+            "min": 5.0,
+            "max": 5.0,
+            "last": None,
+            "sum": 0.0,
+            "seconds": 60.0,
+        }
+    ]
+
+    # Removed entities are no longer tracked
+    assert collector.compile(next_start + timedelta(minutes=5)) == []
+
+
+def test_recorded_states_are_collected(hass_recorder):
+    """Test the recorder collects the statistics of the states it records."""
+    hass = hass_recorder()
+
+    hass.states.set("sensor.temperature", "21.5", {ATTR_UNIT_OF_MEASUREMENT: "°C"})
+    hass.states.set("sensor.name", "kitchen")
+    wait_recording_done(hass)
+
+    rows = hass.data[DATA_INSTANCE].statistics_collector.compile(
+        period_start(dt_util.utcnow())
+    )
+    assert [(row["entity_id"], row["last"]) for row in rows] == [
+        ("sensor.temperature", 21.5)
+    ]
+
+
+def test_compile_hourly_statistics(hass_recorder):
+    """Test the hourly statistics are compiled from the short term ones."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    collector = instance.statistics_collector
+    hour_end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_start = hour_end - timedelta(hours=1)
+    first_start = hour_end - timedelta(minutes=10)
+    second_start = hour_end - timedelta(minutes=5)
+
+    collector.add_state("sensor.power", _power("10"), first_start)
+    compile_statistics(instance, first_start)
+    collector.add_state(
+        "sensor.power", _power("20"), second_start + timedelta(seconds=150)
+    )
+    compile_statistics(instance, second_start)
+
+    short_term = statistics_during_period(hass, hour_start, period="5minute")
+    assert [row["mean"] for row in short_term["sensor.power"]] == [10.0, 15.0]
+
+    assert statistics_during_period(hass, hour_start, hour_end, ["sensor.power"]) == {
+        "sensor.power": [
+            {
+                "entity_id": "sensor.power",
+                "start": hour_start.isoformat(),
+                "mean": 12.5,
+                "min": 10.0,
+                "max": 20.0,
+                "last": 20.0,
+                "sum": 10.0,
+            }
+        ]
+    }
+    assert statistics_during_period(hass, hour_end) == {}
+
+
+def test_compile_hourly_statistics_weighted_by_coverage(hass_recorder):
+    """Test short term means covering less of their period weigh less."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    collector = instance.statistics_collector
+    hour_end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_start = hour_end - timedelta(hours=1)
+    first_start = hour_end - timedelta(minutes=10)
+    second_start = hour_end - timedelta(minutes=5)
+
+    collector.add_state("sensor.power", _power("10"), first_start)
+    compile_statistics(instance, first_start)
+    collector.add_state("sensor.power", _power("40"), second_start)
+    collector.add_state("sensor.power", None, second_start + timedelta(minutes=1))
+    compile_statistics(instance, second_start)
+
+    short_term = statistics_during_period(hass, hour_start, period="5minute")
+    assert [row["mean"] for row in short_term["sensor.power"]] == [10.0, 40.0]
+
+    hourly = statistics_during_period(hass, hour_start, hour_end, ["sensor.power"])
+    assert hourly["sensor.power"][0]["mean"] == 15.0
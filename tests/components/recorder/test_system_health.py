@@ -0,0 +1,35 @@
+"""Test recorder system health."""
+from datetime import datetime
+import time
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.purge import PurgeMetrics
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from tests.common import async_init_recorder_component, get_system_health_info
+
+
+async def test_recorder_system_health(hass):
+    """Test the purge metrics are reported."""
+    await async_init_recorder_component(hass)
+    assert await async_setup_component(hass, "system_health", {})
+    info = await get_system_health_info(hass, "recorder")
+    assert info == {}
+
+    purge_before = datetime(2021, 1, 1, tzinfo=dt_util.UTC)
+    metrics = PurgeMetrics(
+        purge_before=purge_before, started=time.monotonic(), remaining_rows=400
+    )
+    metrics.add_deleted_rows(100)
+    hass.data[DATA_INSTANCE].purge_metrics = metrics
+
+    info = await get_system_health_info(hass, "recorder")
+    assert isinstance(info.pop("purge_rows_per_second"), int)
+    assert info == {
+        "purge_running": True,
+        "purge_before": purge_before.isoformat(),
+        "purge_progress": "25%",
+        "purge_deleted_rows": 100,
+        "purge_remaining_rows": 300,
+    }
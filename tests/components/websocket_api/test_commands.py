@@ -12,6 +12,7 @@ from homeassistant.components.websocket_api.const import URL
 from homeassistant.core import Context, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity
+from homeassistant.helpers.template import Template
 from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.loader import async_get_integration
 from homeassistant.setup import async_setup_component
@@ -467,6 +468,109 @@ async def test_subscribe_unsubscribe_events_state_changed(
     assert msg["event"]["data"]["entity_id"] == "light.permitted"
 
 
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities sends compressed states and their changes."""
+    hass.states.async_set("light.permitted", "off", {"color": "red"})
+    original_state = hass.states.get("light.permitted")
+
+    await websocket_client.send_json({"id": 7, "type": "subscribe_entities"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert msg["event"] == {
+        "a": {
+            "light.permitted": {
+                "a": {"color": "red"},
+                "c": original_state.context.id,
+                "lc": original_state.last_changed.timestamp(),
+                "s": "off",
+            }
+        }
+    }
+
+    hass.states.async_set("light.permitted", "on", {"effect": "help"})
+    new_state = hass.states.get("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "a": {"effect": "help"},
+                    "c": new_state.context.id,
+                    "lc": new_state.last_changed.timestamp(),
+                    "s": "on",
+                },
+                "-": {"a": ["color"]},
+            }
+        }
+    }
+
+    hass.states.async_set("light.permitted", "on", {"effect": "help", "color": "blue"})
+    updated_state = hass.states.get("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "a": {"color": "blue"},
+                    "c": updated_state.context.id,
+                    "lu": updated_state.last_updated.timestamp(),
+                },
+            }
+        }
+    }
+
+    hass.states.async_set("light.new", "on")
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.new"]
+    assert msg["event"]["a"]["light.new"]["s"] == "on"
+
+    hass.states.async_remove("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {"r": ["light.permitted"]}
+
+
+async def test_subscribe_entities_with_entity_ids(
+    hass, websocket_client, hass_admin_user
+):
+    """Test subscribe entities filters on entity ids and permissions."""
+    hass_admin_user.groups = []
+    hass_admin_user.mock_policy(
+        {"entities": {"entity_ids": {"light.permitted": True, "light.other": True}}}
+    )
+    hass.states.async_set("light.permitted", "off")
+    hass.states.async_set("light.not_permitted", "off")
+    hass.states.async_set("light.other", "off")
+
+    await websocket_client.send_json(
+        {
+            "id": 7,
+            "type": "subscribe_entities",
+            "entity_ids": ["light.permitted", "light.not_permitted"],
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.permitted"]
+
+    hass.states.async_set("light.not_permitted", "on")
+    hass.states.async_set("light.other", "on")
+    hass.states.async_set("light.permitted", "on")
+
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["c"]) == ["light.permitted"]
+    assert msg["event"]["c"]["light.permitted"]["+"]["s"] == "on"
+
+
 async def test_render_template_renders_template(hass, websocket_client):
     """Test simple template is rendered and updated."""
     hass.states.async_set("light.test", "on")
@@ -704,6 +808,64 @@ async def test_render_template_returns_with_match_all(hass, websocket_client):
     assert msg["success"]
 
 
+async def test_render_template_cache(hass, websocket_client, hass_admin_user):
+    """Test reporting the render cache counters."""
+    hass.states.async_set("light.test", "on")
+    tpl = Template("{{ states('light.test') }}", hass)
+    tpl.async_render_to_info()
+    tpl.async_render_to_info()
+
+    await websocket_client.send_json({"id": 5, "type": "render_template/cache"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+    assert msg["result"] == {
+        "hits": 1,
+        "misses": 1,
+        "size": 1,
+        "templates": [
+            {"template": "{{ states('light.test') }}", "hits": 1, "misses": 1}
+        ],
+    }
+
+    hass_admin_user.groups = []
+    await websocket_client.send_json({"id": 6, "type": "render_template/cache"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_UNAUTHORIZED
+
+
+async def test_render_template_statistics(hass, websocket_client, hass_admin_user):
+    """Test reporting the render time statistics."""
+    Template("{{ states('light.test') | lower }}", hass).async_render_to_info()
+
+    await websocket_client.send_json({"id": 5, "type": "render_template/statistics"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+    assert msg["result"]["buckets"] == [0.001, 0.005, 0.01, 0.05, 0.1, 0.5]
+    assert len(msg["result"]["templates"]) == 1
+    stats = msg["result"]["templates"][0]
+    assert stats["template"] == "{{ states('light.test') | lower }}"
+    assert stats["renders"] == 1
+    assert sum(stats["histogram"]) == 1
+    assert stats["quarantined_until"] is None
+
+    hass_admin_user.groups = []
+    await websocket_client.send_json({"id": 6, "type": "render_template/statistics"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_UNAUTHORIZED
+
+
 async def test_manifest_list(hass, websocket_client):
     """Test loading manifests."""
     http = await async_get_integration(hass, "http")
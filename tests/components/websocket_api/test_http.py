@@ -1,11 +1,18 @@
 """Test Websocket API http module."""
+import asyncio
 from datetime import timedelta
-from unittest.mock import patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from aiohttp import WSMsgType
 import pytest
 
 from homeassistant.components.websocket_api import const, http
+from homeassistant.components.websocket_api.auth import (
+    TYPE_AUTH,
+    TYPE_AUTH_OK,
+    TYPE_AUTH_REQUIRED,
+)
+from homeassistant.setup import async_setup_component
 from homeassistant.util.dt import utcnow
 
 from tests.common import async_fire_time_changed
@@ -33,6 +40,39 @@ async def test_pending_msg_overflow(hass, mock_low_queue, websocket_client):
     assert msg.type == WSMsgType.close
 
 
+async def test_pending_msg_overflow_batched(hass, mock_low_queue, websocket_client):
+    """Test a client reading batches gets the queue batched before disconnecting."""
+    await websocket_client.send_json(
+        {
+            "id": 1,
+            "type": "supported_features",
+            "features": {const.FEATURE_COALESCE_MESSAGES: 1},
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    handler = next(iter(hass.data[const.DATA_WRITER_METRICS].handlers))
+    for iden in range(2, 12):
+        handler._send_message({"id": iden})
+    assert handler.pending_messages == 10
+
+    idens = []
+    while len(idens) < 10:
+        msgs = await websocket_client.receive_json()
+        idens.extend(msg["id"] for msg in (msgs if isinstance(msgs, list) else [msgs]))
+    assert idens == list(range(2, 12))
+    assert handler.pending_messages == 0
+
+    # There is still a limit
+    for iden in range(12, 12 + 5 * (const.MAX_PENDING_MSG_BATCHED + 1)):
+        handler._send_message({"id": iden})
+    msg = await websocket_client.receive()
+    while msg.type == WSMsgType.text:
+        msg = await websocket_client.receive()
+    assert msg.type == WSMsgType.close
+
+
 async def test_pending_msg_peak(hass, mock_low_peak, hass_ws_client, caplog):
     """Test pending msg overflow command."""
     orig_handler = http.WebSocketHandler
@@ -66,6 +106,169 @@ async def test_pending_msg_peak(hass, mock_low_peak, hass_ws_client, caplog):
     assert "Client unable to keep up with pending messages" in caplog.text
 
 
+async def test_coalesced_messages(hass, websocket_client):
+    """Test queued messages are batched and superseded states coalesced."""
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "supported_features",
+            "features": {const.FEATURE_COALESCE_MESSAGES: 1},
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    await websocket_client.send_json(
+        {"id": 6, "type": "subscribe_events", "event_type": "state_changed"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    hass.states.async_set("light.kitchen", "1")
+    hass.states.async_set("light.kitchen", "2")
+    hass.states.async_set("light.living_room", "on")
+    hass.states.async_set("light.kitchen", "3")
+
+    msgs = await websocket_client.receive_json()
+    assert [
+        (msg["event"]["data"]["entity_id"], msg["event"]["data"]["new_state"]["state"])
+        for msg in msgs
+    ] == [("light.kitchen", "3"), ("light.living_room", "on")]
+
+    metrics = hass.data[const.DATA_WRITER_METRICS]
+    assert metrics.batched_frames == 1
+    assert metrics.coalesced_messages == 2
+    assert metrics.pending_messages == 0
+
+
+async def test_drain(hass, websocket_client):
+    """Test waiting until the queued messages are written."""
+    handler = next(iter(hass.data[const.DATA_WRITER_METRICS].handlers))
+    for iden in range(3):
+        handler._send_message({"id": iden})
+    drained = hass.async_create_task(handler._async_drain(0))
+
+    assert [(await websocket_client.receive_json())["id"] for _ in range(3)] == [
+        0,
+        1,
+        2,
+    ]
+    await asyncio.wait_for(drained, 5)
+    assert handler.pending_messages == 0
+
+
+async def test_compressed_messages(hass, aiohttp_client, hass_access_token):
+    """Test messages from the threshold size on are sent compressed."""
+    assert await async_setup_component(hass, "websocket_api", {})
+    client = await aiohttp_client(hass.http.app)
+    websocket_client = await client.ws_connect(const.URL, compress=15)
+    assert websocket_client.compress == 15
+
+    auth_msg = await websocket_client.receive_json()
+    assert auth_msg["type"] == TYPE_AUTH_REQUIRED
+    await websocket_client.send_json(
+        {"type": TYPE_AUTH, "access_token": hass_access_token}
+    )
+    auth_msg = await websocket_client.receive_json()
+    assert auth_msg["type"] == TYPE_AUTH_OK
+
+    metrics = hass.data[const.DATA_WRITER_METRICS]
+
+    sent_bytes = metrics.sent_bytes
+    await websocket_client.send_json({"id": 5, "type": "ping"})
+    msg = await websocket_client.receive_str()
+    # Sent raw with the two bytes frame header
+    assert metrics.sent_bytes - sent_bytes == len(msg) + 2
+
+    for idx in range(50):
+        hass.states.async_set(
+            f"light.kitchen_{idx}", "on", {"friendly_name": f"Kitchen {idx}"}
+        )
+    sent_bytes = metrics.sent_bytes
+    await websocket_client.send_json({"id": 6, "type": "get_states"})
+    msg = await websocket_client.receive_str()
+    assert len(msg) > const.DEFAULT_COMPRESSION_THRESHOLD
+    assert metrics.sent_bytes - sent_bytes < len(msg) / 3
+
+
+async def test_small_message_does_not_leak_uncompressed_state(hass):
+    """Test frames sent while a small message drains keep their compression."""
+    drained = asyncio.Event()
+    protocol = Mock(_drain_helper=AsyncMock(side_effect=drained.wait))
+    transport = Mock(is_closing=Mock(return_value=False))
+    writer = http._WebSocketWriter(
+        protocol,
+        transport,
+        compress=15,
+        limit=1,
+        level=const.DEFAULT_COMPRESSION_LEVEL,
+        threshold=100,
+        metrics=http.WriterMetrics(),
+    )
+
+    small = hass.async_create_task(writer.send("small"))
+    await asyncio.sleep(0)
+    ping = hass.async_create_task(writer.ping())
+    large = hass.async_create_task(writer.send("large" * 100))
+    await asyncio.sleep(0)
+    assert writer.compress == 0
+    drained.set()
+    await asyncio.gather(small, ping, large)
+
+    assert writer.compress == 15
+    frames = [call[0][0] for call in transport.write.call_args_list]
+    # The RSV1 bit marks a compressed frame
+    assert [(frame[0] & 0x0F, bool(frame[0] & 0x40)) for frame in frames] == [
+        (WSMsgType.TEXT, False),
+        (WSMsgType.PING, False),
+        (WSMsgType.TEXT, True),
+    ]
+
+
+def test_writer_internals():
+    """Test the pinned aiohttp has the writer internals the compression tunes."""
+    assert http.WRITER_INTERNALS
+
+
+async def test_compression_without_writer_internals(
+    hass, aiohttp_client, hass_access_token
+):
+    """Test the public permessage-deflate support without the writer internals."""
+    assert await async_setup_component(hass, "websocket_api", {})
+    client = await aiohttp_client(hass.http.app)
+    with patch.object(http, "WRITER_INTERNALS", False):
+        websocket_client = await client.ws_connect(const.URL, compress=15)
+        assert websocket_client.compress == 15
+
+        auth_msg = await websocket_client.receive_json()
+        assert auth_msg["type"] == TYPE_AUTH_REQUIRED
+        await websocket_client.send_json(
+            {"type": TYPE_AUTH, "access_token": hass_access_token}
+        )
+        auth_msg = await websocket_client.receive_json()
+        assert auth_msg["type"] == TYPE_AUTH_OK
+
+        metrics = hass.data[const.DATA_WRITER_METRICS]
+        sent_bytes = metrics.sent_bytes
+        await websocket_client.send_json({"id": 5, "type": "ping"})
+        msg = await websocket_client.receive_str()
+        # Only the payload is counted
+        assert metrics.sent_bytes - sent_bytes == len(msg)
+
+
+async def test_compression_disabled(hass, hass_ws_client):
+    """Test permessage-deflate is not negotiated with compression level 0."""
+    assert await async_setup_component(
+        hass, "websocket_api", {"websocket_api": {"compression_level": 0}}
+    )
+    websocket_client = await hass_ws_client(hass)
+    assert websocket_client.compress == 0
+
+    await websocket_client.send_json({"id": 5, "type": "get_states"})
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+
 async def test_non_json_message(hass, websocket_client, caplog):
     """Test trying to serialze non JSON objects."""
     bad_data = object()
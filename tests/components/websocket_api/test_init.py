@@ -5,6 +5,7 @@ from aiohttp import WSMsgType
 import voluptuous as vol
 
 from homeassistant.components.websocket_api import const, messages
+from homeassistant.setup import async_setup_component
 
 
 async def test_invalid_message_format(websocket_client):
@@ -81,3 +82,13 @@ async def test_invalid_vol(hass, websocket_client):
     assert not msg["success"]
     assert msg["error"]["code"] == const.ERR_INVALID_FORMAT
     assert "expected str for dictionary value" in msg["error"]["message"]
+
+
+async def test_setup_without_options(hass, hass_ws_client):
+    """Test setting up with an empty websocket_api config entry."""
+    assert await async_setup_component(hass, const.DOMAIN, {const.DOMAIN: None})
+    websocket_client = await hass_ws_client(hass)
+
+    await websocket_client.send_json({"id": 5, "type": "ping"})
+    msg = await websocket_client.receive_json()
+    assert msg["type"] == "pong"
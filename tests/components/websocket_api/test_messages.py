@@ -1,8 +1,12 @@
 """Test Websocket API messages module."""
 
+import json
+
+from homeassistant.components.websocket_api.const import JSON_DUMP
 from homeassistant.components.websocket_api.messages import (
     _cached_event_message as lru_event_cache,
     cached_event_message,
+    event_message,
     message_to_json,
 )
 from homeassistant.const import EVENT_STATE_CHANGED
@@ -96,3 +100,30 @@ async def test_message_to_json(caplog):
 
 class _Unserializeable:
     """A class that cannot be serialized."""
+
+
+async def test_cached_state_changed_event_message(hass):
+    """Test state changed event messages reuse the serialized states."""
+
+    events = []
+
+    @callback
+    def _event_listener(event):
+        events.append(event)
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _event_listener)
+
+    hass.states.async_set("light.window", "on", {"brightness": 100})
+    hass.states.async_set("light.window", "off")
+    hass.bus.async_fire(EVENT_STATE_CHANGED, {"entity_id": "light.window"})
+    await hass.async_block_till_done()
+
+    assert len(events) == 3
+    new_state = hass.states.get("light.window")
+    assert events[1].data["new_state"] is new_state
+    assert new_state.as_json() in cached_event_message(2, events[1])
+
+    for event in events:
+        assert json.loads(cached_event_message(2, event)) == json.loads(
+            JSON_DUMP(event_message(2, event))
+        )
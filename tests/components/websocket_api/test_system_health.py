@@ -0,0 +1,28 @@
+"""Test websocket API system health."""
+from homeassistant.setup import async_setup_component
+
+from tests.common import get_system_health_info
+
+
+async def test_websocket_api_system_health(hass, hass_ws_client):
+    """Test the writer metrics are reported."""
+    assert await async_setup_component(hass, "websocket_api", {})
+    assert await async_setup_component(hass, "system_health", {})
+    info = await get_system_health_info(hass, "websocket_api")
+    assert info == {
+        "connected_clients": 0,
+        "pending_messages": 0,
+        "batched_frames": 0,
+        "coalesced_messages": 0,
+        "slow_client_disconnects": 0,
+        "sent_bytes": 0,
+    }
+
+    websocket_client = await hass_ws_client(hass)
+    await websocket_client.send_json({"id": 5, "type": "ping"})
+    msg = await websocket_client.receive_json()
+    assert msg["type"] == "pong"
+
+    info = await get_system_health_info(hass, "websocket_api")
+    assert info["connected_clients"] == 1
+    assert info["sent_bytes"] > 0
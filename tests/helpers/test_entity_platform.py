@@ -6,7 +6,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import EVENT_STATE_CHANGED, PERCENTAGE
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
 from homeassistant.helpers import entity_platform, entity_registry
@@ -977,6 +977,29 @@ async def test_setup_entry_with_entities_that_block_forever(hass, caplog):
     assert "test" in caplog.text
 
 
+async def test_adding_entities_writes_states_per_iteration(hass):
+    """Test states of new entities are written in batches as they finish."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    seen = []
+
+    @callback
+    def listener(event):
+        seen.append(len(hass.states.async_entity_ids()))
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+
+    await component.async_add_entities(
+        [
+            SlowEntity(name="entity_1"),
+            MockEntity(name="entity_2"),
+            MockEntity(name="entity_3"),
+        ]
+    )
+
+    # The fast entities are written together without waiting for the slow one
+    assert seen == [2, 2, 3]
+
+
 async def test_two_platforms_add_same_entity(hass):
     """Test two platforms in the same domain adding an entity with the same name."""
     entity_platform1 = MockEntityPlatform(
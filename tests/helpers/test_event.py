@@ -26,6 +26,7 @@ from homeassistant.helpers.event import (
     async_track_state_change,
     async_track_state_change_event,
     async_track_state_change_filtered,
+    async_track_state_change_match,
     async_track_state_removed_domain,
     async_track_sunrise,
     async_track_sunset,
@@ -531,6 +532,87 @@ async def test_async_track_state_change_event_with_empty_list(hass):
     unsub_single()
 
 
+async def test_async_track_state_change_match(hass, caplog):
+    """Test trackers with equal match keys share the matcher."""
+    match_calls = []
+    first_tracker = []
+    second_tracker = []
+    other_tracker = []
+
+    def match_to_on(event):
+        match_calls.append(event.data["entity_id"])
+        new_state = event.data.get("new_state")
+        if new_state is None or new_state.state != "on":
+            return None
+        return new_state.state
+
+    @ha.callback
+    def first_callback(event, result):
+        first_tracker.append((event.data["entity_id"], result))
+
+    @ha.callback
+    def second_callback(event, result):
+        second_tracker.append((event.data["entity_id"], result))
+
+    @ha.callback
+    def other_callback(event, result):
+        other_tracker.append((event.data["entity_id"], result))
+
+    @ha.callback
+    def callback_that_throws(event, result):
+        raise ValueError
+
+    unsub_first = async_track_state_change_match(
+        hass, ["light.Bowl"], "to_on", match_to_on, first_callback
+    )
+    unsub_second = async_track_state_change_match(
+        hass, ["light.bowl", "switch.kitchen"], "to_on", match_to_on, second_callback
+    )
+    unsub_throws = async_track_state_change_match(
+        hass, "light.bowl", "to_on", match_to_on, callback_that_throws
+    )
+    unsub_other = async_track_state_change_match(
+        hass, "light.bowl", "any", lambda event: False, other_callback
+    )
+
+    hass.states.async_set("light.bowl", "on")
+    await hass.async_block_till_done()
+    assert match_calls == ["light.bowl"]
+    assert first_tracker == [("light.bowl", "on")]
+    assert second_tracker == [("light.bowl", "on")]
+    assert other_tracker == [("light.bowl", False)]
+    assert "Error while processing state changed for light.bowl" in caplog.text
+
+    hass.states.async_set("light.bowl", "off")
+    hass.states.async_set("switch.kitchen", "on")
+    await hass.async_block_till_done()
+    assert match_calls == ["light.bowl", "light.bowl", "switch.kitchen"]
+    assert first_tracker == [("light.bowl", "on")]
+    assert second_tracker == [("light.bowl", "on"), ("switch.kitchen", "on")]
+    assert len(other_tracker) == 2
+
+    unsub_first()
+    unsub_throws()
+    # Removing again does nothing
+    unsub_first()
+    hass.states.async_set("light.bowl", "on")
+    await hass.async_block_till_done()
+    assert len(first_tracker) == 1
+    assert len(second_tracker) == 3
+    assert len(other_tracker) == 3
+
+    unsub_second()
+    unsub_other()
+    assert "track_state_change_listener" not in hass.data
+    assert hass.data["track_state_match_groups"] == {}
+    assert hass.data["track_state_match_listeners"] == {}
+
+    hass.states.async_set("light.bowl", "off")
+    await hass.async_block_till_done()
+    assert len(match_calls) == 4
+    assert len(other_tracker) == 3
+
+
 async def test_async_track_state_added_domain(hass):
     """Test async_track_state_added_domain."""
     single_entity_id_tracker = []
@@ -2634,6 +2716,8 @@ async def test_async_track_time_change(hass):
     await hass.async_block_till_done()
     assert len(specific_runs) == 1
     assert len(wildcard_runs) == 1
+    # Without a pattern the action gets the UTC time, like the time changed event
+    assert wildcard_runs[0].tzinfo is dt_util.UTC
 
     async_fire_time_changed(
         hass, datetime(now.year + 1, 5, 24, 12, 0, 15, 999999, tzinfo=dt_util.UTC)
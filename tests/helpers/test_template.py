@@ -1,5 +1,6 @@
 """Test Home Assistant template helper methods."""
 from datetime import datetime
+import gc
 import math
 import random
 from unittest.mock import patch
@@ -2055,6 +2056,135 @@ def test_urlencode(hass):
     assert tpl.async_render() == "the%20quick%20brown%20fox%20%3D%20true"
 
 
+def test_render_to_info_cache(hass):
+    """Test render results are reused until a tracked state changes."""
+    hass.states.async_set("light.a", "on")
+    hass.states.async_set("light.b", "off")
+    template_str = "{{ states('light.a') }} {{ states.light | count }}"
+
+    with patch.object(
+        template.Template,
+        "async_render",
+        autospec=True,
+        side_effect=template.Template.async_render,
+    ) as mock_render:
+        first = template.Template(template_str, hass).async_render_to_info()
+        second = template.Template(template_str, hass).async_render_to_info()
+        assert mock_render.call_count == 1
+
+    assert first.result() == second.result() == "on 2"
+    assert second.entities == {"light.a"}
+    assert second.domains_lifecycle == {"light"}
+    assert second.template is not first.template
+
+    # A state change in a tracked domain invalidates the entry
+    hass.states.async_set("light.b", "on")
+    info = template.Template(template_str, hass).async_render_to_info()
+    assert info.result() == "on 2"
+
+    hass.states.async_set("light.c", "on")
+    info = template.Template(template_str, hass).async_render_to_info()
+    assert info.result() == "on 3"
+
+    hass.states.async_set("light.a", "off")
+    info = template.Template(template_str, hass).async_render_to_info()
+    assert info.result() == "off 3"
+
+    # Changes to states the render did not read keep the entry
+    hass.states.async_set("switch.a", "on")
+    info = template.Template(template_str, hass).async_render_to_info()
+    assert info.result() == "off 3"
+
+    cache_info = template.async_render_cache_info(hass)
+    assert cache_info["hits"] == 2
+    assert cache_info["misses"] == 4
+    assert cache_info["size"] == 1
+    assert cache_info["templates"] == [
+        {"template": template_str, "hits": 2, "misses": 4}
+    ]
+
+
+def test_render_to_info_cache_variables(hass):
+    """Test render results are cached per variables."""
+    tpl = template.Template("{{ value }}", hass)
+
+    assert tpl.async_render_to_info({"value": 1}).result() == 1
+    assert tpl.async_render_to_info({"value": 2}).result() == 2
+    assert tpl.async_render_to_info({"value": True}).result() is True
+    assert tpl.async_render_to_info({"value": 1}).result() == 1
+    assert tpl.async_render_to_info({"value": [1]}).result() == [1]
+    assert tpl.async_render_to_info({"value": [1]}).result() == [1]
+
+    cache_info = template.async_render_cache_info(hass)
+    assert cache_info["hits"] == 1
+    assert cache_info["misses"] == 3
+    assert cache_info["size"] == 3
+
+
+def test_render_to_info_cache_skips_unreproducible(hass):
+    """Test renders depending on time, randomness or errors are not cached."""
+    for template_str in (
+        "{{ now() }}",
+        "{{ [1, 2, 3] | random }}",
+        "{{ relative_time(strptime('2000-01-01', '%Y-%m-%d')) }}",
+        "{{ states('sensor.a') | unknown_filter }}",
+        "{{ 1 / 0 }}",
+    ):
+        tpl = template.Template(template_str, hass)
+        tpl.async_render_to_info()
+        tpl.async_render_to_info()
+
+    cache_info = template.async_render_cache_info(hass)
+    assert cache_info["hits"] == 0
+    assert cache_info["size"] == 0
+
+
+def test_render_to_info_cache_skips_all_states(hass):
+    """Test templates reading all states are not cached."""
+    hass.states.async_set("light.a", "on")
+    tpl = template.Template("{{ states | count }}", hass)
+
+    assert tpl.async_render_to_info().result() == 1
+    assert tpl.async_render_to_info().result() == 1
+    hass.states.async_set("switch.a", "on")
+    assert tpl.async_render_to_info().result() == 2
+
+    cache_info = template.async_render_cache_info(hass)
+    assert cache_info["hits"] == 0
+    assert cache_info["size"] == 0
+
+
+def test_render_to_info_cache_skips_config(hass):
+    """Test renders depending on the configuration are not cached."""
+    hass.states.async_set(
+        "zone.school", "zoning", {"latitude": 32.9, "longitude": -117.2}
+    )
+    tpl = template.Template("{{ distance(states.zone.school) | round }}", hass)
+    distance = tpl.async_render_to_info().result()
+    hass.config.latitude = 32.9
+    hass.config.longitude = -117.2
+    assert tpl.async_render_to_info().result() != distance
+
+    for template_str in (
+        "{{ closest(states.zone).entity_id }}",
+        "{{ states.zone | closest }}",
+        "{{ as_local(states.zone.school.last_changed) }}",
+        "{{ states.zone.school.last_changed | as_local }}",
+        "{{ as_timestamp(date) }}",
+        "{{ date | as_timestamp }}",
+        "{{ timestamp | timestamp_custom('%H') }}",
+        "{{ timestamp | timestamp_local }}",
+    ):
+        tpl = template.Template(template_str, hass)
+        variables = {"date": "2021-01-01 00:00:00", "timestamp": 1600000000}
+        tpl.async_render_to_info(variables)
+        tpl.async_render_to_info(variables)
+
+    cache_info = template.async_render_cache_info(hass)
+    assert cache_info["hits"] == 0
+    assert cache_info["size"] == 0
+
+
 async def test_cache_garbage_collection():
     """Test caching a template."""
     template_string = (
@@ -2086,6 +2216,197 @@ async def test_cache_garbage_collection():
     )  # pylint: disable=protected-access
 
 
+async def test_compiled_cache_shared_between_instances(hass):
+    """Test identical templates share the bound jinja template."""
+    template_string = "{{ states('sensor.test') | upper }}"
+    tpl = template.Template(template_string, hass)
+    tpl2 = template.Template(template_string, hass)
+    tpl3 = template.Template("{{ states('sensor.other') | upper }}", hass)
+
+    assert tpl.async_render() == tpl2.async_render() == "UNKNOWN"
+    tpl3.async_render()
+    # pylint: disable=protected-access
+    assert tpl._compiled is tpl2._compiled
+    assert tpl._compiled is not tpl3._compiled
+
+    compiled_cache = tpl._env.compiled_cache
+    assert compiled_cache.get(template_string) is tpl._compiled
+    del tpl
+    gc.collect()
+    assert compiled_cache.get(template_string) is not None
+    del tpl2
+    gc.collect()
+    assert compiled_cache.get(template_string) is None
+
+
+@pytest.mark.parametrize(
+    "template_str",
+    [
+        "{{ states('sensor.temperature') }}",
+        '{{ states("Sensor.Temperature") }}',
+        "{{ states('sensor.missing') }}",
+        "{{ states('invalid') }}",
+        "{{- states( 'sensor.temperature' ) | float -}}",
+        "{{ states('sensor.text') | float }}",
+        "{{ states('sensor.text') | int }}",
+        "{{ is_state('light.kitchen', 'on') }}",
+        "{{ is_state('light.kitchen','off') }}",
+        "{{ is_state('light.missing', 'on') }}",
+        "{{ is_state('light.kitchen', 'on') | int }}",
+        "{{ state_attr('light.kitchen', 'brightness') }}",
+        "{{ state_attr('light.kitchen', 'color') }}",
+        "{{ state_attr('light.kitchen', 'missing') }}",
+        "{{ state_attr('light.missing', 'brightness') }}",
+        "{{ state_attr('light.kitchen', 'brightness') | float }}",
+        '{{ state_attr("light.kitchen", "level") | int }}',
+    ],
+)
+def test_trivial_template_fast_path(hass, template_str):
+    """Test trivial templates render like jinja without entering it."""
+    hass.states.async_set("sensor.temperature", "21.5")
+    hass.states.async_set("sensor.text", "warm")
+    hass.states.async_set(
+        "light.kitchen",
+        "on",
+        {"brightness": 128, "color": [255, 0, 0], "level": "42.7"},
+    )
+
+    fast_tpl = template.Template(template_str, hass)
+    jinja_tpl = template.Template(template_str, hass)
+    # pylint: disable=protected-access
+    assert fast_tpl._fast_render is not None
+    jinja_tpl._fast_render = None
+
+    with patch.object(
+        template.Template, "_ensure_compiled", side_effect=AssertionError
+    ):
+        fast_info = fast_tpl.async_render_to_info()
+    jinja_info = jinja_tpl.async_render_to_info()
+
+    assert fast_info.result() == jinja_info.result()
+    assert type(fast_info.result()) is type(jinja_info.result())
+    assert fast_info.entities == jinja_info.entities
+    assert fast_tpl.async_render(parse_result=False) == jinja_tpl.async_render(
+        parse_result=False
+    )
+
+
+@pytest.mark.parametrize(
+    "template_str",
+    [
+        "{{ states('sensor.a', 'b') }}",
+        "{{ is_state('light.a') }}",
+        "{{ states('sensor.\\a') }}",
+        "{{ states('sensor.a') | round }}",
+        "{{ states('sensor.a') }} {{ states('sensor.b') }}",
+        "{{ states(entity) }}",
+        "{% if is_state('light.a', 'on') %}on{% endif %}",
+    ],
+)
+def test_trivial_template_fast_path_not_used(hass, template_str):
+    """Test templates outside the trivial shapes are rendered by jinja."""
+    # pylint: disable=protected-access
+    assert template.Template(template_str, hass)._fast_render is None
+
+
+def test_trivial_template_fast_path_shadowed(hass):
+    """Test variables shadowing the template functions disable the fast path."""
+    hass.states.async_set("sensor.a", "on")
+    tpl = template.Template("{{ states('sensor.a') }}", hass)
+
+    assert tpl.async_render() == "on"
+    assert tpl.async_render({"states": lambda entity_id: "shadowed"}) == "shadowed"
+
+
+def test_render_to_info_operation_limit(hass, caplog):
+    """Test templates exceeding the operation limit are quarantined."""
+    for idx in range(20):
+        hass.states.async_set(f"sensor.test_{idx}", idx)
+    template_str = "{% for state in states %}{{ state.state }}{% endfor %}"
+    tpl = template.Template(template_str, hass)
+    now = dt_util.utcnow()
+
+    hass.config.template_operation_limit = 10
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        info = tpl.async_render_to_info()
+        assert "exceeded the limit of 10 operations" in str(info.exception)
+        assert info.rate_limit == template.RENDER_QUARANTINE
+        assert "Template exceeded its render budget" in caplog.text
+
+        with patch.object(template.Template, "async_render") as mock_render:
+            info = tpl.async_render_to_info()
+        assert not mock_render.called
+        assert "rendering is suspended" in str(info.exception)
+        assert info.rate_limit == template.RENDER_QUARANTINE
+
+        # Other templates are not affected
+        info = template.Template("{{ states('sensor.test_1') }}", hass)
+        assert info.async_render_to_info().result() == 1
+
+        # Nor are other trackers of the same template
+        info = template.Template(template_str, hass).async_render_to_info()
+        assert "exceeded the limit of 10 operations" in str(info.exception)
+
+        statistics = template.async_render_statistics(hass)
+    assert statistics["templates"][0]["template"] == template_str
+    assert statistics["templates"][0]["budget_exceeded"] == 2
+    assert statistics["templates"][0]["quarantined_until"] == (
+        now + template.RENDER_QUARANTINE
+    )
+
+    hass.config.template_operation_limit = None
+    with patch(
+        "homeassistant.util.dt.utcnow",
+        return_value=now + template.RENDER_QUARANTINE,
+    ):
+        info = tpl.async_render_to_info()
+    assert info.result() == "".join(sorted(str(idx) for idx in range(20)))
+    assert info.rate_limit == template.ALL_STATES_RATE_LIMIT
+
+
+def test_render_to_info_cpu_budget(hass):
+    """Test templates exceeding the CPU budget are stopped."""
+    hass.states.async_set("sensor.test", "on")
+    tpl = template.Template(
+        "{% for idx in range(100000) %}{{ states.sensor.test.state }}{% endfor %}",
+        hass,
+    )
+
+    hass.config.template_cpu_budget = 0.001
+    with patch("time.thread_time", side_effect=[0, 1]):
+        info = tpl.async_render_to_info()
+    assert "exceeded the CPU budget of 0.001s" in str(info.exception)
+
+
+def test_render_statistics(hass):
+    """Test render times of tracked templates are recorded."""
+    assert template.async_render_statistics(hass) == {
+        "buckets": list(template.RENDER_TIME_BUCKETS),
+        "templates": [],
+    }
+    hass.states.async_set("sensor.test", "on")
+    tpl = template.Template("{{ states.sensor.test.state }}", hass)
+
+    with patch("time.perf_counter", side_effect=[0, 0.002, 1, 1.2]):
+        tpl.async_render_to_info()
+        hass.states.async_set("sensor.test", "off")
+        tpl.async_render_to_info()
+    # Served from the render cache
+    tpl.async_render_to_info()
+
+    assert template.async_render_statistics(hass)["templates"] == [
+        {
+            "template": "{{ states.sensor.test.state }}",
+            "renders": 2,
+            "total_time": pytest.approx(0.202),
+            "max_time": pytest.approx(0.2),
+            "histogram": [0, 1, 0, 0, 0, 1, 0],
+            "budget_exceeded": 0,
+            "quarantined_until": None,
+        }
+    ]
+
+
 def test_is_template_string():
     """Test is template string."""
     assert template.is_template_string("{{ x }}") is True
@@ -472,6 +472,8 @@ async def test_loading_configuration(hass):
             "internal_url": "http://example.local",
             "media_dirs": {"mymedia": "/usr"},
             "legacy_templates": True,
+            "template_cpu_budget": 0.5,
+            "template_operation_limit": 1000,
         },
     )
 
@@ -489,6 +491,8 @@ async def test_loading_configuration(hass):
     assert hass.config.media_dirs == {"mymedia": "/usr"}
     assert hass.config.config_source == config_util.SOURCE_YAML
     assert hass.config.legacy_templates is True
+    assert hass.config.template_cpu_budget == 0.5
+    assert hass.config.template_operation_limit == 1000
 
 
 async def test_loading_configuration_temperature_unit(hass):
@@ -1,10 +1,13 @@
 """Test to verify that Home Assistant core works."""
 # pylint: disable=protected-access
 import asyncio
+import copy
 from datetime import datetime, timedelta
 import functools
+import json
 import logging
 import os
+import pickle
 from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, Mock, PropertyMock, patch
 
@@ -38,6 +41,7 @@ from homeassistant.exceptions import (
     InvalidStateError,
     ServiceNotFound,
 )
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
@@ -306,6 +310,7 @@ def test_event_as_dict():
     assert event.as_dict() == expected
     # 2nd time to verify cache
     assert event.as_dict() == expected
+    assert event.as_dict() is event.as_dict()
 
 
 def test_state_as_dict():
@@ -336,6 +341,83 @@ def test_state_as_dict():
     assert state.as_dict() is state.as_dict()
 
 
+def test_state_as_json():
+    """Test a State serialized to JSON."""
+    last_time = datetime(1984, 12, 8, 12, 0, 0)
+    state = ha.State(
+        "happy.happy",
+        "on",
+        {"pig": "dog", "when": last_time},
+        last_updated=last_time,
+        last_changed=last_time,
+    )
+    assert json.loads(state.as_json()) == json.loads(
+        json.dumps(state.as_dict(), cls=JSONEncoder)
+    )
+    # The same compact format as the embedded attributes
+    assert state.as_json() == ha.json_dumps(state.as_dict())
+    assert json.loads(state.attributes_json()) == {
+        "pig": "dog",
+        "when": last_time.isoformat(),
+    }
+    assert state.as_json() is state.as_json()
+    assert state.attributes_json() is state.attributes_json()
+
+    state = ha.State("happy.happy", "on", {"pig": float("NaN")})
+    with patch("homeassistant.core.json_dumps", wraps=ha.json_dumps) as dumps:
+        with pytest.raises(ValueError):
+            state.as_json()
+        calls = dumps.call_count
+        # The failure is cached
+        with pytest.raises(ValueError):
+            state.as_json()
+        with pytest.raises(ValueError):
+            state.as_compressed_state_json()
+    assert dumps.call_count == calls
+
+
+def test_state_as_compressed_state():
+    """Test a State as compressed dictionary and JSON."""
+    last_changed = datetime(1984, 12, 8, 12, 0, 0, tzinfo=dt_util.UTC)
+    last_updated = datetime(1984, 12, 8, 13, 0, 0, tzinfo=dt_util.UTC)
+    state = ha.State(
+        "happy.happy",
+        "on",
+        {"pig": "dog"},
+        last_updated=last_changed,
+        last_changed=last_changed,
+    )
+    expected = {
+        "s": "on",
+        "a": {"pig": "dog"},
+        "c": state.context.id,
+        "lc": last_changed.timestamp(),
+    }
+    assert state.as_compressed_state() == expected
+    assert json.loads(state.as_compressed_state_json()) == expected
+    assert state.as_compressed_state_json() == ha.json_dumps(expected)
+    assert state.as_compressed_state_json() is state.as_compressed_state_json()
+
+    context = ha.Context(user_id="abc")
+    state = ha.State(
+        "happy.happy",
+        "on",
+        last_updated=last_updated,
+        last_changed=last_changed,
+        context=context,
+    )
+    expected = {
+        "s": "on",
+        "a": {},
+        "c": context.as_dict(),
+        "lc": last_changed.timestamp(),
+        "lu": last_updated.timestamp(),
+    }
+    assert state.as_compressed_state() == expected
+    assert json.loads(state.as_compressed_state_json()) == expected
+    assert state.as_compressed_state_json() == ha.json_dumps(expected)
+
+
 async def test_eventbus_add_remove_listener(hass):
     """Test remove_listener method."""
     old_count = len(hass.bus.async_listeners())
@@ -471,6 +553,132 @@ async def test_eventbus_coroutine_event_listener(hass):
     assert len(coroutine_calls) == 1
 
 
+async def test_eventbus_callback_listener_runs_inline(hass):
+    """Test callback listeners run when the event is fired."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        calls.append(event.event_type)
+
+    unsub = hass.bus.async_listen("test_inline", listener)
+    hass.bus.async_fire("test_inline")
+    assert calls == ["test_inline"]
+
+    unsub()
+    hass.bus.async_fire("test_inline")
+    assert calls == ["test_inline"]
+
+    hass.bus.async_listen(MATCH_ALL, listener)
+    hass.bus.async_fire("test_inline")
+    assert calls == ["test_inline", "test_inline"]
+
+
+async def test_eventbus_nested_fire_keeps_order(hass):
+    """Test events fired by a listener are dispatched after the current one."""
+    calls = []
+
+    @ha.callback
+    def first_listener(event):
+        calls.append(("first", event.event_type))
+        if event.event_type == "test_outer":
+            hass.bus.async_fire("test_inner")
+
+    @ha.callback
+    def second_listener(event):
+        calls.append(("second", event.event_type))
+
+    hass.bus.async_listen(MATCH_ALL, first_listener)
+    hass.bus.async_listen(MATCH_ALL, second_listener)
+    hass.bus.async_fire("test_outer")
+
+    assert calls == [
+        ("first", "test_outer"),
+        ("second", "test_outer"),
+        ("first", "test_inner"),
+        ("second", "test_inner"),
+    ]
+
+
+async def test_eventbus_event_filter(hass):
+    """Test filtering events before the listener is run."""
+    calls = []
+    coroutine_calls = []
+
+    @ha.callback
+    def listener(event):
+        calls.append(event.data["entity_id"])
+
+    async def coroutine_listener(event):
+        coroutine_calls.append(event.data["entity_id"])
+
+    @ha.callback
+    def event_filter(event):
+        return event.data["entity_id"] == "light.kitchen"
+
+    unsub = hass.bus.async_listen("test_filter", listener, event_filter=event_filter)
+    hass.bus.async_listen("test_filter", coroutine_listener, event_filter=event_filter)
+
+    hass.bus.async_fire("test_filter", {"entity_id": "light.bedroom"})
+    hass.bus.async_fire("test_filter", {"entity_id": "light.kitchen"})
+    await hass.async_block_till_done()
+
+    assert calls == ["light.kitchen"]
+    assert coroutine_calls == ["light.kitchen"]
+
+    unsub()
+    assert hass.bus.async_listeners()["test_filter"] == 1
+
+
+async def test_eventbus_event_data_filter(hass):
+    """Test filtering events by matching event data."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        calls.append(event.data["entity_id"])
+
+    hass.bus.async_listen(
+        "test_filter",
+        listener,
+        event_filter={"entity_id": {"light.kitchen", "light.bedroom"}},
+    )
+    hass.bus.async_listen(
+        "test_filter", listener, event_filter={"entity_id": "light.hallway"}
+    )
+
+    hass.bus.async_fire("test_filter", {"entity_id": "light.kitchen"})
+    hass.bus.async_fire("test_filter", {"entity_id": "light.garage"})
+    hass.bus.async_fire("test_filter", {"entity_id": ["light.kitchen"]})
+    hass.bus.async_fire("test_filter", {"entity_id": "light.hallway"})
+    hass.bus.async_fire("test_filter", {"entity_id": "light.bedroom"})
+
+    assert calls == ["light.kitchen", "light.hallway", "light.bedroom"]
+
+
+async def test_eventbus_callback_listener_exception(hass):
+    """Test a failing callback listener does not stop the other listeners."""
+    calls = []
+
+    @ha.callback
+    def bad_listener(event):
+        raise ValueError("boom")
+
+    @ha.callback
+    def good_listener(event):
+        calls.append(event)
+
+    hass.bus.async_listen("test_exception", bad_listener)
+    hass.bus.async_listen("test_exception", good_listener)
+
+    with patch.object(hass.loop, "call_exception_handler") as mock_handler:
+        hass.bus.async_fire("test_exception")
+
+    assert len(calls) == 1
+    assert len(mock_handler.mock_calls) == 1
+    assert isinstance(mock_handler.mock_calls[0][1][0]["exception"], ValueError)
+
+
 def test_state_init():
     """Test state.init."""
     with pytest.raises(InvalidEntityFormatError):
@@ -637,6 +845,46 @@ async def test_statemachine_force_update(hass):
     assert len(events) == 1
 
 
+async def test_statemachine_set_many(hass):
+    """Test setting multiple states at once."""
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("light.kitchen", "off")
+    seen = []
+
+    @ha.callback
+    def listener(event):
+        # All states are written before the first event is dispatched
+        seen.append(
+            (
+                event.data["entity_id"],
+                hass.states.get("light.bowl").state,
+                hass.states.get("switch.ac").state,
+            )
+        )
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+    context = ha.Context()
+
+    hass.states.async_set_many(
+        [
+            ("light.bowl", "off", None, False, context),
+            ("light.kitchen", "off", None, False, None),
+            ("switch.AC", "on", {"mode": "cool"}, False, None),
+        ]
+    )
+
+    assert seen == [("light.bowl", "off", "on"), ("switch.ac", "off", "on")]
+    assert hass.states.get("light.bowl").context is context
+    assert hass.states.get("switch.ac").attributes == {"mode": "cool"}
+    assert (
+        hass.states.get("light.bowl").last_updated
+        == hass.states.get("switch.ac").last_updated
+    )
+
+    hass.states.async_set_many([("light.kitchen", "off", None, True, None)])
+    assert len(seen) == 3
+
+
 def test_service_call_repr():
     """Test ServiceCall repr."""
     call = ha.ServiceCall("homeassistant", "start")
@@ -821,6 +1069,8 @@ def test_config_defaults():
     assert config.media_dirs == {}
     assert config.safe_mode is False
     assert config.legacy_templates is False
+    assert config.template_cpu_budget is None
+    assert config.template_operation_limit is None
 
 
 def test_config_path_with_file():
@@ -972,8 +1222,17 @@ def test_create_timer(mock_monotonic, loop):
     ):
         ha._async_create_timer(hass)
 
-    assert len(funcs) == 2
-    fire_time_event, stop_timer = funcs
+        assert len(funcs) == 3
+        fire_time_event, listeners_changed, stop_timer = funcs
+
+        assert len(hass.bus._async_watch_listeners.mock_calls) == 1
+        event_type, action = hass.bus._async_watch_listeners.mock_calls[0][1]
+        assert event_type == EVENT_TIME_CHANGED
+        assert action is listeners_changed
+
+        # The timer only ticks once there are listeners
+        assert len(hass.loop.call_later.mock_calls) == 0
+        listeners_changed(True)
 
     assert len(hass.loop.call_later.mock_calls) == 1
     delay, callback, target = hass.loop.call_later.mock_calls[0][1]
@@ -1023,6 +1282,8 @@ def test_timer_out_of_sync(mock_monotonic, loop):
         return_value=datetime(2018, 12, 31, 3, 4, 5, 333333),
     ):
         ha._async_create_timer(hass)
+        _, listeners_changed = hass.bus._async_watch_listeners.mock_calls[0][1]
+        listeners_changed(True)
 
     delay, callback, target = hass.loop.call_later.mock_calls[0][1]
 
@@ -1047,8 +1308,8 @@ def test_timer_out_of_sync(mock_monotonic, loop):
 
         assert event_context_0 == event_context_1
 
-        assert len(funcs) == 2
-        fire_time_event, _ = funcs
+        assert len(funcs) == 3
+        fire_time_event, _, _ = funcs
 
     assert len(hass.loop.call_later.mock_calls) == 2
 
@@ -1058,6 +1319,41 @@ def test_timer_out_of_sync(mock_monotonic, loop):
     assert abs(target - 14.2) < 0.001
 
 
+async def test_timer_only_ticks_with_listeners(hass):
+    """Test the timer only ticks while EVENT_TIME_CHANGED has listeners."""
+    with patch.object(hass.loop, "call_later") as mock_call_later:
+        ha._async_create_timer(hass)
+        assert mock_call_later.call_count == 0
+
+        unsub = hass.bus.async_listen(EVENT_TIME_CHANGED, lambda event: None)
+        assert mock_call_later.call_count == 1
+        handle = mock_call_later.return_value
+
+        # A second listener does not schedule another tick
+        unsub_2 = hass.bus.async_listen(EVENT_TIME_CHANGED, lambda event: None)
+        assert mock_call_later.call_count == 1
+
+        unsub()
+        assert handle.cancel.call_count == 0
+        unsub_2()
+        assert handle.cancel.call_count == 1
+
+        # MATCH_ALL listeners do not keep the timer ticking
+        hass.bus.async_listen(MATCH_ALL, lambda event: None)
+        assert mock_call_later.call_count == 1
+
+        hass.bus.async_listen(EVENT_TIME_CHANGED, lambda event: None)
+        assert mock_call_later.call_count == 2
+
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+        assert handle.cancel.call_count == 2
+
+        # Listeners added after stop do not restart the timer
+        hass.bus.async_listen(EVENT_TIME_CHANGED, lambda event: None)
+        assert mock_call_later.call_count == 2
+
+
 async def test_hass_start_starts_the_timer(loop):
     """Test when hass starts, it starts the timer."""
     hass = ha.HomeAssistant()
@@ -1178,6 +1474,38 @@ def test_context():
     assert c.id is not None
 
 
+def test_context_lazy_id():
+    """Test the context id is generated once when first accessed."""
+    c = ha.Context()
+    assert c._id is ha._UNDEF
+    context_id = c.id
+    assert len(context_id) == 32
+    assert c.id == context_id
+    assert c.as_dict() == {"id": context_id, "parent_id": None, "user_id": None}
+    assert c.as_dict() is c.as_dict()
+
+    assert ha.Context(id=None).id is None
+    assert ha.Context(id="abc") == ha.Context(id="abc")
+    assert ha.Context(id="abc") != ha.Context(id="abc", user_id="user")
+    assert hash(ha.Context(id="abc")) == hash(ha.Context(id="abc"))
+
+    with pytest.raises(AttributeError):
+        c.user_id = "user"
+
+
+def test_context_copy_and_pickle():
+    """Test a context can be copied and pickled."""
+    lazy = ha.Context(user_id="user")
+    for context in (lazy, ha.Context(id=None), ha.Context("user", "parent", "abc")):
+        for clone in (
+            copy.copy(context),
+            copy.deepcopy(context),
+            pickle.loads(pickle.dumps(context)),
+        ):
+            assert clone == context
+            assert clone.as_dict() == context.as_dict()
+
+
 async def test_async_functions_with_callback(hass):
     """Test we deal with async functions accidentally marked as callback."""
     runs = []
@@ -0,0 +1,43 @@
+"""Test the JSON encoding of Home Assistant objects."""
+import json
+
+import pytest
+
+from homeassistant import core
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json_encoding import json_dumps, json_dumps_with_fallback
+
+
+def test_json_dumps():
+    """Test dumping Home Assistant objects to strict JSON."""
+    state = core.State("test.test", "hello")
+    now = dt_util.utcnow()
+
+    assert json.loads(json_dumps({"state": state, "now": now, "set": {1}})) == {
+        "state": json.loads(json.dumps(state.as_dict())),
+        "now": now.isoformat(),
+        "set": [1],
+    }
+
+    with pytest.raises(TypeError):
+        json_dumps(object())
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_json_dumps_rejects_non_finite_floats(value):
+    """Test non-finite floats are rejected like the standard library does."""
+    with pytest.raises(ValueError):
+        json_dumps({"list": [1, {"value": value}]})
+    with pytest.raises(ValueError):
+        json_dumps(core.State("test.test", "on", {"value": value}))
+
+    assert json_dumps({"value": None, "float": 1.5}) == '{"value":null,"float":1.5}'
+
+
+def test_json_dumps_with_fallback():
+    """Test the fallback is used when the data is not serializable."""
+    assert json_dumps_with_fallback(lambda: "dumped", lambda: "fallback") == "dumped"
+    assert (
+        json_dumps_with_fallback(lambda: json_dumps(float("nan")), lambda: "fallback")
+        == "fallback"
+    )